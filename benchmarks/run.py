@@ -0,0 +1,327 @@
+"""
+Benchmarks of the distance calculation methods, the Units distance selectors and the per-frame preparation of the bot.
+They run on synthetic observations (see synthetic.py), so no SC2 client is needed.
+
+Run from the repository root:
+    python -m benchmarks.run
+    python -m benchmarks.run --units 50 250 1000 --repeat 50 --benchmark distance
+    python -m benchmarks.run --compare benchmarks/results/<older commit>.json --max-ratio 1.2
+
+The results are saved as json, by default to benchmarks/results/<commit>.json, so they can be compared between commits.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import scipy
+from google import protobuf
+from loguru import logger
+
+from benchmarks.synthetic import create_bot, observation
+from sc2.game_state import GameState
+
+DEFAULT_UNIT_COUNTS = (50, 100, 250, 500, 1000)
+
+# A benchmark returns for a unit count a function that is timed and optionally a function that is run untimed before each timed run
+Benchmark = Callable[[int], Tuple[Callable[[], None], Optional[Callable[[], None]]]]
+BENCHMARKS: Dict[str, Benchmark] = {}
+# Runs the coroutines of the benchmarks, closed by run_benchmarks
+EVENT_LOOP = asyncio.new_event_loop()
+
+
+def benchmark(name: str):
+
+    def register(function: Benchmark) -> Benchmark:
+        BENCHMARKS[name] = function
+        return function
+
+    return register
+
+
+def _distance_method_benchmark(method: int) -> Benchmark:
+
+    def create(unit_count: int):
+        bot, _ = create_bot(unit_count, distance_calculation_method=method)
+        rng = random.Random(0)
+        units = bot.all_units
+        pairs = [(rng.choice(units), rng.choice(units)) for _ in range(1000)]
+
+        def run():
+            for unit1, unit2 in pairs:
+                bot._distance_squared_unit_to_unit(unit1, unit2)
+
+        def setup():
+            # Makes the next lookup calculate the distances of the frame again
+            bot._generated_frame = -100
+            if method:
+                bot.calculate_distances()
+
+        return run, setup if method else None
+
+    return create
+
+
+def _calculate_distances_benchmark(method: int) -> Benchmark:
+
+    def create(unit_count: int):
+        bot, _ = create_bot(unit_count, distance_calculation_method=method)
+        return bot.calculate_distances, None
+
+    return create
+
+
+for _method in range(1, 4):
+    benchmark(f"distance_method_{_method}_calculate")(_calculate_distances_benchmark(_method))
+for _method in range(5):
+    benchmark(f"distance_method_{_method}_1000_lookups")(_distance_method_benchmark(_method))
+
+
+@benchmark("units_closest_to")
+def _closest_to(unit_count: int):
+    bot, _ = create_bot(unit_count)
+    own_units, enemy_units = bot.units[:100], bot.enemy_units
+
+    def run():
+        for unit in own_units:
+            enemy_units.closest_to(unit)
+
+    return run, None
+
+
+@benchmark("units_closest_to_each")
+def _closest_to_each(unit_count: int):
+    bot, _ = create_bot(unit_count)
+    own_units, enemy_units = bot.units[:100], bot.enemy_units
+
+    def run():
+        enemy_units.closest_to_each(own_units)
+
+    return run, None
+
+
+@benchmark("units_closest_n_units")
+def _closest_n_units(unit_count: int):
+    bot, _ = create_bot(unit_count)
+    own_units, enemy_units = bot.units[:10], bot.enemy_units
+
+    def run():
+        for unit in own_units:
+            enemy_units.closest_n_units(unit, 5)
+
+    return run, None
+
+
+@benchmark("units_closer_than")
+def _closer_than(unit_count: int):
+    bot, _ = create_bot(unit_count)
+    own_units, enemy_units = bot.units[:100], bot.enemy_units
+
+    def run():
+        for unit in own_units:
+            enemy_units.closer_than(10, unit)
+
+    return run, None
+
+
+@benchmark("units_sorted_by_distance_to")
+def _sorted_by_distance_to(unit_count: int):
+    bot, _ = create_bot(unit_count)
+    own_units, enemy_units = bot.units[:10], bot.enemy_units
+
+    def run():
+        for unit in own_units:
+            enemy_units.sorted_by_distance_to(unit)
+
+    return run, None
+
+
+@benchmark("units_in_distance_of_group")
+def _in_distance_of_group(unit_count: int):
+    bot, _ = create_bot(unit_count)
+
+    def run():
+        bot.enemy_units.in_distance_of_group(bot.units, 5)
+
+    return run, None
+
+
+@benchmark("units_aggregates")
+def _aggregates(unit_count: int):
+    bot, game_info = create_bot(unit_count)
+    state = GameState(observation(unit_count, game_loop=1).observation)
+
+    def setup():
+        # New collections, so the aggregates are computed again
+        bot._prepare_step(state, game_info)
+
+    def run():
+        for units in (bot.units, bot.enemy_units):
+            _ = units.center, units.bounding_box, units.convex_hull, units.total("health"), units.total_ground_dps
+
+    return run, setup
+
+
+@benchmark("units_damage_matrix")
+def _damage_matrix(unit_count: int):
+    bot, _ = create_bot(unit_count)
+
+    def run():
+        bot.units.damage_matrix(bot.enemy_units)
+
+    return run, None
+
+
+@benchmark("prepare_units")
+def _prepare_units(unit_count: int):
+    bot, _ = create_bot(unit_count)
+    return bot._prepare_units, None
+
+
+@benchmark("prepare_step")
+def _prepare_step(unit_count: int):
+    bot, game_info = create_bot(unit_count)
+    state = GameState(observation(unit_count, game_loop=1).observation)
+
+    def run():
+        bot._prepare_step(state, game_info)
+
+    return run, None
+
+
+@benchmark("issue_events")
+def _issue_events(unit_count: int):
+    bot, game_info = create_bot(unit_count)
+    observations = [observation(unit_count).observation, observation(unit_count, changed=True).observation]
+    game_loop = 0
+
+    def setup():
+        # Two frames, where some units took damage, died or were created
+        nonlocal game_loop
+        for response_observation in observations:
+            game_loop += 1
+            response_observation.observation.game_loop = game_loop
+            bot._prepare_step(GameState(response_observation), game_info)
+
+    def run():
+        EVENT_LOOP.run_until_complete(bot.issue_events())
+
+    return run, setup
+
+
+def measure(run: Callable[[], None], setup: Optional[Callable[[], None]], repeat: int) -> List[float]:
+    """ Returns the duration of each run in seconds, after one untimed warm up run. """
+    durations = []
+    for index in range(repeat + 1):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        run()
+        if index:
+            durations.append(time.perf_counter() - start)
+    return durations
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, check=True, text=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_benchmarks(unit_counts: List[int], repeat: int, name_filter: str = "") -> dict:
+    results = []
+    for name, create in BENCHMARKS.items():
+        if name_filter not in name:
+            continue
+        for unit_count in unit_counts:
+            durations = measure(*create(unit_count), repeat)
+            result = {
+                "name": name,
+                "units": unit_count,
+                "min_ms": min(durations) * 1000,
+                "median_ms": statistics.median(durations) * 1000,
+                "mean_ms": statistics.mean(durations) * 1000,
+                "runs": len(durations),
+            }
+            results.append(result)
+            print(f"{name:<40} {unit_count:>5} units: {result['median_ms']:9.3f}ms median, {result['min_ms']:9.3f}ms min")
+    EVENT_LOOP.close()
+    return {
+        "metadata": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+            "scipy": scipy.__version__,
+            "protobuf": protobuf.__version__,
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def compare(previous: dict, current: dict, max_ratio: Optional[float]) -> bool:
+    """Prints the median of each benchmark relative to the previous results.
+    Returns False if a benchmark got slower than 'max_ratio' times its previous median."""
+    previous_medians = {(result["name"], result["units"]): result["median_ms"] for result in previous["results"]}
+    print(f"\nCompared to commit {previous['metadata']['commit']}:")
+    passed = True
+    for result in current["results"]:
+        previous_median = previous_medians.get((result["name"], result["units"]), None)
+        if not previous_median:
+            continue
+        ratio = result["median_ms"] / previous_median
+        regression = max_ratio is not None and ratio > max_ratio
+        passed = passed and not regression
+        print(
+            f"{result['name']:<40} {result['units']:>5} units: {previous_median:9.3f}ms -> {result['median_ms']:9.3f}ms "
+            f"({ratio:.2f}x){' REGRESSION' if regression else ''}"
+        )
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks of the python-sc2 internals on synthetic observations")
+    parser.add_argument("--units", type=int, nargs="+", default=list(DEFAULT_UNIT_COUNTS), help="unit counts to run")
+    parser.add_argument("--repeat", type=int, default=20, help="timed runs per benchmark and unit count")
+    parser.add_argument("--benchmark", default="", help="only run benchmarks whose name contains this")
+    parser.add_argument("--output", help="json file to save the results to, default: benchmarks/results/<commit>.json")
+    parser.add_argument("--compare", help="json file of previous results to compare with")
+    parser.add_argument("--max-ratio", type=float, help="exit with code 1 if a median got slower than this factor")
+    args = parser.parse_args()
+
+    # The synthetic bots would log their distance method switches and similar info
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    results = run_benchmarks(args.units, args.repeat, args.benchmark)
+    output = args.output or os.path.join(os.path.dirname(__file__), "results", f"{results['metadata']['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nSaved results to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+        if not compare(previous, results, args.max_ratio):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Synthetic game data, game info and observation protos, so the bot internals can be benchmarked without a SC2 client.
+"""
+from __future__ import annotations
+
+import random
+from typing import Tuple
+
+from s2clientprotocol import sc2api_pb2 as sc_pb
+
+from sc2.bot_ai import BotAI
+from sc2.data import Race
+from sc2.game_data import GameData
+from sc2.game_info import GameInfo
+from sc2.game_state import GameState
+from sc2.ids.ability_id import AbilityId
+from sc2.ids.unit_typeid import UnitTypeId
+
+MAP_SIZE = 128
+
+# Unit type: (attributes, creation ability, race, movement speed, weapons as (target type, damage, range, cooldown))
+UNIT_TYPES = {
+    UnitTypeId.NEXUS: ((2, 8), AbilityId.PROTOSSBUILD_NEXUS, Race.Protoss, 0, ()),
+    UnitTypeId.PYLON: ((2, 8), AbilityId.PROTOSSBUILD_PYLON, Race.Protoss, 0, ()),
+    UnitTypeId.PROBE: ((1, 3), AbilityId.NEXUSTRAIN_PROBE, Race.Protoss, 2.8125, ((1, 5, 0.1, 1.07), )),
+    UnitTypeId.ZEALOT: ((1, 3), AbilityId.GATEWAYTRAIN_ZEALOT, Race.Protoss, 2.25, ((1, 8, 0.1, 0.86), )),
+    UnitTypeId.MARINE: ((1, 3), AbilityId.BARRACKSTRAIN_MARINE, Race.Terran, 2.25, ((3, 6, 5, 0.61), )),
+    UnitTypeId.MINERALFIELD: ((), None, Race.NoRace, 0, ()),
+}
+
+# Footprint radius of the abilities that create structures
+BUILD_ABILITIES = {AbilityId.PROTOSSBUILD_NEXUS: 2.5, AbilityId.PROTOSSBUILD_PYLON: 1}
+
+
+def game_data() -> GameData:
+    response = sc_pb.ResponseData()
+    for unit_type, (attributes, ability, race, speed, weapons) in UNIT_TYPES.items():
+        if ability is not None:
+            ability_data = response.abilities.add()
+            ability_data.ability_id = ability.value
+            ability_data.available = True
+            ability_data.footprint_radius = BUILD_ABILITIES.get(ability, 0)
+        unit_data = response.units.add()
+        unit_data.unit_id = unit_type.value
+        unit_data.name = unit_type.name
+        unit_data.available = True
+        unit_data.attributes.extend(attributes)
+        unit_data.race = race.value
+        unit_data.movement_speed = speed
+        unit_data.has_minerals = unit_type == UnitTypeId.MINERALFIELD
+        if ability is not None:
+            unit_data.ability_id = ability.value
+        for target_type, damage, weapon_range, cooldown in weapons:
+            weapon = unit_data.weapons.add()
+            weapon.type = target_type
+            weapon.damage = damage
+            weapon.range = weapon_range
+            weapon.speed = cooldown
+            weapon.attacks = 1
+    for ability in (AbilityId.ATTACK, AbilityId.MOVE, AbilityId.HARVEST_GATHER):
+        ability_data = response.abilities.add()
+        ability_data.ability_id = ability.value
+        ability_data.available = True
+    return GameData(response)
+
+
+def game_info() -> sc_pb.Response:
+    """ Returns a game info response of an empty, fully pathable map. """
+    response = sc_pb.Response()
+    info = response.game_info
+    info.map_name = "Synthetic"
+    player = info.player_info.add()
+    player.player_id = 1
+    player.type = 1
+    player.race_actual = Race.Protoss.value
+    player = info.player_info.add()
+    player.player_id = 2
+    player.type = 2
+    player.race_requested = Race.Terran.value
+    player.difficulty = 1
+    start_raw = info.start_raw
+    start_raw.map_size.x = start_raw.map_size.y = MAP_SIZE
+    for grid in (start_raw.pathing_grid, start_raw.placement_grid):
+        grid.bits_per_pixel = 1
+        grid.size.x = grid.size.y = MAP_SIZE
+        grid.data = bytes([255]) * (MAP_SIZE * MAP_SIZE // 8)
+    start_raw.terrain_height.bits_per_pixel = 8
+    start_raw.terrain_height.size.x = start_raw.terrain_height.size.y = MAP_SIZE
+    start_raw.terrain_height.data = bytes([128]) * (MAP_SIZE * MAP_SIZE)
+    start_raw.playable_area.p1.x = start_raw.playable_area.p1.y = MAP_SIZE
+    start_location = start_raw.start_locations.add()
+    start_location.x = start_location.y = MAP_SIZE - 20.5
+    return response
+
+
+def observation(unit_count: int, game_loop: int = 0, seed: int = 0, changed: bool = False) -> sc_pb.Response:
+    """Returns an observation response with a nexus, some mineral fields and 'unit_count' units,
+    half of them own probes and zealots and half of them enemy marines, spread randomly over the map.
+
+    :param unit_count:
+    :param game_loop:
+    :param seed:
+    :param changed: if True, every 10th unit is damaged, every 20th unit is missing and 5% new units are added,
+        to create the next frame of the observation with the same seed"""
+    rng = random.Random(seed)
+    response = sc_pb.Response()
+    obs = response.observation.observation
+    obs.game_loop = game_loop
+    obs.player_common.minerals = 50
+    obs.player_common.food_cap = 15
+    obs.player_common.food_used = 12
+    raw_data = obs.raw_data
+    for grid, bits_per_pixel in ((raw_data.map_state.visibility, 8), (raw_data.map_state.creep, 1)):
+        grid.bits_per_pixel = bits_per_pixel
+        grid.size.x = grid.size.y = MAP_SIZE
+        grid.data = bytes(MAP_SIZE * MAP_SIZE * bits_per_pixel // 8)
+
+    def add_unit(tag: int, unit_type: UnitTypeId, position: Tuple[float, float], alliance: int, **fields):
+        unit = raw_data.units.add()
+        unit.tag = tag
+        unit.unit_type = unit_type.value
+        unit.alliance = alliance
+        unit.owner = {1: 1, 3: 16, 4: 2}[alliance]
+        unit.display_type = 1
+        unit.pos.x, unit.pos.y, unit.pos.z = position[0], position[1], 10
+        unit.build_progress = 1
+        for name, value in fields.items():
+            setattr(unit, name, value)
+        return unit
+
+    add_unit(1, UnitTypeId.NEXUS, (20.5, 20.5), 1, radius=2.75, health=1000, health_max=1000)
+    for index in range(8):
+        add_unit(2 + index, UnitTypeId.MINERALFIELD, (12 + index, 28.5), 3, radius=1.125, mineral_contents=1800)
+    tag = 100
+    for index in range(unit_count):
+        tag += 1
+        position = (rng.uniform(1, MAP_SIZE - 1), rng.uniform(1, MAP_SIZE - 1))
+        if index % 2:
+            unit_type, alliance = UnitTypeId.MARINE, 4
+        else:
+            unit_type, alliance = rng.choice((UnitTypeId.PROBE, UnitTypeId.ZEALOT)), 1
+        if changed and index % 20 == 0:
+            continue
+        health = 45 - 5 * (changed and index % 10 == 5)
+        add_unit(tag, unit_type, position, alliance, radius=0.375, health=health, health_max=45)
+    if changed:
+        for index in range(unit_count // 20):
+            tag += 1
+            position = (rng.uniform(1, MAP_SIZE - 1), rng.uniform(1, MAP_SIZE - 1))
+            add_unit(tag, UnitTypeId.MARINE, position, 4, radius=0.375, health=45, health_max=45)
+    return response
+
+
+class BenchmarkBot(BotAI):
+
+    async def on_step(self, iteration: int):
+        pass
+
+
+def create_bot(unit_count: int, **attributes) -> Tuple[BenchmarkBot, sc_pb.Response]:
+    """Returns a bot that went through _prepare_start and the first _prepare_step with 'unit_count' units,
+    and the game info response to pass to the following _prepare_step calls.
+
+    :param unit_count:
+    :param attributes: bot attributes to set before the variables are initialized, e.g. distance_calculation_method=0"""
+    bot = BenchmarkBot()
+    for name, value in attributes.items():
+        setattr(bot, name, value)
+    bot._initialize_variables()
+    game_info_response = game_info()
+    bot._prepare_start(None, 1, GameInfo(game_info_response.game_info), game_data())
+    bot._prepare_step(GameState(observation(unit_count).observation), game_info_response)
+    return bot, game_info_response
@@ -14,13 +14,13 @@ The results will vary based on several variables:
 Current Performance: 5:45
 
 """
+import asyncio
 import random
 import math
 
 from typing import Dict, Set
 from loguru import logger
 
-from itertools import chain
 
 
 from sc2.bot_ai import BotAI, Race
@@ -29,8 +29,9 @@ from sc2.ids.unit_typeid import UnitTypeId
 from sc2.ids.ability_id import AbilityId
 from sc2.ids.upgrade_id import UpgradeId
 from sc2.ids.buff_id import BuffId
-from sc2.position import Point2, Point3
+from sc2.position import Point2, Point3, PointArray
 from sc2.unit import Unit
+from sc2.unit_table import IN_STRUCTURES, IN_UNITS
 from sc2.units import Units
 from sc2 import position
 from sc2.constants import UnitTypeId, AbilityId, UpgradeId, BuffId
@@ -68,6 +69,8 @@ class DragonBot(BotAI):
         
         self.last_two_warpgates = []
         self.worker_transfer_delay = 0
+        self.pathing_grid_update_interval = 0     # the bot never reads the pathing grid, so don't request it every step
+        self.reuse_unit_objects = True            # stored units like self.probe and self.pylons stay up to date
 
       
 
@@ -96,6 +99,9 @@ class DragonBot(BotAI):
 
         print("Game started")
         self.client.game_step = 2    
+        self.client.pipeline_requests = True  # send actions, debug, step and observation in one burst each step
+        self.client.batch_queries = True  # merge the gathered warp-in placement queries into one request
+        self.client.record_request_stats = True  # latency and bytes per request kind, logged in on_end
         self.speedmining_positions = get_speedmining_positions(self)
         split_workers(self)   
         
@@ -160,27 +166,48 @@ class DragonBot(BotAI):
     async def warp_new_units(self, pylon):
         pylon = self.pylons[1]
         # Create a 6x6 grid of positions around the Pylon
-        positions = [pylon.position.to2.offset((x, y)) for x in range(-3, 4) for y in range(-3, 4)]
-        positions = [pos for pos in positions if pos not in self.occupied_positions]  # Exclude already occupied positions
+        positions = PointArray.from_offsets(pylon.position, [(x, y) for x in range(-3, 4) for y in range(-3, 4)])
+        positions = positions[~positions.is_in(self.occupied_positions)].to_points()  # Exclude already occupied positions
 
         random.shuffle(positions)  # Randomize the order of the positions
 
         # Warp in Zealots from Warpgates near a Pylon if below supply cap
-        for i, warpgate in enumerate(self.structures(UnitTypeId.WARPGATE)):
-            abilities = await self.get_available_abilities(warpgate)
-            if self.can_afford(UnitTypeId.ZEALOT) and AbilityId.WARPGATETRAIN_ZEALOT in abilities:
-                position = positions.pop(0) if positions else None  # Take the first available position, or None if all positions are occupied
-                placement = await self.find_placement(AbilityId.WARPGATETRAIN_ZEALOT, position, placement_step=1, max_distance=10)
-                if placement is None:
-                    print(f"Can't find placement location for {position}")
-                    continue
-                self.occupied_positions.append(placement)  # Add the placement to the list of occupied positions
-                self._draw_debug_sphere_at_point(Point3((position.x, position.y, pylon.position3d.z)))  # Draw a debug sphere at the placement location
-
-                try:
-                    warpgate.warp_in(UnitTypeId.ZEALOT, placement)  # Warp in the Zealot at the found placement
-                except Exception as e:
-                    print(f"Failed to warp in Zealot at {placement}: {e}")  # Log any exceptions that occur during warp-in  
+        warpgates = self.structures(UnitTypeId.WARPGATE)
+        if not warpgates or not self.can_afford(UnitTypeId.ZEALOT):
+            return
+        # One query for all warpgates, and the placement queries of all warpgates are batched into one request by the client
+        warpgates_abilities = await self.get_available_abilities(warpgates)
+        ready_warpgates = [
+            warpgate for warpgate, abilities in zip(warpgates, warpgates_abilities)
+            if AbilityId.WARPGATETRAIN_ZEALOT in abilities
+        ]
+        # Only query placements for as many zealots as we can pay and have supply for
+        zealot_minerals = max(self.calculate_cost(UnitTypeId.ZEALOT).minerals, 1)
+        zealot_supply = max(self.calculate_supply_cost(UnitTypeId.ZEALOT), 1)
+        affordable = int(min(self.minerals // zealot_minerals, self.supply_left // zealot_supply))
+        ready_warpgates = ready_warpgates[:affordable]
+        targets = [(warpgate, positions.pop(0) if positions else None) for warpgate in ready_warpgates]  # Take the first available position, or None if all positions are occupied
+        placements = await asyncio.gather(
+            *(
+                self.find_placement(AbilityId.WARPGATETRAIN_ZEALOT, position, placement_step=1, max_distance=10)
+                for _, position in targets if position is not None
+            )
+        )
+        placements_iter = iter(placements)
+        for warpgate, position in targets:
+            if not self.can_afford(UnitTypeId.ZEALOT):
+                break
+            placement = next(placements_iter) if position is not None else None
+            if placement is None:
+                print(f"Can't find placement location for {position}")
+                continue
+            self.occupied_positions.append(placement)  # Add the placement to the list of occupied positions
+            self._draw_debug_sphere_at_point(Point3((position.x, position.y, pylon.position3d.z)))  # Draw a debug sphere at the placement location
+
+            try:
+                warpgate.warp_in(UnitTypeId.ZEALOT, placement)  # Warp in the Zealot at the found placement
+            except Exception as e:
+                print(f"Failed to warp in Zealot at {placement}: {e}")  # Log any exceptions that occur during warp-in  
     
     def find_aoe_position(
         self,
@@ -249,16 +276,13 @@ class DragonBot(BotAI):
         Given some units, form a rectangle around them.
         Returns minimum x, maximum x, minimum y, maximum y
         """
-        x_coords: list[float] = []
-        y_coords: list[float] = []
-        for unit in units:
-            x_coords.append(unit.position.x)
-            y_coords.append(unit.position.y)
-        return min(x_coords), max(x_coords), min(y_coords), max(y_coords)
+        if not isinstance(units, Units):
+            units = Units(units, self)
+        return units.bounding_box
         
     
     def get_unit(self, tag):
-        return self.units.find_by_tag(tag)
+        return self.unit_by_tag(tag, IN_UNITS)
 
     async def on_step(self, iteration: int):
         """
@@ -269,7 +293,6 @@ class DragonBot(BotAI):
 
         nexus = self.townhalls.ready.random
         closest = self.start_location
-        self.resource_by_tag = {unit.tag: unit for unit in chain(self.mineral_field, self.gas_buildings)}
 
 
         for point in self.positions:
@@ -288,7 +311,7 @@ class DragonBot(BotAI):
             expand_probe_tags = [tag for tag, role in self.unit_roles.items() if role == "expand"]
             if expand_probe_tags:
                 for tag in expand_probe_tags:
-                    self.probe = self.units.find_by_tag(tag)
+                    self.probe = self.unit_by_tag(tag, IN_UNITS)
                     if self.probe and not self.probe.orders:  # Check if the probe exists and is not currently executing an order
                         if self.time >= 4 * 60 + 35  and self.structures(UnitTypeId.PYLON).amount < 2 and self.already_pending(UnitTypeId.PYLON) < 1:
                             direction = Point2((-6, -2))
@@ -508,7 +531,7 @@ class DragonBot(BotAI):
             for warpgate_tag in self.last_two_warpgates:
                 if chronoboosts_used >= 2:
                     break
-                warpgate = self.structures.ready.find_by_tag(warpgate_tag)
+                warpgate = self.unit_by_tag(warpgate_tag, IN_STRUCTURES, ready=True)
                 if warpgate is not None and not warpgate.has_buff(BuffId.CHRONOBOOSTENERGYCOST):
                     abilities = await self.get_available_abilities(warpgate)
                     if AbilityId.WARPGATETRAIN_ZEALOT not in abilities:
@@ -585,3 +608,8 @@ class DragonBot(BotAI):
         Do things here after the game ends
         """
         print("Game ended.")
+        # Shows where the step time went waiting on SC2, per request kind
+        for kind, stats in self.client.request_stats.items():
+            logger.info(f"{kind}: {stats}")
+        self.client.dump_request_stats("data/request_stats.json")
+        logger.info(f"Lazy game state fields built: {self.lazy_field_usage()}")
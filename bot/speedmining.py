@@ -6,6 +6,7 @@ from sc2.unit import Unit
 from sc2.units import Units
 from sc2.position import Point2
 from sc2.bot_ai import BotAI
+from sc2.unit_table import IN_GAS_BUILDINGS, IN_MINERAL_FIELD, IN_TOWNHALLS
 from typing import Dict, Iterable, List, Optional, Set
 
 from sc2.ids.upgrade_id import UpgradeId
@@ -64,7 +65,7 @@ def micro_worker(self : BotAI) -> None:
                 target = self.townhalls.ready.closest_to(unit)
                 move_target = target.position.towards(unit.position, target.radius + unit.radius)
             elif unit.is_gathering:
-                target : Unit = self.resource_by_tag.get(unit.order_target)
+                target : Unit = self.unit_by_tag(unit.order_target, IN_MINERAL_FIELD | IN_GAS_BUILDINGS)
                 if target and not target.is_vespene_geyser and target.position in self.speedmining_positions.keys():
                     move_target = self.speedmining_positions[target.position]
             if target and not target.is_vespene_geyser and 2 * unit.radius < unit.distance_to(move_target) < SPEEDMINING_DISTANCE:
@@ -81,7 +82,7 @@ def handle_assimilator(self : BotAI, step: int):
             self.assimilator_age[r.tag] = step
     to_remove = []
     for k in self.assimilator_age.keys():
-        if self.gas_buildings.ready.find_by_tag(k) is None:
+        if self.unit_by_tag(k, IN_GAS_BUILDINGS, ready=True) is None:
             to_remove.append(k)
     for i in to_remove:
         self.assimilator_age.pop(i, None)
@@ -110,7 +111,7 @@ def dispatch_workers(self : BotAI):
     # remove destroyed nexus from keys
     keys_to_delete = []
     for key in self.townhall_saturations.keys():
-        if self.townhalls.ready.find_by_tag(key) is None:
+        if self.unit_by_tag(key, IN_TOWNHALLS, ready=True) is None:
             keys_to_delete.append(key)
     for i in keys_to_delete:
         del self.townhall_saturations[i]
@@ -128,15 +129,16 @@ def dispatch_workers(self : BotAI):
     # dispatch workers somewhere else if Nexus has too much of them
     nexus_priority = sorted([key for key in maxes.keys() if key in self.nexus_creation_times], key=lambda x: self.nexus_creation_times[x])
     for key in nexus_priority:
-        nexus1 = self.townhalls.ready.find_by_tag(key)
+        nexus1 = self.unit_by_tag(key, IN_TOWNHALLS, ready=True)
         if maxes[key] > nexus1.ideal_harvesters and (self.time <= 2 * 60 + 38 or self.time >= self.worker_transfer_delay):
             for key2 in nexus_priority:
                 if key2 == key:
                     continue
-                nexus2 = self.townhalls.ready.find_by_tag(key2)
+                nexus2 = self.unit_by_tag(key2, IN_TOWNHALLS, ready=True)
                 if maxes[key2] < nexus2.ideal_harvesters and maxes[key] > nexus1.ideal_harvesters: 
                     for w in self.workers.closer_than(10, nexus1).gathering:
-                        if self.mineral_field.closer_than(10, nexus1).find_by_tag(w.order_target) is not None:
+                        patch = self.unit_by_tag(w.order_target, IN_MINERAL_FIELD)
+                        if patch is not None and patch.distance_to(nexus1) < 10:
                             w.gather(w.position.closest(self.mineral_field.closer_than(10, nexus2)))
                             maxes[key] -= 1
                             for i in range(len(self.townhall_saturations[key])):
@@ -8,6 +8,7 @@ from collections import Counter
 from functools import cached_property
 from typing import TYPE_CHECKING, Dict, List, Optional, Set, Tuple, Union
 
+import numpy as np
 from loguru import logger
 
 from sc2.bot_ai_internal import BotAIInternal
@@ -28,8 +29,9 @@ from sc2.game_data import AbilityData, Cost
 from sc2.ids.ability_id import AbilityId
 from sc2.ids.unit_typeid import UnitTypeId
 from sc2.ids.upgrade_id import UpgradeId
-from sc2.position import Point2
+from sc2.position import Point2, PointArray
 from sc2.unit import Unit
+from sc2.unit_table import IN_ALL_UNITS
 from sc2.units import Units
 
 if TYPE_CHECKING:
@@ -195,6 +197,43 @@ class BotAI(BotAIInternal):
         """
         return self._units_created
 
+    def unit_by_tag(self, tag: int, collections: int = IN_ALL_UNITS, ready: bool = False) -> Optional[Unit]:
+        """Returns the unit of this frame with the tag, or None if there is no such unit or it is not in any of the collections.
+        Unlike e.g. 'self.townhalls.ready.find_by_tag(tag)' this is a single dict lookup and creates no temporary Units objects.
+
+        Examples::
+
+            from sc2.unit_table import IN_GAS_BUILDINGS, IN_MINERAL_FIELD, IN_TOWNHALLS
+
+            nexus = self.unit_by_tag(nexus_tag, IN_TOWNHALLS, ready=True)
+            resource = self.unit_by_tag(worker.order_target, IN_MINERAL_FIELD | IN_GAS_BUILDINGS)
+
+        :param tag:
+        :param collections: IN_ bits of the collections to look in, see sc2.unit_table
+        :param ready: if True, only returns structures that are finished"""
+        unit = self._units_by_tag.get(tag, None)
+        if unit is None or not self._unit_memberships[unit.distance_calculation_index] & collections:
+            return None
+        if ready and not unit.is_ready:
+            return None
+        return unit
+
+    def collections_of_tag(self, tag: int) -> int:
+        """Returns the IN_ bits of all collections the unit with the tag is in this frame, 0 if there is no such unit.
+
+        Example::
+
+            from sc2.unit_table import IN_ALL_ENEMY_UNITS
+
+            if self.collections_of_tag(tag) & IN_ALL_ENEMY_UNITS:
+                ...
+
+        :param tag:"""
+        unit = self._units_by_tag.get(tag, None)
+        if unit is None:
+            return 0
+        return self._unit_memberships[unit.distance_calculation_index]
+
     async def get_available_abilities(
         self, units: Union[List[Unit], Units], ignore_resource_requirements: bool = False
     ) -> List[List[AbilityId]]:
@@ -686,32 +725,38 @@ class BotAI(BotAIInternal):
             return None
 
         for distance in range(placement_step, max_distance, placement_step):
-            possible_positions = [
-                Point2(p).offset(near).to2 for p in (
-                    [(dx, -distance) for dx in range(-distance, distance + 1, placement_step)] +
-                    [(dx, distance) for dx in range(-distance, distance + 1, placement_step)] +
-                    [(-distance, dy) for dy in range(-distance, distance + 1, placement_step)] +
-                    [(distance, dy) for dy in range(-distance, distance + 1, placement_step)]
-                )
-            ]
+            # Bottom, top, left and right side of the square around near
+            steps = np.arange(-distance, distance + 1, placement_step)
+            sides = np.full(len(steps), distance)
+            possible_positions = PointArray.from_offsets(
+                near,
+                np.concatenate(
+                    (
+                        np.column_stack((steps, -sides)),
+                        np.column_stack((steps, sides)),
+                        np.column_stack((-sides, steps)),
+                        np.column_stack((sides, steps)),
+                    )
+                ),
+            )
             res = await self.client._query_building_placement_fast(building, possible_positions)
             # Filter all positions if building can be placed
-            possible = [p for r, p in zip(res, possible_positions) if r]
+            possible = possible_positions[np.array(res, dtype=bool)]
 
-            if addon_place:
+            if addon_place and possible:
                 # Filter remaining positions if addon can be placed
                 res = await self.client._query_building_placement_fast(
                     AbilityId.TERRANBUILDDROP_SUPPLYDEPOTDROP,
-                    [p.offset((2.5, -0.5)) for p in possible],
+                    possible.offset((2.5, -0.5)),
                 )
-                possible = [p for r, p in zip(res, possible) if r]
+                possible = possible[np.array(res, dtype=bool)]
 
             if not possible:
                 continue
 
             if random_alternative:
                 return random.choice(possible)
-            return min(possible, key=lambda p: p.distance_to_point2(near))
+            return possible.closest(near)
         return None
 
     # TODO: improve using cache per frame
@@ -734,9 +779,9 @@ class BotAI(BotAIInternal):
         if upgrade_type in self.state.upgrades:
             return 1
         creationAbilityID = self.game_data.upgrades[upgrade_type.value].research_ability.exact_id
-        for structure in self.structures.filter(lambda unit: unit.is_ready):
-            for order in structure.orders:
-                if order.ability.exact_id == creationAbilityID:
+        for structure in self.structures.ready:
+            for order in structure._proto.orders:
+                if order.ability_id == creationAbilityID.value:
                     return order.progress
         return 0
 
@@ -876,8 +921,8 @@ class BotAI(BotAIInternal):
             lambda structure: structure.build_progress < 1
             # Redundant check?
             and structure.type_id in TERRAN_STRUCTURES_REQUIRE_SCV and structure.position not in worker_targets and
-            structure.tag not in worker_targets and structure.tag in self._structures_previous_map and self.
-            _structures_previous_map[structure.tag].build_progress == structure.build_progress
+            structure.tag not in worker_targets and structure.tag in self._structures_previous_map and
+            self._previous_frame_values(structure.tag)[3] == structure.build_progress
         )
 
     async def build(
@@ -1198,6 +1243,20 @@ class BotAI(BotAIInternal):
         pos = pos.position.rounded
         return self.game_info.pathing_grid[pos] == 1
 
+    def request_pathing_grid_update(self):
+        """Requests the full pathing grid from the SC2 client before the next step.
+        Only useful if 'self.pathing_grid_update_interval' is not 1, as the pathing grid is otherwise refreshed every step.
+
+        Example::
+
+            # In your bot __init__(): only request the full pathing grid every 16 steps
+            self.pathing_grid_update_interval = 16
+
+            # In on_step(): make sure the pathing grid is exact in the next step
+            self.request_pathing_grid_update()
+        """
+        self._pathing_grid_update_requested = True
+
     def is_visible(self, pos: Union[Point2, Unit]) -> bool:
         """Returns True if you have vision on a grid point.
 
@@ -1296,6 +1355,7 @@ class BotAI(BotAIInternal):
         Override this in your bot class. This function is called when an enemy unit (unit or structure) left vision (which was visible last frame).
         Same as the self.on_unit_destroyed event, this function is called with the unit's tag because the unit is no longer visible anymore.
         If you want to store a snapshot of the unit, use self._enemy_units_previous_map[unit_tag] for units or self._enemy_structures_previous_map[unit_tag] for structures.
+        Units that left vision are not updated when 'self.reuse_unit_objects' is set, so these stay snapshots in that case too.
 
         Examples::
 
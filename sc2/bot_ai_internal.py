@@ -3,6 +3,7 @@ from __future__ import annotations
 
 import itertools
 import math
+import random
 import time
 import warnings
 from abc import ABC
@@ -30,9 +31,36 @@ from sc2.game_state import Blip, EffectData, GameState
 from sc2.ids.unit_typeid import UnitTypeId
 from sc2.ids.upgrade_id import UpgradeId
 from sc2.pixel_map import PixelMap
-from sc2.position import Point2
+from sc2.position import Point2, PointArray
+from sc2.speed_model import SpeedModel
 from sc2.unit import Unit
 from sc2.unit_command import UnitCommand
+from sc2.unit_diff import UnitDiff
+from sc2.unit_table import (
+    COLLECTION_ENEMY_STRUCTURES,
+    COLLECTION_ENEMY_UNITS,
+    COLLECTION_OTHER,
+    COLLECTION_STRUCTURES,
+    COLLECTION_UNITS,
+    IN_ALL_ENEMY_UNITS,
+    IN_ALL_OWN_UNITS,
+    IN_ALL_UNITS,
+    IN_DESTRUCTABLES,
+    IN_ENEMY_STRUCTURES,
+    IN_ENEMY_UNITS,
+    IN_GAS_BUILDINGS,
+    IN_LARVA,
+    IN_MINERAL_FIELD,
+    IN_PLACEHOLDERS,
+    IN_RESOURCES,
+    IN_STRUCTURES,
+    IN_TOWNHALLS,
+    IN_UNITS,
+    IN_VESPENE_GEYSER,
+    IN_WATCHTOWERS,
+    IN_WORKERS,
+    UnitTable,
+)
 from sc2.units import Units
 
 with warnings.catch_warnings():
@@ -60,13 +88,45 @@ class BotAIInternal(ABC):
         # Select distance calculation method, see _distances_override_functions function
         if not hasattr(self, "distance_calculation_method"):
             self.distance_calculation_method: int = 2
+        # If True, the distance calculation method is re-evaluated every 'distance_calculation_adaptive_interval' game loops and
+        # switched to the one that is estimated to be fastest for the current amount of units and distance lookups, see _adapt_distance_calculation_method
+        if not hasattr(self, "distance_calculation_adaptive"):
+            self.distance_calculation_adaptive: bool = False
+        if not hasattr(self, "distance_calculation_adaptive_interval"):
+            self.distance_calculation_adaptive_interval: int = 224
+        # If True, distance method 4 stores its cached rows as float32 instead of float64, which halves their memory
+        if not hasattr(self, "distance_cache_float32"):
+            self.distance_cache_float32: bool = False
         # Select if the Unit.command should return UnitCommand objects. Set this to True if your bot uses 'self.do(unit(ability, target))'
         if not hasattr(self, "unit_command_uses_self_do"):
             self.unit_command_uses_self_do: bool = False
+        # Select how often (in bot steps) main.py requests the full game info to refresh the pathing grid, see _update_pathing_grid function
+        # 1: every step, 0: only on game start and when requested with self.request_pathing_grid_update()
+        # In between full updates, the pathing grid is patched from structures, resources, rocks and force fields in the observation
+        if not hasattr(self, "pathing_grid_update_interval"):
+            self.pathing_grid_update_interval: int = 1
+        # Minimum amount of units a Units object needs to answer repeated distance queries like closer_than with a KD-tree, see Units._spatial_index_for_query
+        # 0: always use the linear scans
+        if not hasattr(self, "spatial_index_threshold"):
+            self.spatial_index_threshold: int = 64
+        # If True, the Unit object of a unit is reused in every frame it is visible instead of creating a new one, see _prepare_units function
+        # Unit objects stored by the bot are then updated every frame, their cached properties that only depend on the unit type are kept
+        if not hasattr(self, "reuse_unit_objects"):
+            self.reuse_unit_objects: bool = False
         # This value will be set to True by main.py in self._prepare_start if game is played in realtime (if true, the bot will have limited time per step)
         self.realtime: bool = False
         self.base_build: int = -1
         self.all_units: Units = Units([], self)
+        self.unit_table: UnitTable = None
+        # Unit table of the previous frame, used by the events to compare the units with their previous state
+        self._previous_unit_table: UnitTable = None
+        self._previous_all_units: Units = Units([], self)
+        # Unit objects of the units that were visible last frame, only used if self.reuse_unit_objects is set
+        self._unit_pool: Dict[int, Unit] = {}
+        # All units of this frame except placeholders by their tag, see BotAI.unit_by_tag
+        self._units_by_tag: Dict[int, Unit] = {}
+        # Row in self.all_units: IN_ bits of the collections the unit was added to, same values as self.unit_table.membership
+        self._unit_memberships: List[int] = []
         self.units: Units = Units([], self)
         self.workers: Units = Units([], self)
         self.larva: Units = Units([], self)
@@ -100,14 +160,28 @@ class BotAIInternal(ABC):
         self.race: Race = None
         self.enemy_race: Race = None
         self._generated_frame = -100
+        # Rows of squared distances of distance method 4 of the current frame, keyed by distance_calculation_index
+        self._cached_distance_rows: Dict[int, np.ndarray] = {}
+        self._distance_cache_hits: int = 0
+        self._distance_cache_misses: int = 0
+        self._distance_cache_peak_bytes: int = 0
+        # Distance lookups and frames since the distance calculation method was last evaluated, only counted if 'distance_calculation_adaptive' is set
+        self._distance_lookups: int = 0
+        self._distance_lookup_frames: int = 0
+        self._distance_method_evaluated_loop: int = 0
+        # Game states this bot got and how often each of their lazy fields was built, see lazy_field_usage()
+        self._game_states_prepared: int = 0
+        self._lazy_field_builds: Counter = Counter()
         self._units_created: Counter = Counter()
         self._unit_tags_seen_this_game: Set[int] = set()
-        self._units_previous_map: Dict[int, Unit] = {}
-        self._structures_previous_map: Dict[int, Unit] = {}
-        self._enemy_units_previous_map: Dict[int, Unit] = {}
-        self._enemy_structures_previous_map: Dict[int, Unit] = {}
-        self._all_units_previous_map: Dict[int, Unit] = {}
         self._previous_upgrades: Set[UpgradeId] = set()
+        # Memoized movement speeds of the units, see Unit.calculate_speed
+        self._speed_model: SpeedModel = SpeedModel()
+        # Pathing grid as it was received with the last full game info request, and the footprints of the blockers at that time
+        self._pathing_grid_base: np.ndarray = None
+        self._pathing_grid_base_blockers: Dict[Tuple[int, float, float], Tuple[int, int, int, int]] = {}
+        self._pathing_grid_update_requested: bool = False
+        self._steps_since_pathing_grid_update: int = 0
         self._expansion_positions_list: List[Point2] = []
         self._resource_location_to_expansion_position_dict: Dict[Point2, Point2] = {}
         self._time_before_step: float = None
@@ -175,11 +249,15 @@ class BotAIInternal(ABC):
 
         # Distance we group resources by
         resource_spread_threshold: float = 8.5
-        # Create a group for every resource
-        resource_groups: List[List[Unit]] = [
-            [resource] for resource in self.resources
+        resources = [
+            resource for resource in self.resources
             if resource.name != "MineralField450"  # dont use low mineral count patches
         ]
+        resource_positions = PointArray([resource.position for resource in resources])
+        # Which pairs of resources are closer than the threshold, so the merging only looks up the distances
+        is_close = resource_positions.distance_matrix(resource_positions) <= resource_spread_threshold
+        # Create a group for every resource, the groups hold the indices of the resources
+        resource_groups: List[List[int]] = [[index] for index in range(len(resources))]
         # Loop the merging process as long as we change something
         merged_group = True
         while merged_group:
@@ -187,10 +265,7 @@ class BotAIInternal(ABC):
             # Check every combination of two groups
             for group_a, group_b in itertools.combinations(resource_groups, 2):
                 # Check if any pair of resource of these groups is closer than threshold together
-                if any(
-                    resource_a.distance_to(resource_b) <= resource_spread_threshold
-                    for resource_a, resource_b in itertools.product(group_a, group_b)
-                ):
+                if is_close[np.ix_(group_a, group_b)].any():
                     # Remove the single groups and add the merged group
                     resource_groups.remove(group_a)
                     resource_groups.remove(group_b)
@@ -199,41 +274,47 @@ class BotAIInternal(ABC):
                     break
         # Distance offsets we apply to center of each resource group to find expansion position
         offset_range = 7
-        offsets = [
-            (x, y) for x, y in itertools.product(range(-offset_range, offset_range + 1), repeat=2)
-            if 4 < math.hypot(x, y) <= 8
-        ]
+        offsets = np.array(
+            [
+                (x, y) for x, y in itertools.product(range(-offset_range, offset_range + 1), repeat=2)
+                if 4 < math.hypot(x, y) <= 8
+            ]
+        )
+        placement_grid = self.game_info.placement_grid.data_numpy
         # Dict we want to return
         centers = {}
         # For every resource group:
-        for resources in resource_groups:
+        for group in resource_groups:
+            group_resources = [resources[index] for index in group]
             # Possible expansion points
-            amount = len(resources)
+            amount = len(group)
             # Calculate center, round and add 0.5 because expansion location will have (x.5, y.5)
             # coordinates because bases have size 5.
-            center_x = int(sum(resource.position.x for resource in resources) / amount) + 0.5
-            center_y = int(sum(resource.position.y for resource in resources) / amount) + 0.5
-            possible_points = (Point2((offset[0] + center_x, offset[1] + center_y)) for offset in offsets)
-            # Filter out points that are too near
-            possible_points = (
-                point for point in possible_points
-                # Check if point can be built on
-                if self.game_info.placement_grid[point.rounded] == 1
-                # Check if all resources have enough space to point
-                and all(
-                    point.distance_to(resource) >= (7 if resource._proto.unit_type in geyser_ids else 6)
-                    for resource in resources
-                )
+            center_x = int(sum(resource.position.x for resource in group_resources) / amount) + 0.5
+            center_y = int(sum(resource.position.y for resource in group_resources) / amount) + 0.5
+            possible_points = PointArray.from_offsets(Point2((center_x, center_y)), offsets)
+            # Check if point can be built on, points outside of the map can't
+            rounded = possible_points.rounded.array
+            in_map = ((rounded >= 0) & (rounded < (placement_grid.shape[1], placement_grid.shape[0]))).all(axis=1)
+            is_possible = np.zeros(len(rounded), dtype=bool)
+            is_possible[in_map] = placement_grid[rounded[in_map, 1], rounded[in_map, 0]] == 1
+            # Check if all resources have enough space to point
+            distances = possible_points.distance_matrix(resource_positions[group])
+            required_distances = np.array(
+                [7 if resource._proto.unit_type in geyser_ids else 6 for resource in group_resources]
             )
-            # Choose best fitting point
-            result: Point2 = min(
-                possible_points, key=lambda point: sum(point.distance_to(resource_) for resource_ in resources)
-            )
-            centers[result] = resources
+            is_possible &= (distances >= required_distances).all(axis=1)
+            # Choose best fitting point, the distances are summed up in the order of the resources like the builtin sum
+            distance_sums = np.zeros(len(possible_points))
+            for resource_distances in distances.T:
+                distance_sums += resource_distances
+            possible_indices = np.flatnonzero(is_possible)
+            result: Point2 = possible_points[int(possible_indices[np.argmin(distance_sums[possible_indices])])]
+            centers[result] = group_resources
             # Put all expansion locations in a list
             self._expansion_positions_list.append(result)
             # Maps all resource positions to the expansion position
-            for resource in resources:
+            for resource in group_resources:
                 self._resource_location_to_expansion_position_dict[resource.position] = result
 
     @final
@@ -262,10 +343,12 @@ class BotAIInternal(ABC):
         all units in production and all structures, and all morphs"""
         abilities_amount = Counter()
         max_build_progress: Dict[AbilityData, float] = {}
+        # The orders are read from the protos, building the UnitOrder objects of every unit is not needed here
+        abilities = self.game_data.abilities
         unit: Unit
         for unit in self.units + self.structures:
-            for order in unit.orders:
-                abilities_amount[order.ability] += 1
+            for order in unit._proto.orders:
+                abilities_amount[abilities[order.ability_id]] += 1
             if not unit.is_ready:
                 if self.race != Race.Terran or not unit.is_structure:
                     # If an SCV is constructing a building, already_pending would count this structure twice
@@ -288,17 +371,17 @@ class BotAIInternal(ABC):
             if structure.type_id in TERRAN_STRUCTURES_REQUIRE_SCV:
                 structures_in_production.add(structure.position)
                 structures_in_production.add(structure.tag)
+        abilities = self.game_data.abilities
         for worker in self.workers:
-            for order in worker.orders:
-                # Skip if the SCV is constructing (not isinstance(order.target, int))
-                # or resuming construction (isinstance(order.target, int))
-                is_int = isinstance(order.target, int)
-                if (
-                    is_int and order.target in structures_in_production
-                    or not is_int and Point2.from_proto(order.target) in structures_in_production
-                ):
+            for order in worker._proto.orders:
+                # Skip if the SCV is constructing (the target is a position)
+                # or resuming construction (the target is the tag of the structure)
+                if structures_in_production and (
+                    Point2.from_proto(order.target_world_space_pos) if order.HasField("target_world_space_pos") else
+                    order.target_unit_tag
+                ) in structures_in_production:
                     continue
-                abilities_amount[order.ability] += 1
+                abilities_amount[abilities[order.ability_id]] += 1
         return abilities_amount
 
     @final
@@ -470,28 +553,30 @@ class BotAIInternal(ABC):
         self._time_before_step: float = time.perf_counter()
 
     @final
-    def _prepare_step(self, state, proto_game_info):
+    def _requires_game_info_update(self) -> bool:
+        """ Checks if main.py has to send a full game info request before the next _prepare_step call. """
+        if self._pathing_grid_base is None or self._pathing_grid_update_requested:
+            return True
+        interval = self.pathing_grid_update_interval
+        return interval > 0 and self._steps_since_pathing_grid_update + 1 >= interval
+
+    @final
+    def _prepare_step(self, state, proto_game_info=None):
         """
         :param state:
-        :param proto_game_info:
+        :param proto_game_info: Response of a game info request, or None if the pathing grid should be patched from the observation
         """
         # Set attributes from new state before on_step."""
         self.state: GameState = state  # See game_state.py
-        # update pathing grid, which unfortunately is in GameInfo instead of GameState
-        self.game_info.pathing_grid: PixelMap = PixelMap(
-            proto_game_info.game_info.start_raw.pathing_grid, in_bits=True, mirrored=False
-        )
+        state.lazy_field_builds = self._lazy_field_builds
+        self._game_states_prepared += 1
         # Required for events, needs to be before self.units are initialized so the old units are stored
-        self._units_previous_map: Dict[int, Unit] = {unit.tag: unit for unit in self.units}
-        self._structures_previous_map: Dict[int, Unit] = {structure.tag: structure for structure in self.structures}
-        self._enemy_units_previous_map: Dict[int, Unit] = {unit.tag: unit for unit in self.enemy_units}
-        self._enemy_structures_previous_map: Dict[int, Unit] = {
-            structure.tag: structure
-            for structure in self.enemy_structures
-        }
-        self._all_units_previous_map: Dict[int, Unit] = {unit.tag: unit for unit in self.all_units}
+        self._previous_all_units = self.all_units
+        self._previous_unit_table = self.unit_table
 
         self._prepare_units()
+        # update pathing grid, which unfortunately is in GameInfo instead of GameState
+        self._update_pathing_grid(proto_game_info)
         self.minerals: int = state.common.minerals
         self.vespene: int = state.common.vespene
         self.supply_army: int = state.common.food_army
@@ -539,83 +624,219 @@ class BotAIInternal(ABC):
 
         worker_types: Set[UnitTypeId] = {UnitTypeId.DRONE, UnitTypeId.DRONEBURROWED, UnitTypeId.SCV, UnitTypeId.PROBE}
 
-        index: int = 0
+        raw_units = []
         for unit in self.state.observation_raw.units:
             if unit.is_blip:
                 self.blips.add(Blip(unit))
+            # Convert these units to effects: reaper grenade, parasitic bomb dummy, forcefield
+            elif unit.unit_type in FakeEffectID:
+                self.state.add_fake_effect(EffectData(unit, fake=True))
             else:
-                unit_type: int = unit.unit_type
-                # Convert these units to effects: reaper grenade, parasitic bomb dummy, forcefield
-                if unit_type in FakeEffectID:
-                    self.state.effects.add(EffectData(unit, fake=True))
-                    continue
-                unit_obj = Unit(unit, self, distance_calculation_index=index, base_build=self.base_build)
-                index += 1
+                raw_units.append(unit)
+        # Columnar numpy table of all units, row i belongs to self.all_units[i]
+        self.unit_table: UnitTable = UnitTable(raw_units)
+
+        unit_pool: Dict[int, Unit] = self._unit_pool
+        units_by_tag: Dict[int, Unit] = {}
+        # Which collection each row was sorted into, used by the events to compare the units with the previous frame
+        collections: List[int] = [COLLECTION_OTHER] * len(raw_units)
+        # All collections each row was added to, used for the tag lookups
+        memberships: List[int] = [IN_ALL_UNITS] * len(raw_units)
+        for index, unit in enumerate(raw_units):
+            unit_type: int = unit.unit_type
+            if unit.display_type == IS_PLACEHOLDER:
+                # Placeholders don't have a unique tag
+                unit_obj = Unit(
+                    unit, self, distance_calculation_index=index, base_build=self.base_build, unit_table=self.unit_table
+                )
                 self.all_units.append(unit_obj)
-                if unit.display_type == IS_PLACEHOLDER:
-                    self.placeholders.append(unit_obj)
-                    continue
-                alliance = unit.alliance
-                # Alliance.Neutral.value = 3
-                if alliance == 3:
-                    # XELNAGATOWER = 149
-                    if unit_type == 149:
-                        self.watchtowers.append(unit_obj)
-                    # mineral field enums
-                    elif unit_type in mineral_ids:
-                        self.mineral_field.append(unit_obj)
-                        self.resources.append(unit_obj)
-                    # geyser enums
-                    elif unit_type in geyser_ids:
-                        self.vespene_geyser.append(unit_obj)
-                        self.resources.append(unit_obj)
-                    # all destructable rocks
-                    else:
-                        self.destructables.append(unit_obj)
-                # Alliance.Self.value = 1
-                elif alliance == 1:
-                    self.all_own_units.append(unit_obj)
-                    unit_id: UnitTypeId = unit_obj.type_id
-                    if unit_obj.is_structure:
-                        self.structures.append(unit_obj)
-                        if unit_id in race_townhalls[self.race]:
-                            self.townhalls.append(unit_obj)
-                        elif unit_id in ALL_GAS or unit_obj.vespene_contents:
-                            # TODO: remove "or unit_obj.vespene_contents" when a new linux client newer than version 4.10.0 is released
-                            self.gas_buildings.append(unit_obj)
-                        elif unit_id in {
-                            UnitTypeId.TECHLAB,
-                            UnitTypeId.BARRACKSTECHLAB,
-                            UnitTypeId.FACTORYTECHLAB,
-                            UnitTypeId.STARPORTTECHLAB,
-                        }:
-                            self.techlab_tags.add(unit_obj.tag)
-                        elif unit_id in {
-                            UnitTypeId.REACTOR,
-                            UnitTypeId.BARRACKSREACTOR,
-                            UnitTypeId.FACTORYREACTOR,
-                            UnitTypeId.STARPORTREACTOR,
-                        }:
-                            self.reactor_tags.add(unit_obj.tag)
-                    else:
-                        self.units.append(unit_obj)
-                        if unit_id in worker_types:
-                            self.workers.append(unit_obj)
-                        elif unit_id == UnitTypeId.LARVA:
-                            self.larva.append(unit_obj)
-                # Alliance.Enemy.value = 4
-                elif alliance == 4:
-                    self.all_enemy_units.append(unit_obj)
-                    if unit_obj.is_structure:
-                        self.enemy_structures.append(unit_obj)
-                    else:
-                        self.enemy_units.append(unit_obj)
+                self.placeholders.append(unit_obj)
+                memberships[index] = IN_ALL_UNITS | IN_PLACEHOLDERS
+                continue
+            if self.reuse_unit_objects:
+                unit_obj = unit_pool.get(unit.tag)
+                if unit_obj is None:
+                    unit_obj = Unit(
+                        unit,
+                        self,
+                        distance_calculation_index=index,
+                        base_build=self.base_build,
+                        unit_table=self.unit_table
+                    )
+                else:
+                    unit_obj._rebind(unit, index, self.unit_table)
+            else:
+                unit_obj = Unit(
+                    unit, self, distance_calculation_index=index, base_build=self.base_build, unit_table=self.unit_table
+                )
+            units_by_tag[unit.tag] = unit_obj
+            self.all_units.append(unit_obj)
+            alliance = unit.alliance
+            # Alliance.Neutral.value = 3
+            if alliance == 3:
+                # XELNAGATOWER = 149
+                if unit_type == 149:
+                    self.watchtowers.append(unit_obj)
+                    memberships[index] = IN_ALL_UNITS | IN_WATCHTOWERS
+                # mineral field enums
+                elif unit_type in mineral_ids:
+                    self.mineral_field.append(unit_obj)
+                    self.resources.append(unit_obj)
+                    memberships[index] = IN_ALL_UNITS | IN_MINERAL_FIELD | IN_RESOURCES
+                # geyser enums
+                elif unit_type in geyser_ids:
+                    self.vespene_geyser.append(unit_obj)
+                    self.resources.append(unit_obj)
+                    memberships[index] = IN_ALL_UNITS | IN_VESPENE_GEYSER | IN_RESOURCES
+                # all destructable rocks
+                else:
+                    self.destructables.append(unit_obj)
+                    memberships[index] = IN_ALL_UNITS | IN_DESTRUCTABLES
+            # Alliance.Self.value = 1
+            elif alliance == 1:
+                self.all_own_units.append(unit_obj)
+                unit_id: UnitTypeId = unit_obj.type_id
+                if unit_obj.is_structure:
+                    self.structures.append(unit_obj)
+                    collections[index] = COLLECTION_STRUCTURES
+                    memberships[index] = IN_ALL_UNITS | IN_ALL_OWN_UNITS | IN_STRUCTURES
+                    if unit_id in race_townhalls[self.race]:
+                        self.townhalls.append(unit_obj)
+                        memberships[index] |= IN_TOWNHALLS
+                    elif unit_id in ALL_GAS or unit_obj.vespene_contents:
+                        # TODO: remove "or unit_obj.vespene_contents" when a new linux client newer than version 4.10.0 is released
+                        self.gas_buildings.append(unit_obj)
+                        memberships[index] |= IN_GAS_BUILDINGS
+                    elif unit_id in {
+                        UnitTypeId.TECHLAB,
+                        UnitTypeId.BARRACKSTECHLAB,
+                        UnitTypeId.FACTORYTECHLAB,
+                        UnitTypeId.STARPORTTECHLAB,
+                    }:
+                        self.techlab_tags.add(unit_obj.tag)
+                    elif unit_id in {
+                        UnitTypeId.REACTOR,
+                        UnitTypeId.BARRACKSREACTOR,
+                        UnitTypeId.FACTORYREACTOR,
+                        UnitTypeId.STARPORTREACTOR,
+                    }:
+                        self.reactor_tags.add(unit_obj.tag)
+                else:
+                    self.units.append(unit_obj)
+                    collections[index] = COLLECTION_UNITS
+                    memberships[index] = IN_ALL_UNITS | IN_ALL_OWN_UNITS | IN_UNITS
+                    if unit_id in worker_types:
+                        self.workers.append(unit_obj)
+                        memberships[index] |= IN_WORKERS
+                    elif unit_id == UnitTypeId.LARVA:
+                        self.larva.append(unit_obj)
+                        memberships[index] |= IN_LARVA
+            # Alliance.Enemy.value = 4
+            elif alliance == 4:
+                self.all_enemy_units.append(unit_obj)
+                if unit_obj.is_structure:
+                    self.enemy_structures.append(unit_obj)
+                    collections[index] = COLLECTION_ENEMY_STRUCTURES
+                    memberships[index] = IN_ALL_UNITS | IN_ALL_ENEMY_UNITS | IN_ENEMY_STRUCTURES
+                else:
+                    self.enemy_units.append(unit_obj)
+                    collections[index] = COLLECTION_ENEMY_UNITS
+                    memberships[index] = IN_ALL_UNITS | IN_ALL_ENEMY_UNITS | IN_ENEMY_UNITS
+        self.unit_table.collection = np.array(collections, dtype=np.int8)
+        self.unit_table.membership = np.array(memberships, dtype=np.uint32)
+        self._unit_memberships = memberships
+        self._units_by_tag = units_by_tag
+        # Type selections and the ready/idle filters of these collections are computed once per frame
+        for collection in (
+            self.all_units, self.units, self.workers, self.larva, self.structures, self.townhalls, self.gas_buildings,
+            self.all_own_units, self.enemy_units, self.enemy_structures, self.all_enemy_units, self.resources,
+            self.destructables, self.watchtowers, self.mineral_field, self.vespene_geyser, self.placeholders
+        ):
+            collection._enable_selection_cache()
+        # Units that were not visible this frame are dropped
+        if self.reuse_unit_objects:
+            self._unit_pool = units_by_tag
+
+        if self.distance_calculation_adaptive:
+            if self.state.game_loop - self._distance_method_evaluated_loop >= self.distance_calculation_adaptive_interval:
+                self._adapt_distance_calculation_method()
+            self._distance_lookup_frames += 1
 
         # Force distance calculation and caching on all units using scipy pdist or cdist
         if self.distance_calculation_method == 1:
             _ = self._pdist
         elif self.distance_calculation_method in {2, 3}:
             _ = self._cdist
+        elif self.distance_calculation_method == 4:
+            _ = self._distance_rows
+
+    @final
+    def _pathing_blocker_footprints(self) -> Dict[Tuple[int, float, float], Tuple[int, int, int, int]]:
+        """Returns the grid cells (x_min, x_max, y_min, y_max) blocked by each structure, resource and destructable,
+        keyed by (tag, x, y) so that a structure that lifted off and landed somewhere else counts as a new blocker.
+        The minimums are clamped at 0, as a negative start would wrap around when slicing the grid."""
+        footprints: Dict[Tuple[int, float, float], Tuple[int, int, int, int]] = {}
+        unit: Unit
+        for unit in itertools.chain(self.structures, self.enemy_structures, self.resources, self.destructables):
+            proto = unit._proto
+            if proto.is_flying:
+                continue
+            unit_type: int = proto.unit_type
+            if unit_type in mineral_ids:
+                half_width, half_height = 1, 0.5
+            elif unit_type in geyser_ids:
+                half_width = half_height = 1.5
+            elif unit.is_structure:
+                footprint_radius = unit.footprint_radius
+                if not footprint_radius:
+                    continue
+                half_width = half_height = footprint_radius
+            else:
+                # Destructable rocks don't have a creation ability, so their radius is the best approximation available
+                half_width = half_height = proto.radius
+            x, y = proto.pos.x, proto.pos.y
+            footprints[(proto.tag, x, y)] = (
+                max(math.floor(x - half_width + 0.5), 0),
+                math.floor(x + half_width + 0.5),
+                max(math.floor(y - half_height + 0.5), 0),
+                math.floor(y + half_height + 0.5),
+            )
+        return footprints
+
+    @final
+    def _update_pathing_grid(self, proto_game_info=None):
+        """Replaces the pathing grid if a game info response is given. Otherwise the pathing grid of the last full
+        update is patched: footprints of blockers that disappeared since then (destroyed structures, mined out minerals,
+        destroyed rocks) are marked pathable, footprints of new structures and all force fields are marked unpathable.
+
+        :param proto_game_info:"""
+        if proto_game_info is not None:
+            self.game_info.pathing_grid: PixelMap = PixelMap(
+                proto_game_info.game_info.start_raw.pathing_grid, in_bits=True, mirrored=False
+            )
+            self._pathing_grid_base = self.game_info.pathing_grid.data_numpy.copy()
+            self._pathing_grid_base_blockers = self._pathing_blocker_footprints()
+            self._pathing_grid_update_requested = False
+            self._steps_since_pathing_grid_update = 0
+            return
+        assert self._pathing_grid_base is not None, "The pathing grid can only be patched after a full game info update"
+        self._steps_since_pathing_grid_update += 1
+        grid: np.ndarray = self._pathing_grid_base.copy()
+        blockers = self._pathing_blocker_footprints()
+        for key, (x_min, x_max, y_min, y_max) in self._pathing_grid_base_blockers.items():
+            if key not in blockers:
+                grid[y_min:y_max, x_min:x_max] = 1
+        for key, (x_min, x_max, y_min, y_max) in blockers.items():
+            if key not in self._pathing_grid_base_blockers:
+                grid[y_min:y_max, x_min:x_max] = 0
+        for effect in self.state.fake_effects:
+            if effect.id == "FORCEFIELD":
+                radius = effect.radius
+                for position in effect.positions:
+                    x_min, x_max = math.floor(position.x - radius + 0.5), math.floor(position.x + radius + 0.5)
+                    y_min, y_max = math.floor(position.y - radius + 0.5), math.floor(position.y + radius + 0.5)
+                    grid[max(y_min, 0):y_max, max(x_min, 0):x_max] = 0
+        self.game_info.pathing_grid.data_numpy = grid
 
     @final
     async def _after_step(self) -> int:
@@ -628,27 +849,49 @@ class BotAIInternal(ABC):
         self._last_step_step_time = step_duration
         self._total_time_in_on_step += step_duration
         self._total_steps_iterations += 1
+        # Clear set of unit tags that were given an order this frame by self.do()
+        self.unit_tags_received_action.clear()
+        if self._uses_pipelined_step():
+            # Actions and debug draws are sent together with the step request, see _step_pipelined
+            return self.state.game_loop
         # Commit and clear bot actions
         if self.actions:
             await self._do_actions(self.actions)
             self.actions.clear()
-        # Clear set of unit tags that were given an order this frame by self.do()
-        self.unit_tags_received_action.clear()
         # Commit debug queries
         await self.client._send_debug()
 
         return self.state.game_loop
 
+    @final
+    def _uses_pipelined_step(self) -> bool:
+        """ Pipelining requires a step request, so it is only used outside of realtime mode. """
+        return self.client.pipeline_requests and not self.realtime
+
+    @final
+    async def _step_pipelined(self, step_size: int = None):
+        """Sends the bot actions and debug draws of this iteration together with the step and observation requests.
+        Used by main.py instead of _after_step sending them and client.step() if client.pipeline_requests is set.
+        Returns the observation response of the next step."""
+        actions = list(filter(self.prevent_double_actions, self.actions))
+        self.actions.clear()
+        return await self.client.step_pipelined(actions, step_size)
+
     @final
     async def _advance_steps(self, steps: int):
         """Advances the game loop by amount of 'steps'. This function is meant to be used as a debugging and testing tool only.
         If you are using this, please be aware of the consequences, e.g. 'self.units' will be filled with completely new data."""
         await self._after_step()
         # Advance simulation by exactly "steps" frames
-        await self.client.step(steps)
-        state = await self.client.observation()
+        if self._uses_pipelined_step():
+            state = await self._step_pipelined(steps)
+        else:
+            await self.client.step(steps)
+            state = await self.client.observation()
         gs = GameState(state.observation)
-        proto_game_info = await self.client._execute(game_info=sc_pb.RequestGameInfo())
+        proto_game_info = None
+        if self._requires_game_info_update():
+            proto_game_info = await self.client._execute(game_info=sc_pb.RequestGameInfo())
         self._prepare_step(gs, proto_game_info)
         await self.issue_events()
         # await self.on_step(-1)
@@ -661,90 +904,153 @@ class BotAIInternal(ABC):
         - on_building_construction_started
         - on_building_construction_complete
         - on_upgrade_complete
+
+        The units are compared with the previous frame by a UnitDiff on the unit tables, so only the units an event is issued for are visited.
+        The events of own units and structures are issued unit by unit in the order of the collection, see _events_by_unit.
         """
-        await self._issue_unit_dead_events()
-        await self._issue_unit_added_events()
-        await self._issue_building_events()
+        diff = UnitDiff(self._previous_unit_table, self.unit_table, self.state.dead_units)
+        await self._issue_unit_dead_events(diff)
+        await self._issue_unit_added_events(diff)
+        await self._issue_building_events(diff)
         await self._issue_upgrade_events()
-        await self._issue_vision_events()
-
-    @final
-    async def _issue_unit_added_events(self):
-        for unit in self.units:
-            if unit.tag not in self._units_previous_map and unit.tag not in self._unit_tags_seen_this_game:
-                self._unit_tags_seen_this_game.add(unit.tag)
-                self._units_created[unit.type_id] += 1
-                await self.on_unit_created(unit)
-            elif unit.tag in self._units_previous_map:
-                previous_frame_unit: Unit = self._units_previous_map[unit.tag]
-                # Check if a unit took damage this frame and then trigger event
-                if unit.health < previous_frame_unit.health or unit.shield < previous_frame_unit.shield:
-                    damage_amount = previous_frame_unit.health - unit.health + previous_frame_unit.shield - unit.shield
-                    await self.on_unit_took_damage(unit, damage_amount)
-                # Check if a unit type has changed
-                if previous_frame_unit.type_id != unit.type_id:
-                    await self.on_unit_type_changed(unit, previous_frame_unit.type_id)
+        await self._issue_vision_events(diff)
+
+    @final
+    def _previous_collection_map(self, collection: int) -> Dict[int, Unit]:
+        """Maps the tags of the units that were in the collection last frame to their Unit objects.
+
+        :param collection:"""
+        if self._previous_unit_table is None:
+            return {}
+        is_in_collection = self._previous_unit_table.collection == collection
+        return {unit.tag: unit for unit in itertools.compress(self._previous_all_units, is_in_collection)}
+
+    @final
+    @property_cache_once_per_frame
+    def _units_previous_map(self) -> Dict[int, Unit]:
+        return self._previous_collection_map(COLLECTION_UNITS)
+
+    @final
+    @property_cache_once_per_frame
+    def _structures_previous_map(self) -> Dict[int, Unit]:
+        return self._previous_collection_map(COLLECTION_STRUCTURES)
+
+    @final
+    @property_cache_once_per_frame
+    def _enemy_units_previous_map(self) -> Dict[int, Unit]:
+        return self._previous_collection_map(COLLECTION_ENEMY_UNITS)
+
+    @final
+    @property_cache_once_per_frame
+    def _enemy_structures_previous_map(self) -> Dict[int, Unit]:
+        return self._previous_collection_map(COLLECTION_ENEMY_STRUCTURES)
+
+    @final
+    @property_cache_once_per_frame
+    def _all_units_previous_map(self) -> Dict[int, Unit]:
+        return {unit.tag: unit for unit in self._previous_all_units}
+
+    @final
+    @staticmethod
+    def _events_by_unit(*rows: np.ndarray) -> List[Tuple[int, int]]:
+        """Returns (kind, position) of all events, where kind is the index of the rows array and position the index in it,
+        ordered by the row of the unit and then by kind, so events are issued unit by unit in the order of the collection.
+
+        :param rows: rows of the units of each kind of event"""
+        kinds = np.concatenate([np.full(len(kind_rows), kind) for kind, kind_rows in enumerate(rows)])
+        if not len(kinds):
+            return []
+        positions = np.concatenate([np.arange(len(kind_rows)) for kind_rows in rows])
+        order = np.lexsort((kinds, np.concatenate(rows)))
+        return list(zip(kinds[order].tolist(), positions[order].tolist()))
+
+    @final
+    async def _issue_unit_added_events(self, diff: UnitDiff):
+        added = diff.added(COLLECTION_UNITS)
+        damaged, damage_amounts = diff.damaged(COLLECTION_UNITS)
+        type_changed, previous_types = diff.type_changed(COLLECTION_UNITS)
+        for kind, position in self._events_by_unit(added, damaged, type_changed):
+            if kind == 0:
+                unit = self.all_units[added[position]]
+                if unit.tag not in self._unit_tags_seen_this_game:
+                    self._unit_tags_seen_this_game.add(unit.tag)
+                    self._units_created[unit.type_id] += 1
+                    await self.on_unit_created(unit)
+            # Check if a unit took damage this frame and then trigger event
+            elif kind == 1:
+                await self.on_unit_took_damage(self.all_units[damaged[position]], damage_amounts[position].item())
+            # Check if a unit type has changed
+            else:
+                await self.on_unit_type_changed(
+                    self.all_units[type_changed[position]], UnitTypeId(previous_types[position].item())
+                )
+
+    @final
+    @property_cache_once_per_frame
+    def _previous_unit_rows(self) -> Dict[int, int]:
+        """ Maps the tags of the units of the previous frame to their row in self._previous_unit_table. """
+        if self._previous_unit_table is None:
+            return {}
+        return dict(zip(self._previous_unit_table.tag.tolist(), range(len(self._previous_unit_table))))
+
+    @final
+    def _previous_frame_values(self, tag: int) -> Tuple[float, float, int, float]:
+        """Returns health, shield, unit type and build progress of the unit with this tag in the previous frame.
+        These are read from the previous unit table, because with 'reuse_unit_objects' the previous frame Unit objects are updated to the current frame.
+
+        :param tag:"""
+        table = self._previous_unit_table
+        row = self._previous_unit_rows[tag]
+        return table.health[row].item(), table.shield[row].item(), table.type_id[row].item(), table.build_progress[row].item()
 
     @final
     async def _issue_upgrade_events(self):
+        # Upgrades can't be lost, so the set of upgrades only has to be built when the amount changed
+        if len(self.state.observation_raw.player.upgrade_ids) == len(self._previous_upgrades):
+            return
         difference = self.state.upgrades - self._previous_upgrades
         for upgrade_completed in difference:
             await self.on_upgrade_complete(upgrade_completed)
         self._previous_upgrades = self.state.upgrades
 
     @final
-    async def _issue_building_events(self):
-        for structure in self.structures:
-            if structure.tag not in self._structures_previous_map:
-                if structure.build_progress < 1:
-                    await self.on_building_construction_started(structure)
-                else:
-                    # Include starting townhall
-                    self._units_created[structure.type_id] += 1
-                    await self.on_building_construction_complete(structure)
-            elif structure.tag in self._structures_previous_map:
-                # Check if a structure took damage this frame and then trigger event
-                previous_frame_structure: Unit = self._structures_previous_map[structure.tag]
-                if (
-                    structure.health < previous_frame_structure.health
-                    or structure.shield < previous_frame_structure.shield
-                ):
-                    damage_amount = (
-                        previous_frame_structure.health - structure.health + previous_frame_structure.shield -
-                        structure.shield
-                    )
-                    await self.on_unit_took_damage(structure, damage_amount)
-                # Check if a structure changed its type
-                if previous_frame_structure.type_id != structure.type_id:
-                    await self.on_unit_type_changed(structure, previous_frame_structure.type_id)
-                # Check if structure completed
-                if structure.build_progress == 1 and previous_frame_structure.build_progress < 1:
-                    self._units_created[structure.type_id] += 1
-                    await self.on_building_construction_complete(structure)
+    async def _issue_building_events(self, diff: UnitDiff):
+        started = diff.construction_started()
+        damaged, damage_amounts = diff.damaged(COLLECTION_STRUCTURES)
+        type_changed, previous_types = diff.type_changed(COLLECTION_STRUCTURES)
+        completed = diff.construction_completed()
+        for kind, position in self._events_by_unit(started, damaged, type_changed, completed):
+            if kind == 0:
+                await self.on_building_construction_started(self.all_units[started[position]])
+            # Check if a structure took damage this frame and then trigger event
+            elif kind == 1:
+                await self.on_unit_took_damage(self.all_units[damaged[position]], damage_amounts[position].item())
+            # Check if a structure changed its type
+            elif kind == 2:
+                await self.on_unit_type_changed(
+                    self.all_units[type_changed[position]], UnitTypeId(previous_types[position].item())
+                )
+            # Check if structure completed, includes the starting townhall
+            else:
+                structure = self.all_units[completed[position]]
+                self._units_created[structure.type_id] += 1
+                await self.on_building_construction_complete(structure)
 
     @final
-    async def _issue_vision_events(self):
+    async def _issue_vision_events(self, diff: UnitDiff):
         # Call events for enemy unit entered vision
-        for enemy_unit in self.enemy_units:
-            if enemy_unit.tag not in self._enemy_units_previous_map:
-                await self.on_enemy_unit_entered_vision(enemy_unit)
-        for enemy_structure in self.enemy_structures:
-            if enemy_structure.tag not in self._enemy_structures_previous_map:
-                await self.on_enemy_unit_entered_vision(enemy_structure)
+        for collection in (COLLECTION_ENEMY_UNITS, COLLECTION_ENEMY_STRUCTURES):
+            for index in diff.added(collection).tolist():
+                await self.on_enemy_unit_entered_vision(self.all_units[index])
 
         # Call events for enemy unit left vision
-        enemy_units_left_vision: Set[int] = set(self._enemy_units_previous_map.keys()) - self.enemy_units.tags
-        for enemy_unit_tag in enemy_units_left_vision:
-            await self.on_enemy_unit_left_vision(enemy_unit_tag)
-        enemy_structures_left_vision: Set[int] = (
-            set(self._enemy_structures_previous_map.keys()) - self.enemy_structures.tags
-        )
-        for enemy_structure_tag in enemy_structures_left_vision:
-            await self.on_enemy_unit_left_vision(enemy_structure_tag)
+        for collection in (COLLECTION_ENEMY_UNITS, COLLECTION_ENEMY_STRUCTURES):
+            for enemy_unit_tag in diff.removed(collection).tolist():
+                await self.on_enemy_unit_left_vision(enemy_unit_tag)
 
     @final
-    async def _issue_unit_dead_events(self):
-        for unit_tag in self.state.dead_units & set(self._all_units_previous_map.keys()):
+    async def _issue_unit_dead_events(self, diff: UnitDiff):
+        for unit_tag in diff.dead().tolist():
             await self.on_unit_destroyed(unit_tag)
 
     # DISTANCE CALCULATION
@@ -770,19 +1076,21 @@ class BotAIInternal(ABC):
             return self.calculate_distances()
         return self._cached_cdist
 
+    @final
+    @property
+    def _distance_rows(self) -> Dict[int, np.ndarray]:
+        """ As property, so the cached rows of distance method 4 are dropped as soon as a new frame started. """
+        if self._generated_frame != self.state.game_loop:
+            return self.calculate_distances()
+        return self._cached_distance_rows
+
     @final
     def _calculate_distances_method1(self) -> np.ndarray:
         self._generated_frame = self.state.game_loop
-        # Converts tuple [(1, 2), (3, 4)] to flat list like [1, 2, 3, 4]
-        flat_positions = (coord for unit in self.all_units for coord in unit.position_tuple)
-        # Converts to numpy array, then converts the flat array back to shape (n, 2): [[1, 2], [3, 4]]
-        positions_array: np.ndarray = np.fromiter(
-            flat_positions,
-            dtype=float,
-            count=2 * self._units_count,
-        ).reshape((self._units_count, 2))
+        # Positions of all units as array of shape (n, 2): [[1, 2], [3, 4]]
+        positions_array: np.ndarray = self.unit_table.positions
         assert len(positions_array) == self._units_count
-        # See performance benchmarks
+        # See performance benchmarks in benchmarks/run.py
         self._cached_pdist = pdist(positions_array, "sqeuclidean")
 
         return self._cached_pdist
@@ -790,16 +1098,10 @@ class BotAIInternal(ABC):
     @final
     def _calculate_distances_method2(self) -> np.ndarray:
         self._generated_frame = self.state.game_loop
-        # Converts tuple [(1, 2), (3, 4)] to flat list like [1, 2, 3, 4]
-        flat_positions = (coord for unit in self.all_units for coord in unit.position_tuple)
-        # Converts to numpy array, then converts the flat array back to shape (n, 2): [[1, 2], [3, 4]]
-        positions_array: np.ndarray = np.fromiter(
-            flat_positions,
-            dtype=float,
-            count=2 * self._units_count,
-        ).reshape((self._units_count, 2))
+        # Positions of all units as array of shape (n, 2): [[1, 2], [3, 4]]
+        positions_array: np.ndarray = self.unit_table.positions
         assert len(positions_array) == self._units_count
-        # See performance benchmarks
+        # See performance benchmarks in benchmarks/run.py
         self._cached_cdist = cdist(positions_array, positions_array, "sqeuclidean")
 
         return self._cached_cdist
@@ -808,17 +1110,115 @@ class BotAIInternal(ABC):
     def _calculate_distances_method3(self) -> np.ndarray:
         """ Nearly same as above, but without asserts"""
         self._generated_frame = self.state.game_loop
-        flat_positions = (coord for unit in self.all_units for coord in unit.position_tuple)
-        positions_array: np.ndarray = np.fromiter(
-            flat_positions,
-            dtype=float,
-            count=2 * self._units_count,
-        ).reshape((-1, 2))
-        # See performance benchmarks
+        positions_array: np.ndarray = self.unit_table.positions
+        # See performance benchmarks in benchmarks/run.py
         self._cached_cdist = cdist(positions_array, positions_array, "sqeuclidean")
 
         return self._cached_cdist
 
+    @final
+    def _calculate_distances_method4(self) -> Dict[int, np.ndarray]:
+        """ Doesn't calculate anything, only starts a new empty row cache for this frame. """
+        self._generated_frame = self.state.game_loop
+        self._cached_distance_rows = {}
+        return self._cached_distance_rows
+
+    @final
+    def _distance_row(self, index: int) -> np.ndarray:
+        """Returns the squared distances of the unit with distance_calculation_index 'index' to all units,
+        calculated the first time they are needed in this frame.
+
+        :param index:"""
+        rows = self._distance_rows
+        row = rows.get(index, None)
+        if row is None:
+            self._distance_cache_misses += 1
+            positions: np.ndarray = self.unit_table.positions
+            difference = positions - positions[index]
+            row = np.einsum("ij,ij->i", difference, difference)
+            if self.distance_cache_float32:
+                row = row.astype(np.float32)
+            rows[index] = row
+            self._distance_cache_peak_bytes = max(self._distance_cache_peak_bytes, len(rows) * row.nbytes)
+        else:
+            self._distance_cache_hits += 1
+        return row
+
+    @final
+    def lazy_field_usage(self) -> Dict[str, int]:
+        """ Returns the amount of game states this bot got this game, and for each lazy field of GameState in how many of them it was built. """
+        return {
+            "game_states": self._game_states_prepared,
+            **{name: self._lazy_field_builds[name] for name in GameState.LAZY_FIELDS},
+        }
+
+    @final
+    def distance_cache_stats(self) -> Dict[str, Union[int, float]]:
+        """ Returns the hit and miss counts of the row cache of distance method 4 since game start, and its memory use in this frame. """
+        rows = self._cached_distance_rows
+        lookups = self._distance_cache_hits + self._distance_cache_misses
+        return {
+            "hits": self._distance_cache_hits,
+            "misses": self._distance_cache_misses,
+            "hit_rate": self._distance_cache_hits / lookups if lookups else 0,
+            "rows": len(rows),
+            "memory_bytes": sum(row.nbytes for row in rows.values()),
+            "peak_memory_bytes": self._distance_cache_peak_bytes,
+        }
+
+    @final
+    def _distance_squared_unit_to_unit_counted(self, unit1: Unit, unit2: Unit) -> float:
+        """ Used instead of the selected method if 'distance_calculation_adaptive' is set, to count the distance lookups per frame. """
+        self._distance_lookups += 1
+        return self._distance_squared_unit_to_unit_selected(unit1, unit2)
+
+    @final
+    def _adapt_distance_calculation_method(self):
+        """Times methods 0, 1 and 2 on the units of this frame and switches to the one with the lowest estimated cost per frame,
+        which is the time to calculate the distances once plus the average distance lookups per frame times the time of one lookup.
+        Only switches if the estimated cost is at least 20% lower than the one of the current method, so noise doesn't make it switch back and forth.
+        Methods 3 and 4 are kept: the cost of the row cache of method 4 depends on which distances are looked up, so it can't be
+        estimated from a random sample, and method 3 is only chosen on purpose."""
+        lookups_per_frame = self._distance_lookups / max(self._distance_lookup_frames, 1)
+        self._distance_lookups = 0
+        self._distance_lookup_frames = 0
+        self._distance_method_evaluated_loop = self.state.game_loop
+        methods = {
+            0: (None, self._distance_squared_unit_to_unit_method0),
+            1: (self._calculate_distances_method1, self._distance_squared_unit_to_unit_method1),
+            2: (self._calculate_distances_method2, self._distance_squared_unit_to_unit_method2),
+        }
+        current_method = self.distance_calculation_method
+        units: Units = self.all_units
+        if current_method not in methods or len(units) < 2:
+            return
+        sample_size = 256
+        sample = list(zip(random.choices(units, k=sample_size), random.choices(units, k=sample_size)))
+        estimated_costs: Dict[int, float] = {}
+        for method, (calculate_distances, distance_squared_unit_to_unit) in methods.items():
+            start = time.perf_counter()
+            if calculate_distances is not None:
+                calculate_distances()
+            calculation_time = time.perf_counter() - start
+            start = time.perf_counter()
+            for unit1, unit2 in sample:
+                distance_squared_unit_to_unit(unit1, unit2)
+            lookup_time = (time.perf_counter() - start) / sample_size
+            estimated_costs[method] = calculation_time + lookups_per_frame * lookup_time
+        # The distances have to be calculated again by the selected method
+        self._generated_frame = -100
+
+        best_method = min(estimated_costs, key=estimated_costs.get)
+        if best_method == current_method or estimated_costs[best_method] > 0.8 * estimated_costs[current_method]:
+            return
+        costs = ", ".join(f"{method}: {cost * 1000:.3f}ms" for method, cost in estimated_costs.items())
+        logger.info(
+            f"Switching distance calculation method from {current_method} to {best_method} with {len(units)} units "
+            f"and {lookups_per_frame:.0f} distance lookups per frame, estimated cost per frame: {costs}"
+        )
+        self.distance_calculation_method = best_method
+        self._distances_override_functions(best_method)
+
     # Helper functions
 
     @final
@@ -878,6 +1278,16 @@ class BotAIInternal(ABC):
         # Calculate index, needs to be after cdist has been calculated and cached
         return self._cdist[unit1.distance_calculation_index, unit2.distance_calculation_index]
 
+    @final
+    def _distance_squared_unit_to_unit_method4(self, unit1: Unit, unit2: Unit) -> float:
+        index1, index2 = unit1.distance_calculation_index, unit2.distance_calculation_index
+        # Distances are symmetric, so an already cached row of the second unit is as good as the row of the first one
+        row = self._distance_rows.get(index2, None)
+        if row is not None:
+            self._distance_cache_hits += 1
+            return row[index1]
+        return self._distance_row(index1)[index2]
+
     # Distance calculation using the fastest distance calculation functions
 
     @final
@@ -914,8 +1324,10 @@ class BotAIInternal(ABC):
         The following methods calculate the distances between all units once:
         method 1: Use scipy's pdist condensed matrix (1d array)
         method 2: Use scipy's cidst square matrix (2d array)
-        method 3: Use scipy's cidst square matrix (2d array) without asserts (careful: very weird error messages, but maybe slightly faster)"""
-        assert 0 <= method <= 3, f"Selected method was: {method}"
+        method 3: Use scipy's cidst square matrix (2d array) without asserts (careful: very weird error messages, but maybe slightly faster)
+        method 4: Calculate the distances of one unit to all units only when they are needed and cache these rows for the frame,
+            see distance_cache_stats() and 'distance_cache_float32'"""
+        assert 0 <= method <= 4, f"Selected method was: {method}"
         if method == 0:
             self._distance_squared_unit_to_unit = self._distance_squared_unit_to_unit_method0
         elif method == 1:
@@ -927,3 +1339,9 @@ class BotAIInternal(ABC):
         elif method == 3:
             self._distance_squared_unit_to_unit = self._distance_squared_unit_to_unit_method2
             self.calculate_distances = self._calculate_distances_method3
+        elif method == 4:
+            self._distance_squared_unit_to_unit = self._distance_squared_unit_to_unit_method4
+            self.calculate_distances = self._calculate_distances_method4
+        if self.distance_calculation_adaptive:
+            self._distance_squared_unit_to_unit_selected = self._distance_squared_unit_to_unit
+            self._distance_squared_unit_to_unit = self._distance_squared_unit_to_unit_counted
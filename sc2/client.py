@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+import asyncio
+import json
+import os
 from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
 
 from loguru import logger
@@ -18,6 +21,7 @@ from sc2.ids.unit_typeid import UnitTypeId
 from sc2.position import Point2, Point3
 from sc2.protocol import ConnectionAlreadyClosed, Protocol, ProtocolError
 from sc2.renderer import Renderer
+from sc2.request_stats import RequestStats, request_kind
 from sc2.unit import Unit
 from sc2.units import Units
 
@@ -45,11 +49,53 @@ class Client(Protocol):
 
         self._renderer = None
         self.raw_affects_selection = False
+        # If True, main.py sends actions, debug draws, the step request and the next observation request in one burst
+        # instead of waiting for each response in turn, see step_pipelined(). Has no effect in realtime mode.
+        self.pipeline_requests: bool = False
+        # Latency histogram and byte counters per request kind, see request_stats and dump_request_stats()
+        self.record_request_stats: bool = False
+        self.request_stats: Dict[str, RequestStats] = {}
+        # If True, queries sent concurrently (e.g. with asyncio.gather) in the same event loop iteration are merged into one RequestQuery, see _query()
+        self.batch_queries: bool = False
+        self._query_batches: Dict[bool, _QueryBatch] = {}
+        # The batches of both 'ignore_resource_requirements' values are sent one after the other on the websocket
+        self._query_batch_lock = asyncio.Lock()
+        # Tasks of the batches that were sent and their batch, referenced here until they are done so they are not garbage collected
+        self._query_batch_tasks: Dict[asyncio.Task, _QueryBatch] = {}
 
     @property
     def in_game(self) -> bool:
         return self._status in {Status.in_game, Status.in_replay}
 
+    def _records_requests(self) -> bool:
+        return self.record_request_stats or super()._records_requests()
+
+    def _record_request(self, request: sc_pb.Request, request_bytes: int, response_bytes: int, latency: float):
+        super()._record_request(request, request_bytes, response_bytes, latency)
+        if self.record_request_stats:
+            kind = request_kind(request)
+            stats = self.request_stats.get(kind)
+            if stats is None:
+                stats = self.request_stats[kind] = RequestStats()
+            stats.add(latency, request_bytes, response_bytes)
+
+    def request_stats_summary(self) -> Dict[str, dict]:
+        """Returns count, latency (in seconds) percentiles, histogram and bytes sent and received for each request kind,
+        e.g. 'observation', 'step', 'action', 'query_pathing', 'query_placement', 'query_abilities', 'debug' or 'game_info'.
+        Latencies of requests sent with step_pipelined() are measured from the start of the burst."""
+        return {kind: stats.to_dict() for kind, stats in sorted(self.request_stats.items())}
+
+    def dump_request_stats(self, path: str):
+        """Writes request_stats_summary() as json file to 'path'.
+
+        :param path:"""
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.request_stats_summary(), f, indent=2)
+        logger.info(f"Saved request stats to {path}")
+
     async def join_game(self, name=None, race=None, observed_player_id=None, portconfig=None, rgb_render_config=None):
         ifopts = sc_pb.InterfaceOptions(
             raw=True,
@@ -104,6 +150,7 @@ class Client(Protocol):
     async def leave(self):
         """ You can use 'await self.client.leave()' to surrender midst game. """
         is_resign = self._game_result is None
+        self._cancel_query_batches()
 
         if is_resign:
             # For all clients that can leave, result of leaving the game either
@@ -131,6 +178,10 @@ class Client(Protocol):
             result = await self._execute(observation=sc_pb.RequestObservation(game_loop=game_loop))
         else:
             result = await self._execute(observation=sc_pb.RequestObservation())
+        return await self._process_observation(result)
+
+    async def _process_observation(self, result):
+        """ Checks the observation response for a game result and renders it if RGB rendering was requested. """
         assert result.HasField("observation")
 
         if not self.in_game or result.observation.player_result:
@@ -155,6 +206,32 @@ class Client(Protocol):
         step_size = step_size or self.game_step
         return await self._execute(step=sc_pb.RequestStep(count=step_size))
 
+    async def step_pipelined(self, actions=None, step_size: int = None):
+        """Sends the actions, the debug draws, the step request and the observation request back to back and only then waits
+        for the responses, which saves up to three round trips per step compared to actions(), _send_debug(), step() and observation().
+        Used by main.py if self.pipeline_requests is set. Returns the observation response of the next step.
+
+        :param actions:
+        :param step_size:"""
+        step_size = step_size or self.game_step
+        requests = []
+        action_request = self._action_request(actions)
+        if action_request is not None:
+            requests.append(action_request)
+        debug_request = self._debug_request()
+        if debug_request is not None:
+            requests.append(debug_request)
+        requests.append(sc_pb.Request(step=sc_pb.RequestStep(count=step_size)))
+        requests.append(sc_pb.Request(observation=sc_pb.RequestObservation()))
+
+        responses = await self._execute_pipelined(requests)
+
+        # Errors on actions and debug draws are ignored the same way as in actions() and _send_debug()
+        for response in responses[-2:]:
+            if response.error:
+                raise ProtocolError(f"{response.error}")
+        return await self._process_observation(responses[-1])
+
     async def get_game_data(self) -> GameData:
         result = await self._execute(
             data=sc_pb.RequestData(ability_id=True, unit_type_id=True, upgrade_id=True, buff_id=True, effect_id=True)
@@ -186,22 +263,116 @@ class Client(Protocol):
         return GameInfo(result.game_info)
 
     async def actions(self, actions, return_successes=False):
-        if not actions:
+        action_request = self._action_request(actions)
+        if action_request is None:
             return None
-        if not isinstance(actions, list):
-            actions = [actions]
 
         # On realtime=True, might get an error here: sc2.protocol.ProtocolError: ['Not in a game']
         try:
-            res = await self._execute(
-                action=sc_pb.RequestAction(actions=(sc_pb.Action(action_raw=a) for a in combine_actions(actions)))
-            )
+            res = await self._execute(action=action_request.action)
         except ProtocolError:
             return []
         if return_successes:
             return [ActionResult(r) for r in res.action.result]
         return [ActionResult(r) for r in res.action.result if ActionResult(r) != ActionResult.Success]
 
+    @staticmethod
+    def _action_request(actions) -> Optional[sc_pb.Request]:
+        """ Combines the unit commands into one action request, returns None if there is nothing to send. """
+        if not actions:
+            return None
+        if not isinstance(actions, list):
+            actions = [actions]
+        return sc_pb.Request(
+            action=sc_pb.RequestAction(actions=(sc_pb.Action(action_raw=a) for a in combine_actions(actions)))
+        )
+
+    async def _query(
+        self,
+        pathing: Iterable[query_pb.RequestQueryPathing] = (),
+        placements: Iterable[query_pb.RequestQueryBuildingPlacement] = (),
+        abilities: Iterable[query_pb.RequestQueryAvailableAbilities] = (),
+        ignore_resource_requirements: bool = False,
+    ) -> Tuple[list, list, list]:
+        """Sends a RequestQuery and returns the pathing, placement and ability results.
+        If self.batch_queries is set, all queries issued in the same event loop iteration with the same
+        'ignore_resource_requirements' are merged into one RequestQuery, and each caller receives its own part of the response. Example::
+
+            # Sends one RequestQuery instead of one per warpgate
+            placements = await asyncio.gather(*(self.find_placement(AbilityId.WARPGATETRAIN_ZEALOT, pos) for pos in positions))
+
+        :param pathing:
+        :param placements:
+        :param abilities:
+        :param ignore_resource_requirements:"""
+        if not self.batch_queries:
+            result = await self._execute(
+                query=query_pb.RequestQuery(
+                    pathing=pathing,
+                    placements=placements,
+                    abilities=abilities,
+                    ignore_resource_requirements=ignore_resource_requirements,
+                )
+            )
+            return result.query.pathing, result.query.placements, result.query.abilities
+
+        batch = self._query_batches.get(ignore_resource_requirements)
+        if batch is None:
+            batch = self._query_batches[ignore_resource_requirements] = _QueryBatch()
+            # Runs after all tasks that are ready in this event loop iteration had the chance to add their queries
+            asyncio.get_running_loop().call_soon(self._send_query_batch, ignore_resource_requirements)
+        return await batch.add(pathing, placements, abilities)
+
+    def _send_query_batch(self, ignore_resource_requirements: bool):
+        batch = self._query_batches.pop(ignore_resource_requirements, None)
+        # The batch was cancelled by leave()
+        if batch is None:
+            return
+        task = asyncio.ensure_future(self._execute_query_batch(batch, ignore_resource_requirements))
+        self._query_batch_tasks[task] = batch
+        task.add_done_callback(self._query_batch_tasks.pop)
+
+    def _cancel_query_batches(self):
+        """ Cancels the batches that were not answered yet, so their callers don't wait for a game that was left. """
+        batches = list(self._query_batches.values())
+        self._query_batches.clear()
+        for task, batch in self._query_batch_tasks.items():
+            # A task that did not start yet is cancelled before it can cancel the callers itself
+            task.cancel()
+            batches.append(batch)
+        for batch in batches:
+            for future, *_ in batch.waiters:
+                future.cancel()
+
+    async def _execute_query_batch(self, batch: _QueryBatch, ignore_resource_requirements: bool):
+        try:
+            async with self._query_batch_lock:
+                result = await self._execute(
+                    query=query_pb.RequestQuery(
+                        pathing=batch.pathing,
+                        placements=batch.placements,
+                        abilities=batch.abilities,
+                        ignore_resource_requirements=ignore_resource_requirements,
+                    )
+                )
+        except asyncio.CancelledError:
+            for future, *_ in batch.waiters:
+                future.cancel()
+            raise
+        # Any error is passed on to every caller of this batch
+        # pylint: disable=W0703
+        except Exception as e:
+            for future, *_ in batch.waiters:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for future, pathing, placements, abilities in batch.waiters:
+            # The caller might have been cancelled in the meantime
+            if not future.done():
+                future.set_result(
+                    (result.query.pathing[pathing], result.query.placements[placements], result.query.abilities[abilities])
+                )
+
     async def query_pathing(self, start: Union[Unit, Point2, Point3],
                             end: Union[Point2, Point3]) -> Optional[Union[int, float]]:
         """Caution: returns "None" when path not found
@@ -215,8 +386,8 @@ class Client(Protocol):
             path = [query_pb.RequestQueryPathing(start_pos=start.as_Point2D, end_pos=end.as_Point2D)]
         else:
             path = [query_pb.RequestQueryPathing(unit_tag=start.tag, end_pos=end.as_Point2D)]
-        result = await self._execute(query=query_pb.RequestQuery(pathing=path))
-        distance = float(result.query.pathing[0].distance)
+        pathing, _, _ = await self._query(pathing=path)
+        distance = float(pathing[0].distance)
         if distance <= 0.0:
             return None
         return distance
@@ -240,8 +411,8 @@ class Client(Protocol):
             )
         else:
             path = (query_pb.RequestQueryPathing(unit_tag=p1.tag, end_pos=p2.as_Point2D) for p1, p2 in zipped_list)
-        results = await self._execute(query=query_pb.RequestQuery(pathing=path))
-        return [float(d.distance) for d in results.query.pathing]
+        pathing, _, _ = await self._query(pathing=path)
+        return [float(d.distance) for d in pathing]
 
     async def _query_building_placement_fast(
         self, ability: AbilityId, positions: List[Union[Point2, Point3]], ignore_resources: bool = True
@@ -253,17 +424,15 @@ class Client(Protocol):
         :param positions:
         :param ignore_resources:
         """
-        result = await self._execute(
-            query=query_pb.RequestQuery(
-                placements=(
-                    query_pb.RequestQueryBuildingPlacement(ability_id=ability.value, target_pos=position.as_Point2D)
-                    for position in positions
-                ),
-                ignore_resource_requirements=ignore_resources,
-            )
+        _, placements, _ = await self._query(
+            placements=(
+                query_pb.RequestQueryBuildingPlacement(ability_id=ability.value, target_pos=position.as_Point2D)
+                for position in positions
+            ),
+            ignore_resource_requirements=ignore_resources,
         )
         # Success enum value is 1, see https://github.com/Blizzard/s2client-proto/blob/9906df71d6909511907d8419b33acc1a3bd51ec0/s2clientprotocol/error.proto#L7
-        return [p.result == 1 for p in result.query.placements]
+        return [p.result == 1 for p in placements]
 
     async def query_building_placement(
         self,
@@ -277,17 +446,15 @@ class Client(Protocol):
         :param positions:
         :param ignore_resources:"""
         assert isinstance(ability, AbilityData)
-        result = await self._execute(
-            query=query_pb.RequestQuery(
-                placements=(
-                    query_pb.RequestQueryBuildingPlacement(ability_id=ability.id.value, target_pos=position.as_Point2D)
-                    for position in positions
-                ),
-                ignore_resource_requirements=ignore_resources,
-            )
+        _, placements, _ = await self._query(
+            placements=(
+                query_pb.RequestQueryBuildingPlacement(ability_id=ability.id.value, target_pos=position.as_Point2D)
+                for position in positions
+            ),
+            ignore_resource_requirements=ignore_resources,
         )
         # Unnecessary converting to ActionResult?
-        return [ActionResult(p.result) for p in result.query.placements]
+        return [ActionResult(p.result) for p in placements]
 
     async def query_available_abilities(
         self, units: Union[List[Unit], Units], ignore_resource_requirements: bool = False
@@ -300,29 +467,25 @@ class Client(Protocol):
             units = [units]
             input_was_a_list = False
         assert units
-        result = await self._execute(
-            query=query_pb.RequestQuery(
-                abilities=(query_pb.RequestQueryAvailableAbilities(unit_tag=unit.tag) for unit in units),
-                ignore_resource_requirements=ignore_resource_requirements,
-            )
+        _, _, abilities = await self._query(
+            abilities=(query_pb.RequestQueryAvailableAbilities(unit_tag=unit.tag) for unit in units),
+            ignore_resource_requirements=ignore_resource_requirements,
         )
         """ Fix for bots that only query a single unit, may be removed soon """
         if not input_was_a_list:
-            return [[AbilityId(a.ability_id) for a in b.abilities] for b in result.query.abilities][0]
-        return [[AbilityId(a.ability_id) for a in b.abilities] for b in result.query.abilities]
+            return [[AbilityId(a.ability_id) for a in b.abilities] for b in abilities][0]
+        return [[AbilityId(a.ability_id) for a in b.abilities] for b in abilities]
 
     async def query_available_abilities_with_tag(
         self, units: Union[List[Unit], Units], ignore_resource_requirements: bool = False
     ) -> Dict[int, Set[AbilityId]]:
         """ Query abilities of multiple units """
 
-        result = await self._execute(
-            query=query_pb.RequestQuery(
-                abilities=(query_pb.RequestQueryAvailableAbilities(unit_tag=unit.tag) for unit in units),
-                ignore_resource_requirements=ignore_resource_requirements,
-            )
+        _, _, abilities = await self._query(
+            abilities=(query_pb.RequestQueryAvailableAbilities(unit_tag=unit.tag) for unit in units),
+            ignore_resource_requirements=ignore_resource_requirements,
         )
-        return {b.unit_tag: {AbilityId(a.ability_id) for a in b.abilities} for b in result.query.abilities}
+        return {b.unit_tag: {AbilityId(a.ability_id) for a in b.abilities} for b in abilities}
 
     async def chat_send(self, message: str, team_only: bool):
         """ Writes a message to the chat """
@@ -581,37 +744,45 @@ class Client(Protocol):
         """Sends the debug draw execution. This is run by main.py now automatically, if there is any items in the list. You do not need to run this manually any longer.
         Check examples/terran/ramp_wall.py for example drawing. Each draw request needs to be sent again in every single on_step iteration.
         """
+        debug_request = self._debug_request()
+        if debug_request is not None:
+            try:
+                await self._execute(debug=debug_request.debug)
+            except ProtocolError:
+                return
+
+    def _debug_request(self) -> Optional[sc_pb.Request]:
+        """Builds the debug draw request from the debug items of this iteration and clears them.
+        Returns None if nothing changed since the last sent debug draw request."""
         debug_hash = (
             sum(hash(item) for item in self._debug_texts),
             sum(hash(item) for item in self._debug_lines),
             sum(hash(item) for item in self._debug_boxes),
             sum(hash(item) for item in self._debug_spheres),
         )
+        request = None
         if debug_hash != (0, 0, 0, 0):
             if debug_hash != self._debug_hash_tuple_last_iteration:
                 # Something has changed, either more or less is to be drawn, or a position of a drawing changed (e.g. when drawing on a moving unit)
                 self._debug_hash_tuple_last_iteration = debug_hash
-                try:
-                    await self._execute(
-                        debug=sc_pb.RequestDebug(
-                            debug=[
-                                debug_pb.DebugCommand(
-                                    draw=debug_pb.DebugDraw(
-                                        text=[text.to_proto()
-                                              for text in self._debug_texts] if self._debug_texts else None,
-                                        lines=[line.to_proto()
-                                               for line in self._debug_lines] if self._debug_lines else None,
-                                        boxes=[box.to_proto()
-                                               for box in self._debug_boxes] if self._debug_boxes else None,
-                                        spheres=[sphere.to_proto()
-                                                 for sphere in self._debug_spheres] if self._debug_spheres else None,
-                                    )
+                request = sc_pb.Request(
+                    debug=sc_pb.RequestDebug(
+                        debug=[
+                            debug_pb.DebugCommand(
+                                draw=debug_pb.DebugDraw(
+                                    text=[text.to_proto()
+                                          for text in self._debug_texts] if self._debug_texts else None,
+                                    lines=[line.to_proto()
+                                           for line in self._debug_lines] if self._debug_lines else None,
+                                    boxes=[box.to_proto()
+                                           for box in self._debug_boxes] if self._debug_boxes else None,
+                                    spheres=[sphere.to_proto()
+                                             for sphere in self._debug_spheres] if self._debug_spheres else None,
                                 )
-                            ]
-                        )
+                            )
+                        ]
                     )
-                except ProtocolError:
-                    return
+                )
             self._debug_draw_last_frame = True
             self._debug_texts.clear()
             self._debug_lines.clear()
@@ -620,7 +791,7 @@ class Client(Protocol):
         elif self._debug_draw_last_frame:
             # Clear drawing if we drew last frame but nothing to draw this frame
             self._debug_hash_tuple_last_iteration = (0, 0, 0, 0)
-            await self._execute(
+            request = sc_pb.Request(
                 debug=sc_pb.RequestDebug(
                     debug=[
                         debug_pb.DebugCommand(draw=debug_pb.DebugDraw(text=None, lines=None, boxes=None, spheres=None))
@@ -628,6 +799,7 @@ class Client(Protocol):
                 )
             )
             self._debug_draw_last_frame = False
+        return request
 
     async def debug_leave(self):
         await self._execute(debug=sc_pb.RequestDebug(debug=[debug_pb.DebugCommand(end_game=debug_pb.DebugEndGame())]))
@@ -732,6 +904,35 @@ class Client(Protocol):
         await self._execute(quick_load=sc_pb.RequestQuickLoad())
 
 
+class _QueryBatch:
+    """ Queries collected by Client._query during one event loop iteration. """
+
+    __slots__ = ("pathing", "placements", "abilities", "waiters")
+
+    def __init__(self):
+        self.pathing: List[query_pb.RequestQueryPathing] = []
+        self.placements: List[query_pb.RequestQueryBuildingPlacement] = []
+        self.abilities: List[query_pb.RequestQueryAvailableAbilities] = []
+        # Future of each caller and the slices of the response that belong to it
+        self.waiters: List[Tuple[asyncio.Future, slice, slice, slice]] = []
+
+    def add(self, pathing, placements, abilities) -> asyncio.Future:
+        pathing_start, placements_start, abilities_start = len(self.pathing), len(self.placements), len(self.abilities)
+        self.pathing.extend(pathing)
+        self.placements.extend(placements)
+        self.abilities.extend(abilities)
+        future = asyncio.get_running_loop().create_future()
+        self.waiters.append(
+            (
+                future,
+                slice(pathing_start, len(self.pathing)),
+                slice(placements_start, len(self.placements)),
+                slice(abilities_start, len(self.abilities)),
+            )
+        )
+        return future
+
+
 class DrawItem:
 
     @staticmethod
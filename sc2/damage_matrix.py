@@ -0,0 +1,282 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from sc2.constants import DAMAGE_BONUS_PER_UPGRADE, IS_LIGHT, TARGET_AIR, TARGET_BOTH, TARGET_GROUND
+from sc2.ids.buff_id import BuffId
+from sc2.ids.unit_typeid import UnitTypeId
+from sc2.ids.upgrade_id import UpgradeId
+
+if TYPE_CHECKING:
+    from sc2.game_data import GameData
+    from sc2.unit import Unit
+    from sc2.units import Units
+
+# Values of the bunker field of the attacker key
+BUNKER_OWN = 0
+BUNKER_ENEMY_ACTIVE = 1
+BUNKER_ENEMY_INACTIVE = 2
+
+# Attacker key: (type value, attack upgrade level, has blue flame, bunker state)
+AttackerKey = Tuple[int, int, bool, int]
+# Target key: (type value, is flying, armor, shield armor, has guardian shield, has shield)
+TargetKey = Tuple[int, bool, float, float, bool, bool]
+# Weapon of an attacker against a target:
+# (damage per attack against shield, against health, armor against the damage that is left after the shield broke, attacks, cooldown, range)
+WeaponDamage = Tuple[float, float, float, int, float, float]
+
+SPEED_AND_RANGE_MODIFIED_TYPES = {
+    UnitTypeId.ZERGLING,
+    UnitTypeId.MARINE,
+    UnitTypeId.MARAUDER,
+    UnitTypeId.ADEPT,
+    UnitTypeId.HYDRALISK,
+    UnitTypeId.PHOENIX,
+    UnitTypeId.PLANETARYFORTRESS,
+    UnitTypeId.MISSILETURRET,
+    UnitTypeId.AUTOTURRET,
+}
+
+
+class DamageMatrix(NamedTuple):
+    """Arrays of shape (attackers, targets), entry [i, j] is the value of Unit.calculate_damage_vs_target and
+    Unit.calculate_dps_vs_target of attacker i against target j."""
+
+    damage: np.ndarray
+    cooldown: np.ndarray
+    range: np.ndarray
+    dps: np.ndarray
+
+
+def _speed_divisor_and_range_bonus(unit: Unit) -> Tuple[float, float]:
+    """ Buffs and upgrades that affect the weapon speed and range, like in Unit.calculate_damage_vs_target """
+    type_id = unit.type_id
+    if type_id not in SPEED_AND_RANGE_MODIFIED_TYPES:
+        return 1, 0
+    upgrades = unit._bot_object.state.upgrades
+    if type_id == UnitTypeId.ZERGLING and unit.is_mine and UpgradeId.ZERGLINGATTACKSPEED in upgrades:
+        return 1.4, 0
+    if type_id == UnitTypeId.ADEPT and unit.is_mine and UpgradeId.ADEPTPIERCINGATTACK in upgrades:
+        return 1.45, 0
+    if type_id == UnitTypeId.MARINE and BuffId.STIMPACK in unit.buffs:
+        return 1.5, 0
+    if type_id == UnitTypeId.MARAUDER and BuffId.STIMPACKMARAUDER in unit.buffs:
+        return 1.5, 0
+    if type_id == UnitTypeId.HYDRALISK and unit.is_mine and UpgradeId.EVOLVEGROOVEDSPINES in upgrades:
+        return 1, 1
+    if type_id == UnitTypeId.PHOENIX and unit.is_mine and UpgradeId.PHOENIXRANGEUPGRADE in upgrades:
+        return 1, 2
+    if (
+        type_id in {UnitTypeId.PLANETARYFORTRESS, UnitTypeId.MISSILETURRET, UnitTypeId.AUTOTURRET} and unit.is_mine
+        and UpgradeId.HISECAUTOTRACKING in upgrades
+    ):
+        return 1, 1
+    return 1, 0
+
+
+class DamageEngine:
+    """Calculates the damage of all units of one group against all units of another group at once.
+
+    The part of Unit.calculate_damage_vs_target that only depends on the types, upgrade levels and armor buffs is calculated
+    once per pair of attacker key and target key and kept for the whole game.
+    The part that depends on the current shield and health of the targets is calculated with numpy for all pairs."""
+
+    def __init__(self, game_data: GameData):
+        """
+        :param game_data:
+        """
+        self._game_data = game_data
+        self._damages: Dict[Tuple[AttackerKey, TargetKey], Tuple[Optional[Tuple[float, float, float]],
+                                                                 List[WeaponDamage]]] = {}
+
+    @staticmethod
+    def _attacker_key(unit: Unit) -> AttackerKey:
+        type_id = unit.type_id
+        has_blue_flame = (
+            type_id == UnitTypeId.HELLION and UpgradeId.HIGHCAPACITYBARRELS in unit._bot_object.state.upgrades
+        )
+        bunker = BUNKER_OWN
+        if type_id == UnitTypeId.BUNKER and unit.is_enemy:
+            bunker = BUNKER_ENEMY_ACTIVE if unit.is_active else BUNKER_ENEMY_INACTIVE
+        return type_id.value, unit.attack_upgrade_level, has_blue_flame, bunker
+
+    @staticmethod
+    def _target_key(unit: Unit, ignore_armor: bool) -> TargetKey:
+        type_id = unit.type_id
+        if ignore_armor:
+            return type_id.value, unit.is_flying, 0, 0, False, unit.shield > 0
+        armor = unit.armor + unit.armor_upgrade_level
+        shield_armor = unit.shield_upgrade_level
+        # Ultralisk armor upgrade, only works if target belongs to the bot calling this function
+        if (
+            type_id in {UnitTypeId.ULTRALISK, UnitTypeId.ULTRALISKBURROWED} and unit.is_mine
+            and UpgradeId.CHITINOUSPLATING in unit._bot_object.state.upgrades
+        ):
+            armor += 2
+        buffs = unit.buffs
+        # Anti armor missile of raven
+        if BuffId.RAVENSHREDDERMISSILETINT in buffs:
+            armor -= 2
+            shield_armor -= 2
+        return type_id.value, unit.is_flying, armor, shield_armor, BuffId.GUARDIANSHIELD in buffs, unit.shield > 0
+
+    def _damage(self, attacker: AttackerKey,
+                target: TargetKey) -> Tuple[Optional[Tuple[float, float, float]], List[WeaponDamage]]:
+        """Returns the fixed (damage, cooldown, range) of battlecruisers and enemy bunkers, otherwise None and the weapons that can hit the target.
+
+        :param attacker:
+        :param target:"""
+        key = (attacker, target)
+        if key in self._damages:
+            return self._damages[key]
+        attacker_type, attack_level, has_blue_flame, bunker = attacker
+        target_type, is_flying, armor, shield_armor, has_guardian_shield, has_shield = target
+        fixed: Optional[Tuple[float, float, float]] = None
+        weapons: List[WeaponDamage] = []
+        # Hard coded battlecruisers and bunkers because they have no weapon in the API
+        if attacker_type == UnitTypeId.BATTLECRUISER.value:
+            if has_guardian_shield:
+                armor += 2
+                shield_armor += 2
+            damage = (5 if is_flying else 8) + attack_level
+            fixed = (damage - shield_armor if has_shield else damage - armor), 0.224, 6
+        elif bunker == BUNKER_ENEMY_ACTIVE:
+            # Expect fully loaded bunker with marines
+            fixed = 24, 0.854, 6
+        elif bunker == BUNKER_ENEMY_INACTIVE:
+            fixed = 0, 0, 0
+        else:
+            attacker_type_id = UnitTypeId(attacker_type)
+            upgrade_bonus = DAMAGE_BONUS_PER_UPGRADE.get(attacker_type_id, {})
+            target_attributes = self._game_data.units[target_type].attributes
+            required_target_type = (
+                TARGET_BOTH if target_type == UnitTypeId.COLOSSUS.value else TARGET_AIR if is_flying else TARGET_GROUND
+            )
+            for weapon in self._game_data.units[attacker_type]._proto.weapons:
+                if weapon.type not in required_target_type:
+                    continue
+                damage_per_upgrade = 0 if not attack_level else upgrade_bonus.get(weapon.type, {}).get(None, 1)
+                damage_per_attack = weapon.damage + attack_level * damage_per_upgrade
+                boni: List[float] = []
+                for bonus in weapon.damage_bonus:
+                    if bonus.attribute in target_attributes:
+                        damage_per_upgrade = (
+                            0 if not attack_level else upgrade_bonus.get(weapon.type, {}).get(bonus.attribute, 0)
+                        )
+                        # Hardcode blueflame damage bonus from hellions
+                        if bonus.attribute == IS_LIGHT and has_blue_flame:
+                            damage_per_upgrade += 5
+                        boni.append(bonus.bonus + attack_level * damage_per_upgrade)
+                if boni:
+                    damage_per_attack += max(boni)
+                # Guardian shield only reduces the damage of ranged weapons
+                guardian_shield_armor = 2 if has_guardian_shield and weapon.range >= 2 else 0
+                weapons.append(
+                    (
+                        max(0.5, damage_per_attack - shield_armor - guardian_shield_armor),
+                        max(0.5, damage_per_attack - armor - guardian_shield_armor),
+                        armor + guardian_shield_armor,
+                        weapon.attacks,
+                        weapon.speed,
+                        weapon.range,
+                    )
+                )
+        self._damages[key] = fixed, weapons
+        return fixed, weapons
+
+    def matrix(
+        self, attackers: Units, targets: Units, ignore_armor: bool = False, include_overkill_damage: bool = True
+    ) -> DamageMatrix:
+        """Returns the damage, cooldown, range and dps of each attacker against each target,
+        the same values as Unit.calculate_damage_vs_target and Unit.calculate_dps_vs_target.
+
+        :param attackers:
+        :param targets:
+        :param ignore_armor:
+        :param include_overkill_damage:"""
+        attacker_keys: Dict[AttackerKey, int] = {}
+        attacker_rows = np.fromiter(
+            (attacker_keys.setdefault(self._attacker_key(unit), len(attacker_keys)) for unit in attackers),
+            dtype=np.intp,
+            count=len(attackers),
+        )
+        target_keys: Dict[TargetKey, int] = {}
+        target_rows = np.fromiter(
+            (target_keys.setdefault(self._target_key(unit, ignore_armor), len(target_keys)) for unit in targets),
+            dtype=np.intp,
+            count=len(targets),
+        )
+
+        # Damage of each pair of keys: fixed values and up to 'weapon_count' weapons
+        pairs = [[self._damage(attacker, target) for target in target_keys] for attacker in attacker_keys]
+        weapon_count = max((len(weapons) for row in pairs for _, weapons in row), default=0)
+        shape = (len(attacker_keys), len(target_keys))
+        fixed = np.zeros(shape + (3, ))
+        is_fixed = np.zeros(shape, dtype=bool)
+        weapon_values = np.zeros(shape + (max(weapon_count, 1), 6))
+        has_weapon = np.zeros(shape + (max(weapon_count, 1), ), dtype=bool)
+        for i, row in enumerate(pairs):
+            for j, (fixed_damage, weapons) in enumerate(row):
+                if fixed_damage is not None:
+                    fixed[i, j] = fixed_damage
+                    is_fixed[i, j] = True
+                for k, weapon in enumerate(weapons):
+                    weapon_values[i, j, k] = weapon
+                    has_weapon[i, j, k] = True
+
+        # Expand the pairs of keys to the pairs of units, axes: (attacker, target, weapon)
+        weapon_values = weapon_values[attacker_rows][:, target_rows]
+        has_weapon = has_weapon[attacker_rows][:, target_rows]
+        shield_damage, health_damage, remaining_armor, attacks, cooldown, weapon_range = np.moveaxis(weapon_values, -1, 0)
+        health = np.fromiter((unit.health for unit in targets), dtype=float, count=len(targets))[None, :, None]
+        shield = np.fromiter((unit.shield for unit in targets), dtype=float, count=len(targets))[None, :, None]
+
+        # Attacks that hit the shield, the damage that is left when the shield breaks goes to the health
+        with np.errstate(divide="ignore", invalid="ignore"):
+            shield_attacks = np.where(shield > 0, np.minimum(attacks, np.ceil(shield / shield_damage)), 0)
+        shield_left = shield - shield_attacks * shield_damage
+        remaining_damage = np.maximum(-shield_left, 0)
+        shield_left = np.maximum(shield_left, 0)
+        attacks_left = attacks - shield_attacks
+        health_left = np.where(
+            remaining_damage > 0, health - np.maximum(0.5, remaining_damage - remaining_armor), health
+        )
+        if include_overkill_damage:
+            health_left = health_left - attacks_left * health_damage
+        else:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                health_attacks = np.where(
+                    health_left > 0, np.minimum(attacks_left, np.ceil(health_left / health_damage)), 0
+                )
+            health_left = np.maximum(health_left - health_attacks * health_damage, 0)
+        weapon_damage = np.where(has_weapon, health + shield - health_left - shield_left, -np.inf)
+
+        # The weapon that deals the most damage, e.g. both thor and queen attacks work on colossus
+        best = np.argmax(weapon_damage, axis=-1)[..., None]
+        damage = np.take_along_axis(weapon_damage, best, axis=-1)[..., 0]
+        cooldown = np.take_along_axis(cooldown, best, axis=-1)[..., 0]
+        weapon_range = np.take_along_axis(weapon_range, best, axis=-1)[..., 0]
+        modifiers = np.array([_speed_divisor_and_range_bonus(unit) for unit in attackers], dtype=float).reshape(-1, 2)
+        cooldown = cooldown / modifiers[:, 0:1]
+        weapon_range = weapon_range + modifiers[:, 1:2]
+
+        has_damage = has_weapon.any(axis=-1)
+        damage = np.where(has_damage, damage, 0)
+        cooldown = np.where(has_damage, cooldown, 0)
+        weapon_range = np.where(has_damage, weapon_range, 0)
+        is_fixed = is_fixed[attacker_rows][:, target_rows]
+        fixed = fixed[attacker_rows][:, target_rows]
+        damage = np.where(is_fixed, fixed[..., 0], damage)
+        cooldown = np.where(is_fixed, fixed[..., 1], cooldown)
+        weapon_range = np.where(is_fixed, fixed[..., 2], weapon_range)
+
+        # Structures that are not completed can't attack
+        is_ready = np.fromiter((unit.is_ready for unit in attackers), dtype=bool, count=len(attackers))[:, None]
+        damage = np.where(is_ready, damage, 0)
+        cooldown = np.where(is_ready, cooldown, 0)
+        weapon_range = np.where(is_ready, weapon_range, 0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            dps = np.where(cooldown != 0, damage / cooldown, 0)
+        return DamageMatrix(damage, cooldown, weapon_range, dps)
@@ -2,14 +2,18 @@
 from __future__ import annotations
 
 from bisect import bisect_left
-from functools import lru_cache
+from functools import cached_property, lru_cache
 from typing import Dict, List, Optional
 
+import numpy as np
+
+from sc2.damage_matrix import DamageEngine
 from sc2.data import Attribute, Race
 from sc2.dicts.unit_trained_from import UNIT_TRAINED_FROM
 from sc2.ids.ability_id import AbilityId
 from sc2.ids.unit_typeid import UnitTypeId
 from sc2.unit_command import UnitCommand
+from sc2.unit_type_table import UnitTypeTable
 
 # Set of parts of names of abilities that have no cost
 # E.g every ability that has 'Hold' in its name is free
@@ -29,6 +33,14 @@ class GameData:
         self.upgrades = {u.upgrade_id: UpgradeData(self, u) for u in data.upgrades}
         # Cached UnitTypeIds so that conversion does not take long. This needs to be moved elsewhere if a new GameData object is created multiple times per game
         self.unit_types: Dict[int, UnitTypeId] = {}
+        # Static data of all unit types as numpy arrays, read by Unit and Units instead of the protos
+        self.unit_type_table: UnitTypeTable = UnitTypeTable(self.units)
+        # Generic ability id of each exact ability id in self.abilities, 0 for unknown ids, see AbilityData.id
+        self.generic_ability_ids: np.ndarray = np.zeros(max(ids) + 1, dtype=np.int32)
+        for ability_id, ability_data in self.abilities.items():
+            self.generic_ability_ids[ability_id] = ability_data._proto.remaps_to_ability_id or ability_id
+        # Keeps the damage of each pair of unit types and upgrade levels for the whole game, see Units.damage_matrix
+        self.damage_engine: DamageEngine = DamageEngine(self)
 
     @lru_cache(maxsize=256)
     def calculate_ability_cost(self, ability) -> Cost:
@@ -89,14 +101,14 @@ class AbilityData:
     def __repr__(self) -> str:
         return f"AbilityData(name={self._proto.button_name})"
 
-    @property
+    @cached_property
     def id(self) -> AbilityId:
         """ Returns the generic remap ID. See sc2/dicts/generic_redirect_abilities.py """
         if self._proto.remaps_to_ability_id:
             return AbilityId(self._proto.remaps_to_ability_id)
         return AbilityId(self._proto.ability_id)
 
-    @property
+    @cached_property
     def exact_id(self) -> AbilityId:
         """ Returns the exact ID of the ability """
         return AbilityId(self._proto.ability_id)
@@ -1,8 +1,9 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from functools import cached_property
+from functools import cached_property, wraps
 from itertools import chain
+from typing import Counter as CounterType
 from typing import List, Optional, Set, Union
 
 from loguru import logger
@@ -193,7 +194,29 @@ class ActionError(AbilityLookupTemplateClass):
     result: int
 
 
+def lazy_field(function):
+    """ Like cached_property, but counts in GameState.lazy_field_builds how often the field was built. """
+    name = function.__name__
+
+    @wraps(function)
+    def build(self):
+        if self.lazy_field_builds is not None:
+            self.lazy_field_builds[name] += 1
+        return function(self)
+
+    return cached_property(build)
+
+
 class GameState:
+    """The state of one frame, created from the observation response.
+
+    The fields psionic_matrix, score, upgrades, visibility, creep and effects are only built the first time they are
+    accessed in the frame, so a bot that never reads them doesn't pay for them.
+    The bot that gets the state counts in lazy_field_builds how often each of them was built, see BotAIInternal.lazy_field_usage()"""
+
+    LAZY_FIELDS = ("psionic_matrix", "score", "upgrades", "visibility", "creep", "effects")
+    # Field name: amount of frames in which that field was built, set by BotAIInternal._prepare_step to the counter of the bot
+    lazy_field_builds: Optional[CounterType[str]] = None
 
     def __init__(self, response_observation, previous_observation=None):
         """
@@ -209,29 +232,58 @@ class GameState:
         self.player_result = response_observation.player_result
         self.common: Common = Common(self.observation.player_common)
 
-        # Area covered by Pylons and Warpprisms
-        self.psionic_matrix: PsionicMatrix = PsionicMatrix.from_proto(self.observation_raw.player.power_sources)
         # 22.4 per second on faster game speed
         self.game_loop: int = self.observation.game_loop
 
-        # https://github.com/Blizzard/s2client-proto/blob/33f0ecf615aa06ca845ffe4739ef3133f37265a9/s2clientprotocol/score.proto#L31
-        self.score: ScoreDetails = ScoreDetails(self.observation.score)
         self.abilities = self.observation.abilities  # abilities of selected units
-        self.upgrades: Set[UpgradeId] = {UpgradeId(upgrade) for upgrade in self.observation_raw.player.upgrade_ids}
-
-        # self.visibility[point]: 0=Hidden, 1=Fogged, 2=Visible
-        self.visibility: PixelMap = PixelMap(self.observation_raw.map_state.visibility, mirrored=False)
-        # self.creep[point]: 0=No creep, 1=creep
-        self.creep: PixelMap = PixelMap(self.observation_raw.map_state.creep, in_bits=True, mirrored=False)
 
-        # Effects like ravager bile shot, lurker attack, everything in effect_id.py
-        self.effects: Set[EffectData] = {EffectData(effect) for effect in self.observation_raw.effects}
-        """ Usage:
+        # Reaper grenades, parasitic bomb dummies and forcefields, which are units in the observation, see add_fake_effect
+        self.fake_effects: List[EffectData] = []
+
+    @lazy_field
+    def psionic_matrix(self) -> PsionicMatrix:
+        """ Area covered by Pylons and Warpprisms """
+        return PsionicMatrix.from_proto(self.observation_raw.player.power_sources)
+
+    @lazy_field
+    def score(self) -> ScoreDetails:
+        """ https://github.com/Blizzard/s2client-proto/blob/33f0ecf615aa06ca845ffe4739ef3133f37265a9/s2clientprotocol/score.proto#L31 """
+        return ScoreDetails(self.observation.score)
+
+    @lazy_field
+    def upgrades(self) -> Set[UpgradeId]:
+        return {UpgradeId(upgrade) for upgrade in self.observation_raw.player.upgrade_ids}
+
+    @lazy_field
+    def visibility(self) -> PixelMap:
+        """ self.visibility[point]: 0=Hidden, 1=Fogged, 2=Visible """
+        return PixelMap(self.observation_raw.map_state.visibility, mirrored=False)
+
+    @lazy_field
+    def creep(self) -> PixelMap:
+        """ self.creep[point]: 0=No creep, 1=creep """
+        return PixelMap(self.observation_raw.map_state.creep, in_bits=True, mirrored=False)
+
+    @lazy_field
+    def effects(self) -> Set[EffectData]:
+        """Effects like ravager bile shot, lurker attack, everything in effect_id.py, and the fake effects.
+        Usage:
         for effect in self.state.effects:
             if effect.id == EffectId.RAVAGERCORROSIVEBILECP:
                 positions = effect.positions
                 # dodge the ravager biles
         """
+        effects = {EffectData(effect) for effect in self.observation_raw.effects}
+        effects.update(self.fake_effects)
+        return effects
+
+    def add_fake_effect(self, effect: EffectData):
+        """
+        :param effect:
+        """
+        self.fake_effects.append(effect)
+        if "effects" in self.__dict__:
+            self.effects.add(effect)
 
     @cached_property
     def dead_units(self) -> Set[int]:
@@ -148,7 +148,7 @@ async def _play_game_ai(
 
     async def run_bot_iteration(iteration: int):
         nonlocal gs
-        logger.debug(f"Running AI step, it={iteration} {gs.game_loop / 22.4:.2f}s")
+        logger.debug("Running AI step, it={} {:.2f}s", iteration, gs.game_loop / 22.4)
         # Issue event like unit created or unit destroyed
         await ai.issue_events()
         await ai.on_step(iteration)
@@ -157,8 +157,12 @@ async def _play_game_ai(
 
     # Only used in realtime=True
     previous_state_observation = None
+    # Only used with client.pipeline_requests, the observation that was received together with the last step request
+    pipelined_state = None
     for iteration in range(10**10):
-        if realtime and gs:
+        if pipelined_state is not None:
+            state, pipelined_state = pipelined_state, None
+        elif realtime and gs:
             # On realtime=True, might get an error here: sc2.protocol.ProtocolError: ['Not in a game']
             with suppress(ProtocolError):
                 requested_step = gs.game_loop + client.game_step
@@ -177,12 +181,14 @@ async def _play_game_ai(
             return client._game_result[player_id]
         gs = GameState(state.observation, previous_state_observation)
         previous_state_observation = None
-        logger.debug(f"Score: {gs.score.score}")
+        logger.opt(lazy=True).debug("Score: {}", lambda: gs.score.score)
 
         if game_time_limit and gs.game_loop / 22.4 > game_time_limit:
             await ai.on_end(Result.Tie)
             return Result.Tie
-        proto_game_info = await client._execute(game_info=sc_pb.RequestGameInfo())
+        proto_game_info = None
+        if ai._requires_game_info_update():
+            proto_game_info = await client._execute(game_info=sc_pb.RequestGameInfo())
         ai._prepare_step(gs, proto_game_info)
 
         await run_bot_iteration(iteration)  # Main bot loop
@@ -193,7 +199,10 @@ async def _play_game_ai(
                 return client._game_result[player_id]
 
             # TODO: In bot vs bot, if the other bot ends the game, this bot gets stuck in requesting an observation when using main.py:run_multiple_games
-            await client.step()
+            if ai._uses_pipelined_step():
+                pipelined_state = await ai._step_pipelined()
+            else:
+                await client.step()
     return Result.Undecided
 
 
@@ -257,9 +266,13 @@ async def _play_replay(client, ai, realtime=False, player_id=0):
         return Result.Defeat
 
     iteration = 0
+    # Only used with client.pipeline_requests, the observation that was received together with the last step request
+    pipelined_state = None
     while True:
         if iteration != 0:
-            if realtime:
+            if pipelined_state is not None:
+                state, pipelined_state = pipelined_state, None
+            elif realtime:
                 # TODO: check what happens if a bot takes too long to respond, so that the requested
                 #  game_loop might already be in the past
                 state = await client.observation(gs.game_loop + client.game_step)
@@ -273,12 +286,14 @@ async def _play_replay(client, ai, realtime=False, player_id=0):
                     return client._game_result[player_id]
                 return client._game_result[player_id]
             gs = GameState(state.observation)
-            logger.debug(f"Score: {gs.score.score}")
+            logger.opt(lazy=True).debug("Score: {}", lambda: gs.score.score)
 
-            proto_game_info = await client._execute(game_info=sc_pb.RequestGameInfo())
+            proto_game_info = None
+            if ai._requires_game_info_update():
+                proto_game_info = await client._execute(game_info=sc_pb.RequestGameInfo())
             ai._prepare_step(gs, proto_game_info)
 
-        logger.debug(f"Running AI step, it={iteration} {gs.game_loop * 0.725 * (1 / 16):.2f}s")
+        logger.debug("Running AI step, it={} {:.2f}s", iteration, gs.game_loop * 0.725 * (1 / 16))
 
         try:
             # Issue event like unit created or unit destroyed
@@ -311,7 +326,10 @@ async def _play_replay(client, ai, realtime=False, player_id=0):
                 await ai.on_end(Result.Victory)
                 return Result.Victory
 
-        await client.step()  # unindent one line to work in realtime
+        if ai._uses_pipelined_step():
+            pipelined_state = await ai._step_pipelined()
+        else:
+            await client.step()  # unindent one line to work in realtime
 
         iteration += 1
 
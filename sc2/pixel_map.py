@@ -1,8 +1,13 @@
-from typing import Callable, FrozenSet, List, Set
+import warnings
+from typing import Callable, Dict, FrozenSet, Set
 
 import numpy as np
 
-from sc2.position import Point2
+from sc2.position import Point2, PointArray
+
+with warnings.catch_warnings():
+    warnings.simplefilter("ignore")
+    from scipy.ndimage import label
 
 
 class PixelMap:
@@ -69,36 +74,43 @@ class PixelMap:
     def copy(self):
         return PixelMap(self._proto, in_bits=self._in_bits, mirrored=self._mirrored)
 
-    def flood_fill(self, start_point: Point2, pred: Callable[[int], bool]) -> Set[Point2]:
-        nodes: Set[Point2] = set()
-        queue: List[Point2] = [start_point]
+    def _pred_mask(self, pred: Callable[[int], bool]) -> np.ndarray:
+        """ Boolean array of the pixels whose value fulfills pred, pred is only called once per distinct value. """
+        values = np.unique(self.data_numpy)
+        return np.isin(self.data_numpy, [value for value in values.tolist() if pred(value)])
 
-        while queue:
-            x, y = queue.pop()
+    def _labels(self, pred: Callable[[int], bool]) -> np.ndarray:
+        """ Labels the 8-connected areas of pixels that fulfill pred with 1, 2, ..., the other pixels with 0. """
+        labels, _ = label(self._pred_mask(pred), structure=np.ones((3, 3), dtype=bool))
+        return labels
 
-            if not (0 <= x < self.width and 0 <= y < self.height):
-                continue
+    @staticmethod
+    def _points_of(mask: np.ndarray) -> Set[Point2]:
+        y, x = np.nonzero(mask)
+        return set(PointArray(np.column_stack((x, y))))
 
-            if Point2((x, y)) in nodes:
-                continue
+    def flood_fill(self, start_point: Point2, pred: Callable[[int], bool]) -> Set[Point2]:
+        """Returns all points that are 8-connected to start_point over pixels that fulfill pred, including start_point.
 
-            if pred(self[x, y]):
-                nodes.add(Point2((x, y)))
-                queue += [Point2((x + a, y + b)) for a in [-1, 0, 1] for b in [-1, 0, 1] if not (a == 0 and b == 0)]
-        return nodes
+        :param start_point:
+        :param pred:"""
+        x, y = start_point
+        if not (0 <= x < self.width and 0 <= y < self.height) or not pred(self[x, y]):
+            return set()
+        labels = self._labels(pred)
+        return self._points_of(labels == labels[y, x])
 
     def flood_fill_all(self, pred: Callable[[int], bool]) -> Set[FrozenSet[Point2]]:
-        groups: Set[FrozenSet[Point2]] = set()
-
-        for x in range(self.width):
-            for y in range(self.height):
-                if any((x, y) in g for g in groups):
-                    continue
-
-                if pred(self[x, y]):
-                    groups.add(frozenset(self.flood_fill(Point2((x, y)), pred)))
-
-        return groups
+        """Returns the points of all 8-connected areas of pixels that fulfill pred.
+
+        :param pred:"""
+        labels = self._labels(pred)
+        labels_of_points = labels[labels > 0]
+        y, x = np.nonzero(labels)
+        groups: Dict[int, Set[Point2]] = {}
+        for area, point in zip(labels_of_points.tolist(), PointArray(np.column_stack((x, y)))):
+            groups.setdefault(area, set()).add(point)
+        return {frozenset(points) for points in groups.values()}
 
     def print(self, wide=False):
         for y in range(self.height):
@@ -3,8 +3,9 @@ from __future__ import annotations
 import itertools
 import math
 import random
-from typing import TYPE_CHECKING, Iterable, List, Set, Tuple, Union
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Set, Tuple, Union
 
+import numpy as np
 from s2clientprotocol import common_pb2 as common_pb
 
 if TYPE_CHECKING:
@@ -421,3 +422,124 @@ class Rect(tuple):
 
     def offset(self, p):
         return self.__class__((self[0] + p[0], self[1] + p[1], self[2], self[3]))
+
+
+class PointArray:
+    """Many 2d points as one (n, 2) numpy array, for code that creates or compares thousands of points.
+    The methods work on all points at once, Point2 objects are only created when single points are read,
+    e.g. with points[i], iter(points) or points.closest(p).
+
+    Example::
+
+        positions = PointArray.from_offsets(pylon.position, [(x, y) for x in range(-3, 4) for y in range(-3, 4)])
+        positions = positions[positions.distance_to(self.start_location) > 10]
+        closest = positions.closest(self.start_location)"""
+
+    __slots__ = ("array", )
+
+    def __init__(self, points: Union[np.ndarray, Iterable[Tuple[float, float]]]):
+        """
+        :param points: (n, 2) array or points, integer arrays keep their dtype
+        """
+        array = points if isinstance(points, np.ndarray) else np.array([tuple(p[:2]) for p in points], dtype=float)
+        if array.dtype.kind not in "iuf":
+            array = array.astype(float)
+        self.array: np.ndarray = array.reshape(-1, 2)
+
+    @classmethod
+    def from_offsets(cls, center: Union[Unit, Point2], offsets: Union[np.ndarray, Iterable[Tuple[float, float]]]) -> PointArray:
+        """
+        :param center:
+        :param offsets:"""
+        return cls(offsets).offset(center.position)
+
+    def __len__(self) -> int:
+        return len(self.array)
+
+    def __bool__(self) -> bool:
+        return len(self.array) > 0
+
+    def __iter__(self) -> Iterator[Point2]:
+        return (Point2(point) for point in self.array.tolist())
+
+    def __getitem__(self, index) -> Union[Point2, PointArray]:
+        """ An integer returns a Point2, a slice, boolean mask or array of indices returns a PointArray. """
+        if isinstance(index, (int, np.integer)):
+            return Point2(self.array[index].tolist())
+        return PointArray(self.array[index])
+
+    def __repr__(self) -> str:
+        return f"PointArray({self.array.tolist()})"
+
+    @property
+    def x(self) -> np.ndarray:
+        return self.array[:, 0]
+
+    @property
+    def y(self) -> np.ndarray:
+        return self.array[:, 1]
+
+    def to_points(self) -> List[Point2]:
+        return list(self)
+
+    def offset(self, p: Union[Point2, Tuple[float, float], PointArray]) -> PointArray:
+        """Adds the point to all points, or a PointArray of the same length point by point.
+
+        :param p:"""
+        return PointArray(self.array + (p.array if isinstance(p, PointArray) else np.asarray(p[:2])))
+
+    def towards(self, p: Union[Unit, Point2], distance: Union[int, float] = 1, limit: bool = False) -> PointArray:
+        """Moves all points towards p like Point2.towards, points that are equal to p stay where they are.
+
+        :param p:
+        :param distance:
+        :param limit:"""
+        difference = np.asarray(p.position[:2], dtype=float) - self.array
+        lengths = np.hypot(difference[:, 0], difference[:, 1])
+        is_moved = (np.abs(difference) > EPSILON).any(axis=1)
+        distances = np.minimum(lengths, distance) if limit else np.full(len(self.array), distance, dtype=float)
+        factors = np.divide(distances, lengths, out=np.zeros(len(self.array)), where=is_moved)
+        return PointArray(self.array + difference * factors[:, None])
+
+    def distance_to(self, p: Union[Unit, Point2]) -> np.ndarray:
+        """Returns the distance of each point to p.
+
+        :param p:"""
+        difference = self.array - p.position[:2]
+        return np.hypot(difference[:, 0], difference[:, 1])
+
+    def distance_matrix(self, other: Union[PointArray, Iterable[Union[Unit, Point2]]]) -> np.ndarray:
+        """Returns the distances of all points to all other points as array of shape (len(self), len(other)).
+
+        :param other: PointArray, Units or points"""
+        if not isinstance(other, PointArray):
+            other = PointArray([p.position for p in other])
+        difference = self.array[:, None, :] - other.array[None, :, :]
+        return np.hypot(difference[..., 0], difference[..., 1])
+
+    @property
+    def rounded(self) -> PointArray:
+        """ Rounds all points down like Point2.rounded, as integer array. """
+        return PointArray(np.floor(self.array).astype(int))
+
+    def closest(self, p: Union[Unit, Point2]) -> Point2:
+        """
+        :param p:"""
+        assert self, "PointArray is empty"
+        return self[int(np.argmin(self.distance_to(p)))]
+
+    def furthest(self, p: Union[Unit, Point2]) -> Point2:
+        """
+        :param p:"""
+        assert self, "PointArray is empty"
+        return self[int(np.argmax(self.distance_to(p)))]
+
+    def is_in(self, points: Iterable[Point2]) -> np.ndarray:
+        """Returns a boolean array of the points that are equal to any of the given points, with the tolerance of Point2.__eq__
+
+        :param points:"""
+        other = PointArray(points)
+        if not other:
+            return np.zeros(len(self.array), dtype=bool)
+        difference = np.abs(self.array[:, None, :] - other.array[None, :, :])
+        return (difference <= EPSILON).all(axis=2).any(axis=1)
@@ -1,6 +1,10 @@
 import asyncio
+import csv
 import sys
+import time
+from collections import deque
 from contextlib import suppress
+from typing import Deque, List, NamedTuple, Optional
 
 from aiohttp import ClientWebSocketResponse
 from loguru import logger
@@ -20,6 +24,14 @@ class ConnectionAlreadyClosed(ProtocolError):
     pass
 
 
+class TraceEntry(NamedTuple):
+    """ One request/response pair recorded by Protocol when tracing is enabled. """
+    request_type: str
+    request_bytes: int
+    response_bytes: int
+    latency: float
+
+
 class Protocol:
 
     def __init__(self, ws):
@@ -30,15 +42,52 @@ class Protocol:
         assert ws
         self._ws: ClientWebSocketResponse = ws
         self._status: Status = None
+        # Ring buffer of the most recent requests, None while tracing is disabled, see enable_tracing()
+        self._trace: Optional[Deque[TraceEntry]] = None
+
+    def enable_tracing(self, max_entries: int = 10000):
+        """Starts recording request type, request and response size in bytes and latency of every request.
+        Only the latest 'max_entries' requests are kept. While tracing is disabled, no trace work is done at all.
+
+        :param max_entries:"""
+        self._trace = deque(self._trace or (), maxlen=max_entries)
+
+    def disable_tracing(self):
+        self._trace = None
+
+    @property
+    def trace(self) -> List[TraceEntry]:
+        """ Returns the recorded trace entries, oldest first. """
+        return list(self._trace) if self._trace is not None else []
+
+    def dump_trace(self, path: str):
+        """Writes the recorded trace entries as csv file to 'path'.
+
+        :param path:"""
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(TraceEntry._fields)
+            writer.writerows(self.trace)
+        logger.info(f"Saved protocol trace to {path}")
+
+    def _records_requests(self) -> bool:
+        """ Returns True if requests need to be timed and passed to _record_request. """
+        return self._trace is not None
+
+    def _record_request(self, request: sc_pb.Request, request_bytes: int, response_bytes: int, latency: float):
+        if self._trace is not None:
+            self._trace.append(TraceEntry(request.WhichOneof("request"), request_bytes, response_bytes, latency))
 
     async def __request(self, request):
-        logger.debug(f"Sending request: {request !r}")
+        request_bytes = request.SerializeToString()
+        measure = self._records_requests()
+        if measure:
+            start_time = time.perf_counter()
         try:
-            await self._ws.send_bytes(request.SerializeToString())
+            await self._ws.send_bytes(request_bytes)
         except TypeError as exc:
             logger.exception("Cannot send: Connection already closed.")
             raise ConnectionAlreadyClosed("Connection already closed.") from exc
-        logger.debug("Request sent")
 
         response = sc_pb.Response()
         try:
@@ -58,26 +107,99 @@ class Protocol:
                 sys.exit(2)
             raise
 
+        if measure:
+            self._record_request(request, len(request_bytes), len(response_bytes), time.perf_counter() - start_time)
         response.ParseFromString(response_bytes)
-        logger.debug("Response received")
         return response
 
-    async def _execute(self, **kwargs):
-        assert len(kwargs) == 1, "Only one request allowed by the API"
+    async def __request_pipelined(self, requests: List[sc_pb.Request]) -> List[sc_pb.Response]:
+        """Writes all requests back to back before reading any response. SC2 answers requests in order,
+        so the n-th response belongs to the n-th request."""
+        # Number of requests that were sent but whose response was not received yet
+        pending = 0
+        responses = []
+        measure = self._records_requests()
+        if measure:
+            request_sizes = []
+            start_time = time.perf_counter()
+        try:
+            for request in requests:
+                request_bytes = request.SerializeToString()
+                try:
+                    await self._ws.send_bytes(request_bytes)
+                except TypeError as exc:
+                    logger.exception("Cannot send: Connection already closed.")
+                    raise ConnectionAlreadyClosed("Connection already closed.") from exc
+                pending += 1
+                if measure:
+                    request_sizes.append(len(request_bytes))
+
+            while pending:
+                try:
+                    response_bytes = await self._ws.receive_bytes()
+                except TypeError as exc:
+                    if self._status == Status.ended:
+                        logger.info("Cannot receive: Game has already ended.")
+                        raise ConnectionAlreadyClosed("Game has already ended") from exc
+                    logger.error("Cannot receive: Connection already closed.")
+                    raise ConnectionAlreadyClosed("Connection already closed.") from exc
+                pending -= 1
+                if measure:
+                    # Latency of a pipelined request is measured from the start of the burst until its response arrived
+                    index = len(responses)
+                    self._record_request(
+                        requests[index], request_sizes[index], len(response_bytes), time.perf_counter() - start_time
+                    )
+                response = sc_pb.Response()
+                response.ParseFromString(response_bytes)
+                responses.append(response)
+        except asyncio.CancelledError:
+            # Every request that was sent must have its response received before reraising cancel
+            try:
+                for _ in range(pending):
+                    await self._ws.receive_bytes()
+            except asyncio.CancelledError:
+                logger.critical("Requests must not be cancelled multiple times")
+                sys.exit(2)
+            raise
 
-        response = await self.__request(sc_pb.Request(**kwargs))
+        return responses
 
+    def _update_status(self, response: sc_pb.Response):
         new_status = Status(response.status)
         if new_status != self._status:
             logger.info(f"Client status changed to {new_status} (was {self._status})")
         self._status = new_status
 
+    async def _execute(self, **kwargs):
+        assert len(kwargs) == 1, "Only one request allowed by the API"
+
+        response = await self.__request(sc_pb.Request(**kwargs))
+
+        self._update_status(response)
+
         if response.error:
             logger.debug(f"Response contained an error: {response.error}")
             raise ProtocolError(f"{response.error}")
 
         return response
 
+    async def _execute_pipelined(self, requests: List[sc_pb.Request]) -> List[sc_pb.Response]:
+        """Sends all requests in one burst and returns their responses in the same order.
+        Unlike _execute, errors are not raised here, the caller has to check 'response.error' of each response.
+
+        :param requests:"""
+        assert requests, "At least one request is required"
+
+        responses = await self.__request_pipelined(requests)
+
+        for response in responses:
+            self._update_status(response)
+            if response.error:
+                logger.debug(f"Response contained an error: {response.error}")
+
+        return responses
+
     async def ping(self):
         result = await self._execute(ping=sc_pb.RequestPing())
         return result
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+from bisect import bisect_left
+from typing import Dict, List, Union
+
+from s2clientprotocol import sc2api_pb2 as sc_pb
+
+
+def request_kind(request: sc_pb.Request) -> str:
+    """Returns the name the request is counted under in Client.request_stats, e.g. 'observation', 'step', 'action',
+    'query_pathing', 'query_placement', 'query_abilities', 'debug' or 'game_info'.
+    Queries that were merged by Client._query and contain more than one kind of query are counted as 'query_batch'.
+    Other requests are counted under the name of their request field."""
+    kind = request.WhichOneof("request")
+    if kind == "query":
+        query = request.query
+        if (len(query.pathing) > 0) + (len(query.placements) > 0) + (len(query.abilities) > 0) > 1:
+            return "query_batch"
+        if query.pathing:
+            return "query_pathing"
+        if query.placements:
+            return "query_placement"
+        if query.abilities:
+            return "query_abilities"
+    return kind
+
+
+class RequestStats:
+    """ Latency histogram and byte counters of one kind of request. """
+
+    # Upper bounds of the latency buckets in seconds, the last bucket collects all slower requests
+    BUCKET_BOUNDS = (0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0)
+
+    __slots__ = ("count", "total_latency", "max_latency", "request_bytes", "response_bytes", "histogram")
+
+    def __init__(self):
+        self.count: int = 0
+        self.total_latency: float = 0
+        self.max_latency: float = 0
+        self.request_bytes: int = 0
+        self.response_bytes: int = 0
+        self.histogram: List[int] = [0] * (len(self.BUCKET_BOUNDS) + 1)
+
+    def add(self, latency: float, request_bytes: int, response_bytes: int):
+        self.count += 1
+        self.total_latency += latency
+        if latency > self.max_latency:
+            self.max_latency = latency
+        self.request_bytes += request_bytes
+        self.response_bytes += response_bytes
+        self.histogram[bisect_left(self.BUCKET_BOUNDS, latency)] += 1
+
+    @property
+    def mean_latency(self) -> float:
+        return self.total_latency / self.count if self.count else 0
+
+    def percentile(self, q: float) -> float:
+        """Returns an upper bound of the q-th latency percentile (0 < q <= 100) from the histogram buckets.
+        Requests in the last bucket are bounded by the slowest request seen.
+
+        :param q:"""
+        if not self.count:
+            return 0
+        needed = q / 100 * self.count
+        seen = 0
+        for bound, amount in zip(self.BUCKET_BOUNDS, self.histogram):
+            seen += amount
+            if seen >= needed:
+                return min(bound, self.max_latency)
+        return self.max_latency
+
+    def to_dict(self) -> Dict[str, Union[int, float, Dict[str, int]]]:
+        bucket_names = [f"<={bound * 1000:g}ms" for bound in self.BUCKET_BOUNDS]
+        bucket_names.append(f">{self.BUCKET_BOUNDS[-1] * 1000:g}ms")
+        return {
+            "count": self.count,
+            "total_latency": self.total_latency,
+            "mean_latency": self.mean_latency,
+            "p50_latency": self.percentile(50),
+            "p95_latency": self.percentile(95),
+            "max_latency": self.max_latency,
+            "request_bytes": self.request_bytes,
+            "response_bytes": self.response_bytes,
+            "histogram": dict(zip(bucket_names, self.histogram)),
+        }
+
+    def __repr__(self) -> str:
+        return (
+            f"RequestStats(count={self.count}, mean={self.mean_latency * 1000:.2f}ms, "
+            f"max={self.max_latency * 1000:.2f}ms, sent={self.request_bytes}B, received={self.response_bytes}B)"
+        )
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import warnings
+from itertools import chain
+from typing import TYPE_CHECKING, Sequence, Tuple
+
+import numpy as np
+
+with warnings.catch_warnings():
+    warnings.simplefilter("ignore")
+    from scipy.spatial import cKDTree
+
+if TYPE_CHECKING:
+    from sc2.unit import Unit
+
+
+def _signed_square(distance: float) -> float:
+    """ Squares the distance but keeps its sign, so comparing squared distances against a negative distance stays always true. """
+    return distance * abs(distance)
+
+
+class SpatialIndex:
+    """KD-tree over the positions of the units of one Units object, built by Units once it is queried repeatedly in a frame.
+    The queries return rows, i.e. indices into the Units object, in ascending order so results keep the order of the Units object.
+
+    The KD-tree only finds candidates, the results are decided on the squared distances like the linear scans in units.py."""
+
+    def __init__(self, units: Sequence[Unit], game_loop: int):
+        """
+        :param units:
+        :param game_loop: frame in which the positions of the units were read
+        """
+        self.game_loop: int = game_loop
+        self.size: int = len(units)
+        flat_positions = (coord for unit in units for coord in unit.position_tuple)
+        self.positions: np.ndarray = np.fromiter(flat_positions, dtype=float, count=2 * self.size).reshape((self.size, 2))
+        self.tree = cKDTree(self.positions)
+
+    def is_valid_for(self, units: Sequence[Unit], game_loop: int) -> bool:
+        """Returns False if the index was built in another frame or the Units object changed its size since.
+
+        :param units:
+        :param game_loop:"""
+        return self.game_loop == game_loop and self.size == len(units)
+
+    def distances_squared(self, point: Tuple[float, float], rows: np.ndarray = None) -> np.ndarray:
+        """Returns the squared distances of all units, or of the units in the given rows, to the point.
+
+        :param point:
+        :param rows:"""
+        positions = self.positions if rows is None else self.positions[rows]
+        difference = positions - point
+        return np.einsum("ij,ij->i", difference, difference)
+
+    def _candidates(self, point: Tuple[float, float], distance: float) -> np.ndarray:
+        """ Rows of the units that are at most 'distance' away from point. """
+        return np.array(self.tree.query_ball_point(point, distance, return_sorted=True), dtype=np.intp)
+
+    def rows_closer_than(self, point: Tuple[float, float], distance: float) -> np.ndarray:
+        """
+        :param point:
+        :param distance:"""
+        if distance <= 0:
+            return np.empty(0, dtype=np.intp)
+        rows = self._candidates(point, distance)
+        return rows[self.distances_squared(point, rows) < distance**2]
+
+    def rows_further_than(self, point: Tuple[float, float], distance: float) -> np.ndarray:
+        """
+        :param point:
+        :param distance:"""
+        return np.flatnonzero(_signed_square(distance) < self.distances_squared(point))
+
+    def rows_in_distance_between(self, point: Tuple[float, float], distance1: float, distance2: float) -> np.ndarray:
+        """
+        :param point:
+        :param distance1:
+        :param distance2:"""
+        if distance2 <= 0:
+            return np.empty(0, dtype=np.intp)
+        rows = self._candidates(point, distance2)
+        distances_squared = self.distances_squared(point, rows)
+        return rows[(_signed_square(distance1) < distances_squared) & (distances_squared < distance2**2)]
+
+    def closest_row(self, point: Tuple[float, float]) -> int:
+        """
+        :param point:"""
+        _, row = self.tree.query(point)
+        return int(row)
+
+    def closest_distance(self, point: Tuple[float, float]) -> float:
+        """
+        :param point:"""
+        distance, _ = self.tree.query(point)
+        return float(distance)
+
+    def furthest_row(self, point: Tuple[float, float]) -> int:
+        """
+        :param point:"""
+        return int(np.argmax(self.distances_squared(point)))
+
+    def pairs_closer_than(self, other: SpatialIndex, distance: float) -> np.ndarray:
+        """Returns all pairs (i, j) of a row i of this index and a row j of the other index whose units are closer than 'distance',
+        as array of shape (k, 2) sorted by i and then by j.
+
+        :param other:
+        :param distance:"""
+        if distance <= 0 or not self.size or not other.size:
+            return np.empty((0, 2), dtype=np.intp)
+        candidates = self.tree.query_ball_tree(other.tree, distance)
+        counts = np.fromiter(map(len, candidates), dtype=np.intp, count=self.size)
+        rows = np.repeat(np.arange(self.size), counts)
+        other_rows = np.fromiter(chain.from_iterable(map(sorted, candidates)), dtype=np.intp, count=counts.sum())
+        difference = self.positions[rows] - other.positions[other_rows]
+        is_closer = np.einsum("ij,ij->i", difference, difference) < distance**2
+        return np.column_stack((rows[is_closer], other_rows[is_closer]))
+
+    def closest_pair(self, other: SpatialIndex) -> Tuple[int, int, float]:
+        """Returns the row i of this index, the row j of the other index and the distance of the two closest units.
+
+        :param other:"""
+        distances, other_rows = other.tree.query(self.positions)
+        row = int(np.argmin(distances))
+        return row, int(other_rows[row]), float(distances[row])
@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Dict, FrozenSet, Iterable, Optional, Tuple
+
+import numpy as np
+
+from sc2.constants import (
+    IS_MINE,
+    OFF_CREEP_SPEED_INCREASE_DICT,
+    OFF_CREEP_SPEED_UPGRADE_DICT,
+    SPEED_ALTERING_BUFFS,
+    SPEED_INCREASE_DICT,
+    SPEED_INCREASE_ON_CREEP_DICT,
+    SPEED_UPGRADE_DICT,
+)
+from sc2.ids.buff_id import BuffId
+from sc2.ids.unit_typeid import UnitTypeId
+from sc2.ids.upgrade_id import UpgradeId
+
+if TYPE_CHECKING:
+    from sc2.game_state import GameState
+    from sc2.unit import Unit
+    from sc2.units import Units
+
+# Types whose speed depends on creep
+CREEP_SPEED_TYPES: FrozenSet[UnitTypeId] = frozenset(SPEED_INCREASE_ON_CREEP_DICT) | frozenset(OFF_CREEP_SPEED_UPGRADE_DICT)
+# Types whose speed depends on upgrades
+UPGRADE_SPEED_TYPES: FrozenSet[UnitTypeId] = frozenset(SPEED_UPGRADE_DICT) | frozenset(OFF_CREEP_SPEED_UPGRADE_DICT)
+# Types whose speed without buffs is not their movement speed
+MODIFIED_SPEED_TYPES: FrozenSet[UnitTypeId] = CREEP_SPEED_TYPES | UPGRADE_SPEED_TYPES
+# Buffs that change the movement speed, all other buffs are not part of the key
+SPEED_BUFFS: FrozenSet[BuffId] = frozenset(SPEED_ALTERING_BUFFS) | {
+    BuffId.MEDIVACSPEEDBOOST, BuffId.VOIDRAYSWARMDAMAGEBOOST
+}
+NO_BUFFS: FrozenSet[BuffId] = frozenset()
+
+# (unit type, upgrades or None, speed altering buffs, on creep)
+SpeedKey = Tuple[UnitTypeId, Optional[FrozenSet[UpgradeId]], FrozenSet[BuffId], bool]
+
+
+def calculate_speed(
+    unit_type: UnitTypeId, movement_speed: float, upgrades: Optional[FrozenSet[UpgradeId]], buffs: FrozenSet[BuffId],
+    on_creep: bool
+) -> float:
+    """Movement speed of a unit type including buffs and upgrades, see Unit.calculate_speed
+
+    :param unit_type:
+    :param movement_speed: movement speed of the type
+    :param upgrades:
+    :param buffs:
+    :param on_creep:"""
+    speed: float = movement_speed
+
+    # ---- Upgrades ----
+    if upgrades and unit_type in SPEED_UPGRADE_DICT:
+        upgrade_id: Optional[UpgradeId] = SPEED_UPGRADE_DICT.get(unit_type, None)
+        if upgrade_id and upgrade_id in upgrades:
+            speed *= SPEED_INCREASE_DICT.get(unit_type, 1)
+
+    # ---- Creep ----
+    if unit_type in CREEP_SPEED_TYPES:
+        if on_creep:
+            speed *= SPEED_INCREASE_ON_CREEP_DICT.get(unit_type, 1)
+
+        # Off creep upgrades
+        elif upgrades:
+            upgrade_id2: Optional[UpgradeId] = OFF_CREEP_SPEED_UPGRADE_DICT.get(unit_type, None)
+            if upgrade_id2:
+                speed *= OFF_CREEP_SPEED_INCREASE_DICT[unit_type]
+
+        # Ultralisk has passive ability "Frenzied" which makes it immune to speed altering buffs
+        if unit_type == UnitTypeId.ULTRALISK:
+            return speed
+
+    # ---- Buffs ----
+    # Hard reset movement speed: medivac boost, void ray charge
+    if buffs and unit_type in {UnitTypeId.MEDIVAC, UnitTypeId.VOIDRAY}:
+        if BuffId.MEDIVACSPEEDBOOST in buffs:
+            speed = movement_speed * 1.7
+        elif BuffId.VOIDRAYSWARMDAMAGEBOOST in buffs:
+            speed = movement_speed * 0.75
+
+    # Speed altering buffs, e.g. stimpack, zealot charge, concussive shell, time warp, fungal growth, inhibitor zone
+    for buff in buffs:
+        speed *= SPEED_ALTERING_BUFFS.get(buff, 1)
+    return speed
+
+
+class SpeedModel:
+    """Memoizes the movement speed of units by their type, upgrades, speed altering buffs and whether they are on creep.
+    The speeds are kept over frames and only cleared when the upgrades of the bot change."""
+
+    def __init__(self):
+        self._speeds: Dict[SpeedKey, float] = {}
+        self._state: Optional[GameState] = None
+        self._upgrade_ids: FrozenSet[int] = frozenset()
+        self._upgrades: FrozenSet[UpgradeId] = frozenset()
+
+    def _own_upgrades(self, state: GameState) -> FrozenSet[UpgradeId]:
+        """ The upgrades of the bot, compared once per game state with the upgrades the speeds were calculated with. """
+        if state is not self._state:
+            self._state = state
+            upgrade_ids = frozenset(state.observation_raw.player.upgrade_ids)
+            if upgrade_ids != self._upgrade_ids:
+                self._upgrade_ids = upgrade_ids
+                self._upgrades = frozenset(state.upgrades)
+                self._speeds.clear()
+        return self._upgrades
+
+    def _upgrades_of(self, state: GameState, is_mine: bool,
+                     upgrades: Optional[Iterable[UpgradeId]]) -> Optional[FrozenSet[UpgradeId]]:
+        if upgrades is None:
+            upgrades = self._own_upgrades(state) if is_mine else None
+        elif not isinstance(upgrades, frozenset):
+            upgrades = frozenset(upgrades)
+        return upgrades or None
+
+    def _speed(self, key: SpeedKey, movement_speed: float) -> float:
+        speed = self._speeds.get(key, None)
+        if speed is None:
+            unit_type, upgrades, buffs, on_creep = key
+            speed = self._speeds[key] = calculate_speed(unit_type, movement_speed, upgrades, buffs, on_creep)
+        return speed
+
+    def speed(self, unit: Unit, upgrades: Optional[Iterable[UpgradeId]] = None) -> float:
+        """Returns the same value as Unit.calculate_speed.
+
+        :param unit:
+        :param upgrades: upgrades to use instead of the bot's upgrades, which only apply to own units"""
+        unit_type = unit.type_id
+        buffs = unit.buffs
+        if buffs:
+            buffs = SPEED_BUFFS & buffs
+        if not buffs and unit_type not in MODIFIED_SPEED_TYPES:
+            return unit.movement_speed
+        state = unit._bot_object.state
+        on_creep = False
+        if unit_type in CREEP_SPEED_TYPES:
+            x, y = unit.position_tuple
+            on_creep = bool(state.creep[(int(x), int(y))])
+        if unit_type in UPGRADE_SPEED_TYPES:
+            upgrades = self._upgrades_of(state, unit.is_mine, upgrades)
+        else:
+            upgrades = None
+        return self._speed((unit_type, upgrades, buffs, on_creep), unit.movement_speed)
+
+    def speeds(self, units: Units, upgrades: Optional[Iterable[UpgradeId]] = None) -> np.ndarray:
+        """Returns the speed of each unit like Unit.calculate_speed. The speed of units without buffs is looked up
+        once per type, ownership and creep, the creep is read for all units at once.
+
+        :param units:
+        :param upgrades: upgrades to use instead of the bot's upgrades, which only apply to own units"""
+        if not units:
+            return np.zeros(0)
+        bot = units._bot_object
+        state = bot.state
+        table, rows = units._table_rows()
+        type_values = table.type_id[rows]
+        is_mine = table.alliance[rows] == IS_MINE
+        if upgrades is not None:
+            # The given upgrades apply to all units, so ownership does not change the speed
+            is_mine[:] = False
+        creep_types = np.fromiter((unit_type.value for unit_type in CREEP_SPEED_TYPES), dtype=np.int32)
+        has_creep_speed = np.isin(type_values, creep_types)
+        on_creep = np.zeros(len(rows), dtype=bool)
+        if has_creep_speed.any():
+            creep_rows = rows[has_creep_speed]
+            x, y = table.x[creep_rows].astype(int), table.y[creep_rows].astype(int)
+            on_creep[has_creep_speed] = state.creep.data_numpy[y, x] != 0
+
+        keys, inverse = np.unique(
+            type_values.astype(np.int64) * 4 + is_mine * 2 + on_creep, return_inverse=True
+        )
+        movement_speed = bot.game_data.unit_type_table.movement_speed
+        speeds = np.empty(len(keys))
+        for index, key in enumerate(keys.tolist()):
+            type_value, key_is_mine, key_on_creep = key >> 2, bool(key & 2), bool(key & 1)
+            unit_type = UnitTypeId(type_value)
+            if unit_type not in MODIFIED_SPEED_TYPES:
+                speeds[index] = movement_speed[type_value]
+                continue
+            unit_upgrades = self._upgrades_of(state, key_is_mine, upgrades) if unit_type in UPGRADE_SPEED_TYPES else None
+            speeds[index] = self._speed((unit_type, unit_upgrades, NO_BUFFS, key_on_creep), movement_speed[type_value])
+        result = speeds[inverse.reshape(-1)]
+
+        for index, unit in enumerate(units):
+            if unit.buffs:
+                result[index] = self.speed(unit, upgrades)
+        return result
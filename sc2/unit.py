@@ -6,6 +6,8 @@ import warnings
 from functools import cached_property
 from typing import TYPE_CHECKING, Any, FrozenSet, List, Optional, Set, Tuple, Union
 
+import numpy as np
+
 from sc2.constants import (
     CAN_BE_ATTACKED,
     DAMAGE_BONUS_PER_UPGRADE,
@@ -34,19 +36,11 @@ from sc2.constants import (
     IS_SNAPSHOT,
     IS_STRUCTURE,
     IS_VISIBLE,
-    OFF_CREEP_SPEED_INCREASE_DICT,
-    OFF_CREEP_SPEED_UPGRADE_DICT,
-    SPEED_ALTERING_BUFFS,
-    SPEED_INCREASE_DICT,
-    SPEED_INCREASE_ON_CREEP_DICT,
-    SPEED_UPGRADE_DICT,
     TARGET_AIR,
     TARGET_BOTH,
     TARGET_GROUND,
     TARGET_HELPER,
-    UNIT_BATTLECRUISER,
     UNIT_COLOSSUS,
-    UNIT_ORACLE,
     UNIT_PHOTONCANNON,
     transforming,
 )
@@ -57,6 +51,8 @@ from sc2.ids.unit_typeid import UnitTypeId
 from sc2.ids.upgrade_id import UpgradeId
 from sc2.position import Point2, Point3
 from sc2.unit_command import UnitCommand
+from sc2.unit_table import UnitTable
+from sc2.unit_type_table import UnitTypeTable
 
 if TYPE_CHECKING:
     from sc2.bot_ai import BotAI
@@ -91,10 +87,20 @@ class UnitOrder:
 # pylint: disable=R0904
 class Unit:
 
-    def __init__(self, proto_data, bot_object: BotAI, distance_calculation_index: int = -1, base_build: int = -1):
+    def __init__(
+        self,
+        proto_data,
+        bot_object: BotAI,
+        distance_calculation_index: int = -1,
+        base_build: int = -1,
+        unit_table: UnitTable = None,
+    ):
         """
         :param proto_data:
         :param bot_object:
+        :param distance_calculation_index:
+        :param base_build:
+        :param unit_table: table of the frame this unit belongs to, its row is 'distance_calculation_index'
         """
         self._proto = proto_data
         self._bot_object: BotAI = bot_object
@@ -102,11 +108,44 @@ class Unit:
         self.base_build = base_build
         # Index used in the 2D numpy array to access the 2D distance between two units
         self.distance_calculation_index: int = distance_calculation_index
+        # Row of this unit in the unit table of its frame, units created outside of _prepare_units get their own table
+        if unit_table is None:
+            unit_table = UnitTable((proto_data, ))
+            self._row: int = 0
+        else:
+            self._row: int = distance_calculation_index
+        self._table: UnitTable = unit_table
+
+    def _rebind(self, proto_data, distance_calculation_index: int, unit_table: UnitTable):
+        """Updates this unit object to the proto of the current frame. Used by BotAIInternal._prepare_units if 'reuse_unit_objects' is set.
+        Cached properties that only depend on the unit type are kept, unless the unit changed its type.
+
+        :param proto_data:
+        :param distance_calculation_index:
+        :param unit_table:"""
+        cache = self.__dict__
+        if proto_data.unit_type == self._proto.unit_type:
+            for name in cache.keys() & FRAME_CACHED_PROPERTIES:
+                del cache[name]
+        else:
+            for name in cache.keys() & (FRAME_CACHED_PROPERTIES | TYPE_CACHED_PROPERTIES):
+                del cache[name]
+        self._proto = proto_data
+        self.game_loop = self._bot_object.state.game_loop
+        self.distance_calculation_index = distance_calculation_index
+        self._row = distance_calculation_index
+        self._table = unit_table
 
     def __repr__(self) -> str:
         """ Returns string of this form: Unit(name='SCV', tag=4396941328). """
         return f"Unit(name={self.name !r}, tag={self.tag})"
 
+    @property
+    def row(self) -> np.void:
+        """Returns the row of this unit in the unit table of its frame as numpy record, e.g. unit.row["health"]
+        The table holds the same values as the unit properties as numpy columns, see unit_table.py"""
+        return self._table.data[self._row]
+
     @cached_property
     def type_id(self) -> UnitTypeId:
         """UnitTypeId found in sc2/ids/unit_typeid.
@@ -121,6 +160,16 @@ class Unit:
         """ Provides the unit type data. """
         return self._bot_object.game_data.units[self._proto.unit_type]
 
+    @cached_property
+    def _type_table(self) -> UnitTypeTable:
+        """ Provides the static data of all unit types as numpy arrays, see unit_type_table.py """
+        return self._bot_object.game_data.unit_type_table
+
+    @cached_property
+    def _type_attributes(self) -> int:
+        """ Provides the attributes of the unit type as bits, '1 << attribute' is set for each attribute. """
+        return int(self._type_table.attributes[self._proto.unit_type])
+
     @cached_property
     def _creation_ability(self) -> AbilityData:
         """ Provides the AbilityData of the creation ability of this unit. """
@@ -144,37 +193,37 @@ class Unit:
     @property
     def is_structure(self) -> bool:
         """ Checks if the unit is a structure. """
-        return IS_STRUCTURE in self._type_data.attributes
+        return bool(self._type_attributes & 1 << IS_STRUCTURE)
 
     @property
     def is_light(self) -> bool:
         """ Checks if the unit has the 'light' attribute. """
-        return IS_LIGHT in self._type_data.attributes
+        return bool(self._type_attributes & 1 << IS_LIGHT)
 
     @property
     def is_armored(self) -> bool:
         """ Checks if the unit has the 'armored' attribute. """
-        return IS_ARMORED in self._type_data.attributes
+        return bool(self._type_attributes & 1 << IS_ARMORED)
 
     @property
     def is_biological(self) -> bool:
         """ Checks if the unit has the 'biological' attribute. """
-        return IS_BIOLOGICAL in self._type_data.attributes
+        return bool(self._type_attributes & 1 << IS_BIOLOGICAL)
 
     @property
     def is_mechanical(self) -> bool:
         """ Checks if the unit has the 'mechanical' attribute. """
-        return IS_MECHANICAL in self._type_data.attributes
+        return bool(self._type_attributes & 1 << IS_MECHANICAL)
 
     @property
     def is_massive(self) -> bool:
         """ Checks if the unit has the 'massive' attribute. """
-        return IS_MASSIVE in self._type_data.attributes
+        return bool(self._type_attributes & 1 << IS_MASSIVE)
 
     @property
     def is_psionic(self) -> bool:
         """ Checks if the unit has the 'psionic' attribute. """
-        return IS_PSIONIC in self._type_data.attributes
+        return bool(self._type_attributes & 1 << IS_PSIONIC)
 
     @cached_property
     def tech_alias(self) -> Optional[List[UnitTypeId]]:
@@ -199,7 +248,7 @@ class Unit:
     def can_attack(self) -> bool:
         """ Checks if the unit can attack at all. """
         # TODO BATTLECRUISER doesnt have weapons in proto?!
-        return bool(self._weapons) or self.type_id in {UNIT_BATTLECRUISER, UNIT_ORACLE}
+        return bool(self._type_table.can_attack[self._proto.unit_type])
 
     @property
     def can_attack_both(self) -> bool:
@@ -209,62 +258,32 @@ class Unit:
     @cached_property
     def can_attack_ground(self) -> bool:
         """ Checks if the unit can attack ground units. """
-        if self.type_id in {UNIT_BATTLECRUISER, UNIT_ORACLE}:
-            return True
-        if self._weapons:
-            return any(weapon.type in TARGET_GROUND for weapon in self._weapons)
-        return False
+        return bool(self._type_table.can_attack_ground[self._proto.unit_type])
 
     @cached_property
     def ground_dps(self) -> float:
         """ Returns the dps against ground units. Does not include upgrades. """
-        if self.can_attack_ground:
-            weapon = next((weapon for weapon in self._weapons if weapon.type in TARGET_GROUND), None)
-            if weapon:
-                return (weapon.damage * weapon.attacks) / weapon.speed
-        return 0
+        return float(self._type_table.ground_dps[self._proto.unit_type])
 
     @cached_property
     def ground_range(self) -> float:
         """ Returns the range against ground units. Does not include upgrades. """
-        if self.type_id == UNIT_ORACLE:
-            return 4
-        if self.type_id == UNIT_BATTLECRUISER:
-            return 6
-        if self.can_attack_ground:
-            weapon = next((weapon for weapon in self._weapons if weapon.type in TARGET_GROUND), None)
-            if weapon:
-                return weapon.range
-        return 0
+        return float(self._type_table.ground_range[self._proto.unit_type])
 
     @cached_property
     def can_attack_air(self) -> bool:
         """ Checks if the unit can air attack at all. Does not include upgrades. """
-        if self.type_id == UNIT_BATTLECRUISER:
-            return True
-        if self._weapons:
-            return any(weapon.type in TARGET_AIR for weapon in self._weapons)
-        return False
+        return bool(self._type_table.can_attack_air[self._proto.unit_type])
 
     @cached_property
     def air_dps(self) -> float:
         """ Returns the dps against air units. Does not include upgrades. """
-        if self.can_attack_air:
-            weapon = next((weapon for weapon in self._weapons if weapon.type in TARGET_AIR), None)
-            if weapon:
-                return (weapon.damage * weapon.attacks) / weapon.speed
-        return 0
+        return float(self._type_table.air_dps[self._proto.unit_type])
 
     @cached_property
     def air_range(self) -> float:
         """ Returns the range against air units. Does not include upgrades. """
-        if self.type_id == UNIT_BATTLECRUISER:
-            return 6
-        if self.can_attack_air:
-            weapon = next((weapon for weapon in self._weapons if weapon.type in TARGET_AIR), None)
-            if weapon:
-                return weapon.range
-        return 0
+        return float(self._type_table.air_range[self._proto.unit_type])
 
     @cached_property
     def bonus_damage(self) -> Optional[Tuple[int, str]]:
@@ -282,19 +301,19 @@ class Unit:
     @property
     def armor(self) -> float:
         """ Returns the armor of the unit. Does not include upgrades """
-        return self._type_data._proto.armor
+        return float(self._type_table.armor[self._proto.unit_type])
 
     @property
     def sight_range(self) -> float:
         """ Returns the sight range of the unit. """
-        return self._type_data._proto.sight_range
+        return float(self._type_table.sight_range[self._proto.unit_type])
 
     @property
     def movement_speed(self) -> float:
         """Returns the movement speed of the unit.
         This is the unit movement speed on game speed 'normal'. To convert it to 'faster' movement speed, multiply it by a factor of '1.4'. E.g. reaper movement speed is listed here as 3.75, but should actually be 5.25.
         Does not include upgrades or buffs."""
-        return self._type_data._proto.movement_speed
+        return float(self._type_table.movement_speed[self._proto.unit_type])
 
     @cached_property
     def real_speed(self) -> float:
@@ -304,49 +323,10 @@ class Unit:
     def calculate_speed(self, upgrades: Set[UpgradeId] = None) -> float:
         """Calculates the movement speed of the unit including buffs and upgrades.
         Note: Upgrades only work with own units. Use "upgrades" param to set expected enemy upgrades.
+        The speed is memoized by type, upgrades, speed altering buffs and creep, see SpeedModel.
 
         :param upgrades:"""
-        speed: float = self.movement_speed
-        unit_type: UnitTypeId = self.type_id
-
-        # ---- Upgrades ----
-        if upgrades is None and self.is_mine:
-            upgrades = self._bot_object.state.upgrades
-
-        if upgrades and unit_type in SPEED_UPGRADE_DICT:
-            upgrade_id: Optional[UpgradeId] = SPEED_UPGRADE_DICT.get(unit_type, None)
-            if upgrade_id and upgrade_id in upgrades:
-                speed *= SPEED_INCREASE_DICT.get(unit_type, 1)
-
-        # ---- Creep ----
-        if unit_type in SPEED_INCREASE_ON_CREEP_DICT or unit_type in OFF_CREEP_SPEED_UPGRADE_DICT:
-            # On creep
-            x, y = self.position_tuple
-            if self._bot_object.state.creep[(int(x), int(y))]:
-                speed *= SPEED_INCREASE_ON_CREEP_DICT.get(unit_type, 1)
-
-            # Off creep upgrades
-            elif upgrades:
-                upgrade_id2: Optional[UpgradeId] = OFF_CREEP_SPEED_UPGRADE_DICT.get(unit_type, None)
-                if upgrade_id2:
-                    speed *= OFF_CREEP_SPEED_INCREASE_DICT[unit_type]
-
-            # Ultralisk has passive ability "Frenzied" which makes it immune to speed altering buffs
-            if unit_type == UnitTypeId.ULTRALISK:
-                return speed
-
-        # ---- Buffs ----
-        # Hard reset movement speed: medivac boost, void ray charge
-        if self.buffs and unit_type in {UnitTypeId.MEDIVAC, UnitTypeId.VOIDRAY}:
-            if BuffId.MEDIVACSPEEDBOOST in self.buffs:
-                speed = self.movement_speed * 1.7
-            elif BuffId.VOIDRAYSWARMDAMAGEBOOST in self.buffs:
-                speed = self.movement_speed * 0.75
-
-        # Speed altering buffs, e.g. stimpack, zealot charge, concussive shell, time warp, fungal growth, inhibitor zone
-        for buff in self.buffs:
-            speed *= SPEED_ALTERING_BUFFS.get(buff, 1)
-        return speed
+        return self._bot_object._speed_model.speed(self, upgrades)
 
     @property
     def distance_per_step(self) -> float:
@@ -362,12 +342,12 @@ class Unit:
     @property
     def is_mineral_field(self) -> bool:
         """ Checks if the unit is a mineral field. """
-        return self._type_data.has_minerals
+        return bool(self._type_table.has_minerals[self._proto.unit_type])
 
     @property
     def is_vespene_geyser(self) -> bool:
         """ Checks if the unit is a non-empty vespene geyser or gas extraction building. """
-        return self._type_data.has_vespene
+        return bool(self._type_table.has_vespene[self._proto.unit_type])
 
     @property
     def health(self) -> float:
@@ -827,7 +807,8 @@ class Unit:
 
         NOTE: This can be None if a building doesn't have a creation ability.
         For rich vespene buildings, flying terran buildings, this returns None"""
-        return self._bot_object.game_data.units[self._proto.unit_type].footprint_radius
+        footprint_radius = self._type_table.footprint_radius[self._proto.unit_type]
+        return None if np.isnan(footprint_radius) else float(footprint_radius)
 
     @property
     def radius(self) -> float:
@@ -999,11 +980,20 @@ class Unit:
     def order_target(self) -> Optional[Union[int, Point2]]:
         """Returns the target tag (if it is a Unit) or Point2 (if it is a Position)
         from the first order, returns None if the unit is idle"""
-        if self.orders:
-            target = self.orders[0].target
-            if isinstance(target, int):
-                return target
-            return Point2.from_proto(target)
+        orders = self._proto.orders
+        if orders:
+            order = orders[0]
+            if order.HasField("target_world_space_pos"):
+                return Point2.from_proto(order.target_world_space_pos)
+            return order.target_unit_tag
+        return None
+
+    @cached_property
+    def _order_ability(self) -> Optional[AbilityId]:
+        """ Generic id of the ability of the first order, read without building the UnitOrder objects. None if the unit is idle. """
+        orders = self._proto.orders
+        if orders:
+            return self._bot_object.game_data.abilities[orders[0].ability_id].id
         return None
 
     @property
@@ -1020,11 +1010,12 @@ class Unit:
     def is_using_ability(self, abilities: Union[AbilityId, Set[AbilityId]]) -> bool:
         """Check if the unit is using one of the given abilities.
         Only works for own units."""
-        if not self.orders:
+        ability = self._order_ability
+        if ability is None:
             return False
         if isinstance(abilities, AbilityId):
-            abilities = {abilities}
-        return self.orders[0].ability.id in abilities
+            return ability == abilities
+        return ability in abilities
 
     @cached_property
     def is_moving(self) -> bool:
@@ -1441,3 +1432,31 @@ class Unit:
             subtract_supply=subtract_supply,
             can_afford_check=can_afford_check,
         )
+
+
+# Cached properties of Unit that only depend on the unit type and stay valid when Unit._rebind is called with a new frame
+TYPE_CACHED_PROPERTIES = frozenset(
+    {
+        "type_id",
+        "_type_data",
+        "_type_table",
+        "_type_attributes",
+        "_creation_ability",
+        "race",
+        "tech_alias",
+        "unit_alias",
+        "_weapons",
+        "can_attack",
+        "can_attack_ground",
+        "ground_dps",
+        "ground_range",
+        "can_attack_air",
+        "air_dps",
+        "air_range",
+        "bonus_damage",
+    }
+)
+# All other cached properties of Unit, cleared by Unit._rebind
+FRAME_CACHED_PROPERTIES = frozenset(
+    name for name, value in vars(Unit).items() if isinstance(value, cached_property)
+) - TYPE_CACHED_PROPERTIES
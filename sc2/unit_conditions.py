@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, Iterable, Tuple, Union
+
+import numpy as np
+
+from sc2.constants import IS_ENEMY, IS_MINE, IS_STRUCTURE, IS_VISIBLE
+from sc2.game_data import GameData
+from sc2.ids.ability_id import AbilityId
+from sc2.ids.unit_typeid import UnitTypeId
+from sc2.spatial_index import _signed_square
+from sc2.unit_table import (
+    COLUMNS,
+    FLAG_IS_ACTIVE,
+    FLAG_IS_BURROWED,
+    FLAG_IS_FLYING,
+    FLAG_IS_HALLUCINATION,
+    FLAG_IS_POWERED,
+    UnitTable,
+)
+
+# Condition name: bit of the 'flags' column
+FLAG_CONDITIONS: Dict[str, int] = {
+    "flying": FLAG_IS_FLYING,
+    "burrowed": FLAG_IS_BURROWED,
+    "hallucination": FLAG_IS_HALLUCINATION,
+    "powered": FLAG_IS_POWERED,
+    "active": FLAG_IS_ACTIVE,
+}
+
+# Suffix of the comparison conditions, e.g. 'health_lt'
+COMPARISONS: Dict[str, Callable[[np.ndarray, Any], np.ndarray]] = {
+    "lt": np.less,
+    "le": np.less_equal,
+    "gt": np.greater,
+    "ge": np.greater_equal,
+    "eq": np.equal,
+    "ne": np.not_equal,
+}
+
+# Columns that are computed from two columns: (value column, maximum column), 0 if the maximum is 0 like in unit.py
+PERCENTAGES: Dict[str, Tuple[str, str]] = {
+    "health_pct": ("health", "health_max"),
+    "shield_pct": ("shield", "shield_max"),
+    "energy_pct": ("energy", "energy_max"),
+}
+
+
+def _column(table: UnitTable, rows: np.ndarray, name: str) -> np.ndarray:
+    if name in PERCENTAGES:
+        value_column, maximum_column = PERCENTAGES[name]
+        values, maximums = table[value_column][rows], table[maximum_column][rows]
+        return np.divide(values, maximums, out=np.zeros(len(rows)), where=maximums != 0)
+    return table[name][rows]
+
+
+def _type_values(types: Union[UnitTypeId, Iterable[UnitTypeId]]) -> np.ndarray:
+    if isinstance(types, UnitTypeId):
+        types = (types, )
+    return np.fromiter((unit_type.value for unit_type in types), dtype=np.int32)
+
+
+def _order_abilities(table: UnitTable, rows: np.ndarray, game_data: GameData) -> np.ndarray:
+    """ Generic ability ids of the first orders, 0 for idle units and unknown abilities. """
+    generic_ability_ids = game_data.generic_ability_ids
+    exact_ids = table.order_ability[rows]
+    is_known = (0 <= exact_ids) & (exact_ids < len(generic_ability_ids))
+    return np.where(is_known, generic_ability_ids[np.where(is_known, exact_ids, 0)], 0)
+
+
+def _distances_squared(table: UnitTable, rows: np.ndarray, position: Tuple[float, float]) -> np.ndarray:
+    difference = table.positions[rows] - position
+    return np.einsum("ij,ij->i", difference, difference)
+
+
+def _condition_mask(table: UnitTable, rows: np.ndarray, name: str, value: Any, game_data: GameData) -> np.ndarray:
+    """Returns the boolean mask of one condition of Units.where over the given rows of the table.
+
+    :param table:
+    :param rows:
+    :param name:
+    :param value:
+    :param game_data:"""
+    if name == "ready":
+        return (table.build_progress[rows] == 1) == bool(value)
+    if name == "idle":
+        return (table.order_count[rows] == 0) == bool(value)
+    if name in FLAG_CONDITIONS:
+        return ((table.flags[rows] & FLAG_CONDITIONS[name]) != 0) == bool(value)
+    if name == "mine":
+        return (table.alliance[rows] == IS_MINE) == bool(value)
+    if name == "enemy":
+        return (table.alliance[rows] == IS_ENEMY) == bool(value)
+    if name == "visible":
+        return (table.display_type[rows] == IS_VISIBLE) == bool(value)
+    if name == "structure":
+        return game_data.unit_type_table.has_attribute(table.type_id[rows], IS_STRUCTURE) == bool(value)
+    if name == "type_in":
+        return np.isin(table.type_id[rows], _type_values(value))
+    if name == "type_not_in":
+        return ~np.isin(table.type_id[rows], _type_values(value))
+    if name == "using_ability":
+        abilities = (value, ) if isinstance(value, AbilityId) else value
+        return np.isin(_order_abilities(table, rows, game_data), [ability.value for ability in abilities])
+    if name == "tag_in":
+        return np.isin(table.tag[rows], np.fromiter(value, dtype=np.uint64))
+    if name == "tag_not_in":
+        return ~np.isin(table.tag[rows], np.fromiter(value, dtype=np.uint64))
+    if name == "within":
+        position, distance = value
+        return _distances_squared(table, rows, position) < distance**2
+    if name == "outside":
+        position, distance = value
+        return _signed_square(distance) < _distances_squared(table, rows, position)
+    column, _, comparison = name.rpartition("_")
+    if comparison in COMPARISONS and (column in COLUMNS or column in PERCENTAGES):
+        return COMPARISONS[comparison](_column(table, rows, column), value)
+    raise TypeError(f"Unknown condition '{name}', see Units.where for the supported conditions")
+
+
+def conditions_mask(table: UnitTable, rows: np.ndarray, conditions: Dict[str, Any], game_data: GameData) -> np.ndarray:
+    """Returns the boolean mask of the rows that match all conditions.
+
+    :param table:
+    :param rows: rows of the units in the table
+    :param conditions: condition name: value, see Units.where
+    :param game_data:"""
+    mask = np.ones(len(rows), dtype=bool)
+    for name, value in conditions.items():
+        mask &= _condition_mask(table, rows, name, value, game_data)
+    return mask
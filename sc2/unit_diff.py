@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from sc2.unit_table import COLLECTION_STRUCTURES, UnitTable
+
+_NO_ROWS = np.empty(0, dtype=np.intp)
+_NO_TAGS = np.empty(0, dtype=np.uint64)
+
+
+class UnitDiff:
+    """Differences between the units of the previous and the current frame, created once per frame by BotAIInternal.issue_events.
+
+    Everything is computed with numpy set operations on the tag columns of the two unit tables, split by
+    UnitTable.collection, so units that didn't change cost nothing in Python.
+    Units of the current frame are returned as rows of the current unit table, i.e. indices into self.all_units,
+    units that are gone are returned as tags."""
+
+    def __init__(self, previous: Optional[UnitTable], current: UnitTable, dead_units: Iterable[int] = ()):
+        """
+        :param previous: unit table of the previous frame, None in the first frame
+        :param current: unit table of the current frame
+        :param dead_units: tags of the units that died this frame
+        """
+        self.previous: Optional[UnitTable] = previous
+        self.current: UnitTable = current
+        self._dead_units = dead_units
+        self._matches: Dict[int, Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]] = {}
+
+    @staticmethod
+    def _collection_rows(table: Optional[UnitTable], collection: int) -> np.ndarray:
+        if table is None:
+            return _NO_ROWS
+        return np.flatnonzero(table.collection == collection)
+
+    def _match(self, collection: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Returns (added rows, current rows of kept units, previous rows of kept units, removed tags) of the collection,
+        the rows of kept units are in the same order in both arrays.
+
+        :param collection:"""
+        if collection not in self._matches:
+            current_rows = self._collection_rows(self.current, collection)
+            previous_rows = self._collection_rows(self.previous, collection)
+            current_tags = self.current.tag[current_rows]
+            previous_tags = self.previous.tag[previous_rows] if self.previous is not None else _NO_TAGS
+            _, current_index, previous_index = np.intersect1d(
+                current_tags, previous_tags, assume_unique=True, return_indices=True
+            )
+            is_kept = np.zeros(len(current_rows), dtype=bool)
+            is_kept[current_index] = True
+            # Sort kept units by their row so events are issued in the order of the collection
+            order = np.argsort(current_index, kind="stable")
+            self._matches[collection] = (
+                current_rows[~is_kept],
+                current_rows[current_index[order]],
+                previous_rows[previous_index[order]],
+                np.setdiff1d(previous_tags, current_tags, assume_unique=True),
+            )
+        return self._matches[collection]
+
+    def added(self, collection: int) -> np.ndarray:
+        """Rows of the units of the collection that were not in that collection last frame.
+
+        :param collection:"""
+        return self._match(collection)[0]
+
+    def kept(self, collection: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Rows in the current and in the previous unit table of the units that were in the collection in both frames.
+
+        :param collection:"""
+        return self._match(collection)[1:3]
+
+    def removed(self, collection: int) -> np.ndarray:
+        """Tags of the units that were in the collection last frame but are not anymore.
+
+        :param collection:"""
+        return self._match(collection)[3]
+
+    def damaged(self, collection: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Rows of the units of the collection that lost health or shield since last frame, and the amount they lost.
+
+        :param collection:"""
+        current_rows, previous_rows = self.kept(collection)
+        if not len(current_rows):
+            return _NO_ROWS, np.empty(0)
+        current, previous = self.current, self.previous
+        health, shield = current.health[current_rows], current.shield[current_rows]
+        previous_health, previous_shield = previous.health[previous_rows], previous.shield[previous_rows]
+        is_damaged = (health < previous_health) | (shield < previous_shield)
+        damage = previous_health - health + previous_shield - shield
+        return current_rows[is_damaged], damage[is_damaged]
+
+    def type_changed(self, collection: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Rows of the units of the collection that changed their type since last frame, and their previous type ids.
+
+        :param collection:"""
+        current_rows, previous_rows = self.kept(collection)
+        if not len(current_rows):
+            return _NO_ROWS, np.empty(0, dtype=np.int32)
+        previous_types = self.previous.type_id[previous_rows]
+        is_changed = self.current.type_id[current_rows] != previous_types
+        return current_rows[is_changed], previous_types[is_changed]
+
+    def construction_started(self) -> np.ndarray:
+        """ Rows of the new structures that are not finished. """
+        rows = self.added(COLLECTION_STRUCTURES)
+        if not len(rows):
+            return rows
+        return rows[self.current.build_progress[rows] < 1]
+
+    def construction_completed(self) -> np.ndarray:
+        """ Rows of the structures that finished this frame, and of new structures that are already finished. """
+        rows = self.added(COLLECTION_STRUCTURES)
+        completed = [rows[self.current.build_progress[rows] >= 1] if len(rows) else rows]
+        current_rows, previous_rows = self.kept(COLLECTION_STRUCTURES)
+        if len(current_rows):
+            is_completed = (self.current.build_progress[current_rows] == 1) & (
+                self.previous.build_progress[previous_rows] < 1
+            )
+            completed.append(current_rows[is_completed])
+        return np.concatenate(completed)
+
+    def dead(self) -> np.ndarray:
+        """ Tags of the units that died this frame and were visible last frame. """
+        if self.previous is None or not self._dead_units:
+            return _NO_TAGS
+        dead_tags = np.fromiter(self._dead_units, dtype=np.uint64, count=len(self._dead_units))
+        return np.intersect1d(dead_tags, self.previous.tag)
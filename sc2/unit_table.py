@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+from operator import attrgetter
+from typing import Callable, Dict, Sequence, Tuple
+
+import numpy as np
+
+# Bits of the 'flags' column
+FLAG_IS_FLYING = 1 << 0
+FLAG_IS_BURROWED = 1 << 1
+FLAG_IS_HALLUCINATION = 1 << 2
+FLAG_IS_POWERED = 1 << 3
+FLAG_IS_ACTIVE = 1 << 4
+FLAG_IS_SELECTED = 1 << 5
+FLAG_IS_ON_SCREEN = 1 << 6
+
+# Values of the 'collection' array, i.e. which of the bot's unit collections a row was sorted into
+COLLECTION_OTHER = 0
+COLLECTION_UNITS = 1
+COLLECTION_STRUCTURES = 2
+COLLECTION_ENEMY_UNITS = 3
+COLLECTION_ENEMY_STRUCTURES = 4
+
+# Bits of the 'membership' array, i.e. all of the bot's unit collections a row was added to
+IN_ALL_UNITS = 1 << 0
+IN_UNITS = 1 << 1
+IN_WORKERS = 1 << 2
+IN_LARVA = 1 << 3
+IN_STRUCTURES = 1 << 4
+IN_TOWNHALLS = 1 << 5
+IN_GAS_BUILDINGS = 1 << 6
+IN_ALL_OWN_UNITS = 1 << 7
+IN_ENEMY_UNITS = 1 << 8
+IN_ENEMY_STRUCTURES = 1 << 9
+IN_ALL_ENEMY_UNITS = 1 << 10
+IN_RESOURCES = 1 << 11
+IN_DESTRUCTABLES = 1 << 12
+IN_WATCHTOWERS = 1 << 13
+IN_MINERAL_FIELD = 1 << 14
+IN_VESPENE_GEYSER = 1 << 15
+IN_PLACEHOLDERS = 1 << 16
+
+
+def _unit_flags(unit) -> int:
+    return (
+        unit.is_flying
+        | unit.is_burrowed << 1
+        | unit.is_hallucination << 2
+        | unit.is_powered << 3
+        | unit.is_active << 4
+        | unit.is_selected << 5
+        | unit.is_on_screen << 6
+    )
+
+
+def _order_ability(unit) -> int:
+    return unit.orders[0].ability_id if unit.orders else 0
+
+
+def _order_target_tag(unit) -> int:
+    return unit.orders[0].target_unit_tag if unit.orders else 0
+
+
+# Column name: (function that reads the value from a raw_pb.Unit, dtype)
+COLUMNS: Dict[str, Tuple[Callable, np.dtype]] = {
+    "tag": (attrgetter("tag"), np.uint64),
+    "type_id": (attrgetter("unit_type"), np.int32),
+    "alliance": (attrgetter("alliance"), np.int8),
+    "owner": (attrgetter("owner"), np.int8),
+    "display_type": (attrgetter("display_type"), np.int8),
+    "cloak": (attrgetter("cloak"), np.int8),
+    "x": (attrgetter("pos.x"), np.float64),
+    "y": (attrgetter("pos.y"), np.float64),
+    "z": (attrgetter("pos.z"), np.float64),
+    "facing": (attrgetter("facing"), np.float64),
+    "radius": (attrgetter("radius"), np.float64),
+    "build_progress": (attrgetter("build_progress"), np.float64),
+    "health": (attrgetter("health"), np.float64),
+    "health_max": (attrgetter("health_max"), np.float64),
+    "shield": (attrgetter("shield"), np.float64),
+    "shield_max": (attrgetter("shield_max"), np.float64),
+    "energy": (attrgetter("energy"), np.float64),
+    "energy_max": (attrgetter("energy_max"), np.float64),
+    "weapon_cooldown": (attrgetter("weapon_cooldown"), np.float64),
+    "flags": (_unit_flags, np.uint16),
+    "order_count": (lambda unit: len(unit.orders), np.uint8),
+    # Exact ability id and target tag of the first order, 0 if the unit is idle or the order targets a position
+    "order_ability": (_order_ability, np.int32),
+    "order_target_tag": (_order_target_tag, np.uint64),
+}
+
+UNIT_TABLE_DTYPE = np.dtype([(name, dtype) for name, (_, dtype) in COLUMNS.items()])
+
+
+class UnitTable:
+    """Columnar table of all units of one frame, created once per frame by BotAIInternal._prepare_units.
+    Row i belongs to the unit with distance_calculation_index i, i.e. to self.all_units[i].
+
+    Each column is a numpy array, e.g. table.health or table["health"], see COLUMNS for all columns.
+    A column is only read from the protos the first time it is accessed in a frame, so unused columns cost nothing.
+    table.positions is a (n, 2) array of x and y, and table.data combines all columns to one structured array.
+    table.collection and table.membership are not read from the protos but set by _prepare_units,
+    see the COLLECTION_ and IN_ constants."""
+
+    def __init__(self, units: Sequence):
+        """
+        :param units: raw_pb.Unit objects
+        """
+        self._units: Sequence = units
+        self._positions: np.ndarray = None
+        self._data: np.ndarray = None
+        # Set by BotAIInternal._prepare_units, e.g. COLLECTION_UNITS for the rows of self.units
+        self.collection: np.ndarray = None
+        # Set by BotAIInternal._prepare_units, e.g. IN_ALL_UNITS | IN_ALL_OWN_UNITS | IN_STRUCTURES | IN_TOWNHALLS for a nexus
+        self.membership: np.ndarray = None
+
+    def __len__(self) -> int:
+        return len(self._units)
+
+    def __getattr__(self, column: str) -> np.ndarray:
+        """ Called only if the column was not built yet in this frame. """
+        if column not in COLUMNS:
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{column}'")
+        if column in {"x", "y"} and self._positions is None:
+            values = self.positions[:, 0 if column == "x" else 1]
+        else:
+            getter, dtype = COLUMNS[column]
+            values = np.fromiter((getter(unit) for unit in self._units), dtype=dtype, count=len(self._units))
+        setattr(self, column, values)
+        return values
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        return getattr(self, column)
+
+    @property
+    def positions(self) -> np.ndarray:
+        """ Returns a (n, 2) array of the x and y positions of all units: [[x0, y0], [x1, y1], ...] """
+        if self._positions is None:
+            units = self._units
+            # Converts tuple [(1, 2), (3, 4)] to flat list like [1, 2, 3, 4], then converts the flat array back to shape (n, 2)
+            flat_positions = (coord for unit in units for coord in (unit.pos.x, unit.pos.y))
+            self._positions = np.fromiter(flat_positions, dtype=float, count=2 * len(units)).reshape((len(units), 2))
+        return self._positions
+
+    @property
+    def data(self) -> np.ndarray:
+        """ Returns all columns as one structured array of dtype UNIT_TABLE_DTYPE, table.data[i] is the row of unit i. """
+        if self._data is None:
+            data = np.empty(len(self._units), dtype=UNIT_TABLE_DTYPE)
+            for column in COLUMNS:
+                data[column] = self[column]
+            self._data = data
+        return self._data
+
+    def has_flag(self, flag: int) -> np.ndarray:
+        """Returns a boolean array of the units that have the flag set, e.g. table.has_flag(FLAG_IS_FLYING)
+
+        :param flag:"""
+        return (self.flags & flag).astype(bool)
+
+    def is_in(self, collections: int) -> np.ndarray:
+        """Returns a boolean array of the units that are in any of the collections, e.g. table.is_in(IN_TOWNHALLS | IN_GAS_BUILDINGS)
+
+        :param collections:"""
+        return (self.membership & collections).astype(bool)
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Dict, FrozenSet, Iterable, List, Union
+
+import numpy as np
+
+from sc2.constants import TARGET_AIR, TARGET_GROUND
+from sc2.ids.unit_typeid import UnitTypeId
+
+if TYPE_CHECKING:
+    from sc2.game_data import UnitTypeData
+
+# These units attack with abilities instead of weapons, see Unit.can_attack_ground and Unit.ground_range
+ATTACKS_GROUND_WITHOUT_WEAPON: Dict[int, float] = {UnitTypeId.BATTLECRUISER.value: 6, UnitTypeId.ORACLE.value: 4}
+ATTACKS_AIR_WITHOUT_WEAPON: Dict[int, float] = {UnitTypeId.BATTLECRUISER.value: 6}
+
+
+class UnitTypeTable:
+    """Static data of all unit types as numpy arrays indexed by the unit type value, built once per game by GameData.
+    E.g. table.armor[UnitTypeId.MARINE.value] or table.armor[unit_table.type_id] for all units of a frame.
+
+    Unknown and unavailable unit types have 0 in every array, and NaN as footprint radius.
+    can_attack*, ground_*, air_* and footprint_radius hold the same values as the Unit properties of the same name,
+    the weapon columns hold the damage, attacks and cooldown of the first weapon against ground or air like Unit.ground_dps."""
+
+    def __init__(self, units: Dict[int, UnitTypeData]):
+        """
+        :param units: GameData.units
+        """
+        self.size: int = max(max(units, default=0), max(unit_type.value for unit_type in UnitTypeId)) + 1
+        size = self.size
+        # Bit '1 << attribute' is set for each attribute of the type, e.g. 1 << IS_STRUCTURE
+        self.attributes = np.zeros(size, dtype=np.uint16)
+        self.race = np.zeros(size, dtype=np.int8)
+        self.armor = np.zeros(size)
+        self.sight_range = np.zeros(size)
+        self.movement_speed = np.zeros(size)
+        self.food_required = np.zeros(size)
+        self.mineral_cost = np.zeros(size, dtype=np.int32)
+        self.vespene_cost = np.zeros(size, dtype=np.int32)
+        self.cargo_size = np.zeros(size, dtype=np.int32)
+        self.has_minerals = np.zeros(size, dtype=bool)
+        self.has_vespene = np.zeros(size, dtype=bool)
+        self.footprint_radius = np.full(size, np.nan)
+        self.can_attack = np.zeros(size, dtype=bool)
+        self.can_attack_ground = np.zeros(size, dtype=bool)
+        self.can_attack_air = np.zeros(size, dtype=bool)
+        self.ground_damage = np.zeros(size)
+        self.ground_attacks = np.zeros(size, dtype=np.int32)
+        self.ground_cooldown = np.zeros(size)
+        self.ground_range = np.zeros(size)
+        self.ground_dps = np.zeros(size)
+        self.air_damage = np.zeros(size)
+        self.air_attacks = np.zeros(size, dtype=np.int32)
+        self.air_cooldown = np.zeros(size)
+        self.air_range = np.zeros(size)
+        self.air_dps = np.zeros(size)
+        # Type values of the unit alias (0 if there is none) and of the tech aliases of each type, as given by the API
+        self.unit_alias = np.zeros(size, dtype=np.int32)
+        self.tech_alias: Dict[int, FrozenSet[int]] = {}
+        # Masks of same_tech_mask and same_unit_mask by the given types, kept as long as the table
+        self._same_tech_masks: Dict[FrozenSet[int], np.ndarray] = {}
+        self._same_unit_masks: Dict[FrozenSet[int], np.ndarray] = {}
+
+        for unit_type, type_data in units.items():
+            proto = type_data._proto
+            self.attributes[unit_type] = sum(1 << attribute for attribute in set(proto.attributes))
+            self.race[unit_type] = proto.race
+            self.armor[unit_type] = proto.armor
+            self.sight_range[unit_type] = proto.sight_range
+            self.movement_speed[unit_type] = proto.movement_speed
+            self.food_required[unit_type] = proto.food_required
+            self.mineral_cost[unit_type] = proto.mineral_cost
+            self.vespene_cost[unit_type] = proto.vespene_cost
+            self.cargo_size[unit_type] = proto.cargo_size
+            self.has_minerals[unit_type] = proto.has_minerals
+            self.has_vespene[unit_type] = proto.has_vespene
+            footprint_radius = type_data.footprint_radius
+            if footprint_radius is not None:
+                self.footprint_radius[unit_type] = footprint_radius
+            self.unit_alias[unit_type] = proto.unit_alias
+            tech_alias = frozenset(proto.tech_alias) - {0}
+            if tech_alias:
+                self.tech_alias[unit_type] = tech_alias
+            self._add_weapons(unit_type, proto.weapons)
+
+    def _add_weapons(self, unit_type: int, weapons):
+        ground_weapon = next((weapon for weapon in weapons if weapon.type in TARGET_GROUND), None)
+        air_weapon = next((weapon for weapon in weapons if weapon.type in TARGET_AIR), None)
+        self.can_attack[unit_type] = bool(weapons) or unit_type in ATTACKS_GROUND_WITHOUT_WEAPON
+        self.can_attack_ground[unit_type] = ground_weapon is not None or unit_type in ATTACKS_GROUND_WITHOUT_WEAPON
+        self.can_attack_air[unit_type] = air_weapon is not None or unit_type in ATTACKS_AIR_WITHOUT_WEAPON
+        if ground_weapon is not None:
+            self.ground_damage[unit_type] = ground_weapon.damage
+            self.ground_attacks[unit_type] = ground_weapon.attacks
+            self.ground_cooldown[unit_type] = ground_weapon.speed
+            self.ground_range[unit_type] = ground_weapon.range
+            self.ground_dps[unit_type] = ground_weapon.damage * ground_weapon.attacks / ground_weapon.speed
+        if air_weapon is not None:
+            self.air_damage[unit_type] = air_weapon.damage
+            self.air_attacks[unit_type] = air_weapon.attacks
+            self.air_cooldown[unit_type] = air_weapon.speed
+            self.air_range[unit_type] = air_weapon.range
+            self.air_dps[unit_type] = air_weapon.damage * air_weapon.attacks / air_weapon.speed
+        # The ranges of these units are hard coded, as the range of their abilities is not in the weapons
+        self.ground_range[unit_type] = ATTACKS_GROUND_WITHOUT_WEAPON.get(unit_type, self.ground_range[unit_type])
+        self.air_range[unit_type] = ATTACKS_AIR_WITHOUT_WEAPON.get(unit_type, self.air_range[unit_type])
+
+    def has_attribute(self, unit_types: Union[int, np.ndarray], attribute: int) -> Union[bool, np.ndarray]:
+        """Checks if the unit types have the attribute, e.g. table.has_attribute(unit_table.type_id, IS_ARMORED)
+
+        :param unit_types: type value or array of type values
+        :param attribute:"""
+        return (self.attributes[unit_types] & 1 << attribute) != 0
+
+    def same_tech_mask(self, unit_types: FrozenSet[int]) -> np.ndarray:
+        """Returns a boolean array over all type values of the types that have the same tech as any of the given types,
+        i.e. the types themselves, their tech aliases and all types that have one of these as tech alias. See Units.same_tech
+
+        :param unit_types: type values"""
+        mask = self._same_tech_masks.get(unit_types, None)
+        if mask is None:
+            mask = self._same_tech_masks[unit_types] = self._build_same_tech_mask(unit_types)
+        return mask
+
+    def _build_same_tech_mask(self, unit_types: FrozenSet[int]) -> np.ndarray:
+        tech_types = set(unit_types)
+        for unit_type in unit_types:
+            tech_types |= self.tech_alias.get(unit_type, frozenset())
+        mask = np.zeros(self.size, dtype=bool)
+        mask[self._valid(tech_types)] = True
+        for unit_type, tech_alias in self.tech_alias.items():
+            if not tech_alias.isdisjoint(tech_types):
+                mask[unit_type] = True
+        return mask
+
+    def same_unit_mask(self, unit_types: FrozenSet[int]) -> np.ndarray:
+        """Returns a boolean array over all type values of the types that are the same unit as any of the given types,
+        i.e. the types themselves, their unit aliases and all types that have one of these as unit alias. See Units.same_unit
+
+        :param unit_types: type values"""
+        mask = self._same_unit_masks.get(unit_types, None)
+        if mask is None:
+            mask = self._same_unit_masks[unit_types] = self._build_same_unit_mask(unit_types)
+        return mask
+
+    def _build_same_unit_mask(self, unit_types: FrozenSet[int]) -> np.ndarray:
+        alias_types = self._valid(set(unit_types) | {int(self.unit_alias[unit_type]) for unit_type in self._valid(unit_types)})
+        alias_types = alias_types[alias_types != 0]
+        mask = np.isin(self.unit_alias, alias_types)
+        mask[alias_types] = True
+        return mask
+
+    def _valid(self, unit_types: Iterable[int]) -> np.ndarray:
+        values: List[int] = [unit_type for unit_type in unit_types if 0 <= unit_type < self.size]
+        return np.array(values, dtype=np.intp)
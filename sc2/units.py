@@ -3,26 +3,56 @@ from __future__ import annotations
 
 import random
 import warnings
-from functools import cached_property
 from itertools import chain
-from typing import TYPE_CHECKING, Any, Dict, Generator, Iterable, List, Optional, Set, Tuple, Union
+from typing import TYPE_CHECKING, Any, Callable, Dict, Generator, Hashable, Iterable, List, Optional, Set, Tuple, Union
 
 import numpy as np
 
+from sc2.damage_matrix import DamageMatrix
+from sc2.game_data import Cost
 from sc2.ids.unit_typeid import UnitTypeId
 from sc2.position import Point2, Point3
+from sc2.spatial_index import SpatialIndex
 from sc2.unit import Unit
+from sc2.unit_conditions import conditions_mask
+from sc2.unit_table import UnitTable
 
 warnings.simplefilter("once")
 
+with warnings.catch_warnings():
+    warnings.simplefilter("ignore")
+    from scipy.spatial import ConvexHull
+    from scipy.spatial.distance import cdist
+
 if TYPE_CHECKING:
     from sc2.bot_ai import BotAI
+    from sc2.ids.upgrade_id import UpgradeId
 
 
 # pylint: disable=R0904
 class Units(list):
     """A collection of Unit objects. Makes it easy to select units by selectors."""
 
+    # KD-tree over the positions of the units, see _spatial_index_for_query
+    _spatial_index: Optional[SpatialIndex] = None
+    _spatial_query_frame: int = -1
+    # Maps the tags of the units to their index, see _tag_to_index
+    _tag_index: Optional[Dict[int, int]] = None
+    # Enabled by BotAIInternal._prepare_units for the bot's collections like self.structures, see _cached_selection
+    _selection_cache: Optional[Dict[Hashable, Units]] = None
+    # Game loop in which the selection cache was filled, it is dropped in any later frame
+    _selection_cache_frame: int = -1
+    # Units of each type in the order of the list, see _units_by_type
+    _type_groups: Optional[Dict[UnitTypeId, List[Unit]]] = None
+    # Unit table and rows of the units in it, see _table_rows
+    _table_and_rows: Optional[Tuple[UnitTable, np.ndarray]] = None
+    # Game loop in which the table and rows were taken, the units get new rows each frame
+    _table_rows_frame: int = -1
+    # Results of the aggregates like center or total_ground_dps, see _aggregate
+    _aggregates: Optional[Dict[Hashable, Any]] = None
+    # Game loop in which the aggregates were computed, they are computed again in any later frame
+    _aggregates_frame: int = -1
+
     @classmethod
     def from_proto(cls, units, bot_object: BotAI):
         # pylint: disable=E1120
@@ -37,8 +67,105 @@ class Units(list):
         self._bot_object = bot_object
 
     def __call__(self, *args, **kwargs):
+        if (
+            len(args) == 1 and not kwargs and isinstance(args[0], (UnitTypeId, set))
+            and self._valid_selection_cache() is not None
+        ):
+            return self._of_types(args[0], as_selection=True)
         return UnitSelection(self, *args, **kwargs)
 
+    def _game_loop(self) -> int:
+        return self._bot_object.state.game_loop if self._bot_object is not None else -1
+
+    def _invalidate_indices(self):
+        """Called by all methods that change the list, so the tag map and the spatial index are built again when they are used next.
+        Cached selections are dropped for good, as they were only valid for the list _prepare_units created."""
+        self._tag_index = None
+        self._spatial_index = None
+        self._selection_cache = None
+        self._type_groups = None
+        self._table_and_rows = None
+        self._aggregates = None
+
+    def append(self, unit: Unit):
+        if (
+            self._tag_index is not None or self._spatial_index is not None or self._selection_cache is not None
+            or self._table_and_rows is not None or self._aggregates is not None
+        ):
+            self._invalidate_indices()
+        list.append(self, unit)
+
+    def _enable_selection_cache(self):
+        """ Called by BotAIInternal._prepare_units once the collection is filled for this frame. """
+        self._selection_cache = {}
+        self._selection_cache_frame = self._game_loop()
+
+    def _valid_selection_cache(self) -> Optional[Dict[Hashable, Units]]:
+        """Returns the selection cache if it was filled in the current frame. A Units object the bot keeps for later frames
+        drops its cache there, as the units in it may have changed, e.g. with 'reuse_unit_objects'."""
+        cache = self._selection_cache
+        if cache is not None and self._selection_cache_frame != self._game_loop():
+            self._selection_cache = cache = None
+            self._type_groups = None
+        return cache
+
+    def _cached_selection(self, key: Hashable, select: Callable[[], Units], as_selection: bool = False) -> Units:
+        """Returns the result of select(), which is only called the first time the key is selected in this frame if the selection cache is enabled.
+        Every call returns a new Units object, so changing the result does not change the cache, but the result shares the cache
+        of its selection, so chained selections like self.structures(UnitTypeId.GATEWAY).ready are cached as well.
+
+        :param key:
+        :param select:
+        :param as_selection: return a UnitSelection like __call__ does without the cache"""
+        cache = self._valid_selection_cache()
+        if cache is None:
+            selection = select()
+            return UnitSelection(selection) if as_selection else selection
+        selection = cache.get(key, None)
+        if selection is None:
+            selection = cache[key] = select()
+            selection._selection_cache = {}
+            selection._selection_cache_frame = self._selection_cache_frame
+        result = UnitSelection(selection) if as_selection else Units(selection, self._bot_object)
+        result._selection_cache = selection._selection_cache
+        result._selection_cache_frame = selection._selection_cache_frame
+        return result
+
+    def _units_by_type(self) -> Dict[UnitTypeId, List[Unit]]:
+        """ Groups the units by their type in one pass, the first time a single type is selected from a cached collection. """
+        if self._type_groups is None:
+            type_groups: Dict[UnitTypeId, List[Unit]] = {}
+            for unit in self:
+                type_group = type_groups.get(unit.type_id, None)
+                if type_group is None:
+                    type_groups[unit.type_id] = [unit]
+                else:
+                    type_group.append(unit)
+            self._type_groups = type_groups
+        return self._type_groups
+
+    def _of_types(self, types: Iterable[UnitTypeId], as_selection: bool = False) -> Units:
+        """Returns the units of any of the types from the selection cache,
+        a single type is looked up in the type groups instead of filtering the list.
+
+        :param types:
+        :param as_selection: see _cached_selection"""
+        key = frozenset((types, )) if isinstance(types, UnitTypeId) else frozenset(types)
+        if len(key) == 1:
+            (unit_type, ) = key
+            return self._cached_selection(
+                key, lambda: Units(self._units_by_type().get(unit_type, ()), self._bot_object), as_selection
+            )
+        return self._cached_selection(key, lambda: self.filter(lambda unit: unit.type_id in key), as_selection)
+
+    def _tag_to_index(self) -> Dict[int, int]:
+        """Returns a dict that maps the tag of each unit to its index, built the first time it is needed after the list changed.
+        If a tag appears more than once, it maps to the first index like find_by_tag."""
+        if self._tag_index is None:
+            tags = [unit.tag for unit in self]
+            self._tag_index = dict(zip(reversed(tags), range(len(tags) - 1, -1, -1)))
+        return self._tag_index
+
     def __iter__(self) -> Generator[Unit, None, None]:
         return (item for item in super().__iter__())
 
@@ -49,34 +176,22 @@ class Units(list):
         return self.subgroup(self)
 
     def __or__(self, other: Units) -> Units:
+        self_tags = self._tag_to_index()
         return Units(
-            chain(
-                iter(self),
-                (other_unit for other_unit in other if other_unit.tag not in (self_unit.tag for self_unit in self)),
-            ),
+            chain(iter(self), (other_unit for other_unit in other if other_unit.tag not in self_tags)),
             self._bot_object,
         )
 
     def __add__(self, other: Units) -> Units:
-        return Units(
-            chain(
-                iter(self),
-                (other_unit for other_unit in other if other_unit.tag not in (self_unit.tag for self_unit in self)),
-            ),
-            self._bot_object,
-        )
+        return self | other
 
     def __and__(self, other: Units) -> Units:
-        return Units(
-            (other_unit for other_unit in other if other_unit.tag in (self_unit.tag for self_unit in self)),
-            self._bot_object,
-        )
+        self_tags = self._tag_to_index()
+        return Units((other_unit for other_unit in other if other_unit.tag in self_tags), self._bot_object)
 
     def __sub__(self, other: Units) -> Units:
-        return Units(
-            (self_unit for self_unit in self if self_unit.tag not in (other_unit.tag for other_unit in other)),
-            self._bot_object,
-        )
+        other_tags = other._tag_to_index() if isinstance(other, Units) else {other_unit.tag for other_unit in other}
+        return Units((self_unit for self_unit in self if self_unit.tag not in other_tags), self._bot_object)
 
     def __hash__(self):
         return hash(unit.tag for unit in self)
@@ -94,10 +209,10 @@ class Units(list):
         return bool(self)
 
     def find_by_tag(self, tag) -> Optional[Unit]:
-        for unit in self:
-            if unit.tag == tag:
-                return unit
-        return None
+        index = self._tag_to_index().get(tag, None)
+        if index is None:
+            return None
+        return self[index]
 
     def by_tag(self, tag):
         unit = self.find_by_tag(tag)
@@ -170,6 +285,9 @@ class Units(list):
 
         :param position:"""
         assert self, "Units object is empty"
+        spatial_index = self._spatial_index_for_query()
+        if spatial_index is not None:
+            return spatial_index.closest_distance(self._point_of(position))
         if isinstance(position, Unit):
             return min(self._bot_object._distance_squared_unit_to_unit(unit, position) for unit in self)**0.5
         return min(self._bot_object._distance_units_to_pos(self, position))
@@ -189,6 +307,9 @@ class Units(list):
 
         :param position:"""
         assert self, "Units object is empty"
+        spatial_index = self._spatial_index_for_query()
+        if spatial_index is not None:
+            return spatial_index.distances_squared(self._point_of(position)).max()**0.5
         if isinstance(position, Unit):
             return max(self._bot_object._distance_squared_unit_to_unit(unit, position) for unit in self)**0.5
         return max(self._bot_object._distance_units_to_pos(self, position))
@@ -207,6 +328,9 @@ class Units(list):
 
         :param position:"""
         assert self, "Units object is empty"
+        spatial_index = self._spatial_index_for_query()
+        if spatial_index is not None:
+            return self[spatial_index.closest_row(self._point_of(position))]
         if isinstance(position, Unit):
             return min(
                 (unit1 for unit1 in self),
@@ -230,6 +354,9 @@ class Units(list):
 
         :param position:"""
         assert self, "Units object is empty"
+        spatial_index = self._spatial_index_for_query()
+        if spatial_index is not None:
+            return self[spatial_index.furthest_row(self._point_of(position))]
         if isinstance(position, Unit):
             return max(
                 (unit1 for unit1 in self),
@@ -255,6 +382,9 @@ class Units(list):
         """
         if not self:
             return self
+        spatial_index = self._spatial_index_for_query()
+        if spatial_index is not None:
+            return self._subgroup_of_rows(spatial_index.rows_closer_than(self._point_of(position), distance))
         if isinstance(position, Unit):
             distance_squared = distance**2
             return self.subgroup(
@@ -281,6 +411,9 @@ class Units(list):
         """
         if not self:
             return self
+        spatial_index = self._spatial_index_for_query()
+        if spatial_index is not None:
+            return self._subgroup_of_rows(spatial_index.rows_further_than(self._point_of(position), distance))
         if isinstance(position, Unit):
             distance_squared = distance**2
             return self.subgroup(
@@ -310,6 +443,11 @@ class Units(list):
         """
         if not self:
             return self
+        spatial_index = self._spatial_index_for_query()
+        if spatial_index is not None:
+            return self._subgroup_of_rows(
+                spatial_index.rows_in_distance_between(self._point_of(position), distance1, distance2)
+            )
         if isinstance(position, Unit):
             distance1_squared = distance1**2
             distance2_squared = distance2**2
@@ -337,6 +475,8 @@ class Units(list):
         """
         if not self:
             return self
+        if 0 < n < len(self):
+            return self._subgroup_of_rows(self._rows_of_n_closest(position, n))
         return self.subgroup(self._list_sorted_by_distance_to(position)[:n])
 
     def furthest_n_units(self, position: Union[Unit, Point2, np.ndarray], n: int) -> Units:
@@ -356,8 +496,20 @@ class Units(list):
         """
         if not self:
             return self
+        if 0 < n < len(self):
+            return self._subgroup_of_rows(self._rows_of_n_closest(position, n, furthest=True))
         return self.subgroup(self._list_sorted_by_distance_to(position)[-n:])
 
+    def _rows_of_n_closest(self, position: Union[Unit, Point2, np.ndarray], n: int, furthest: bool = False) -> np.ndarray:
+        """Returns the rows of the n closest (or furthest) units sorted by ascending distance to position.
+        np.argpartition finds them in O(len(self)), only these n are sorted."""
+        distances_squared = self.pairwise_distances([self._point_of(position)], squared=True)[:, 0]
+        if furthest:
+            rows = np.argpartition(distances_squared, len(self) - n)[len(self) - n:]
+        else:
+            rows = np.argpartition(distances_squared, n - 1)[:n]
+        return rows[np.argsort(distances_squared[rows], kind="stable")]
+
     def in_distance_of_group(self, other_units: Units, distance: float) -> Units:
         """Returns units that are closer than distance from any unit in the other units object.
 
@@ -368,6 +520,8 @@ class Units(list):
         # Return self because there are no enemies
         if not self:
             return self
+        if self._uses_spatial_join(other_units):
+            return self._subgroup_of_rows(np.unique(self.pairs_in_distance_of_group(other_units, distance)[:, 0]))
         distance_squared = distance**2
         if len(self) == 1:
             if any(
@@ -393,12 +547,147 @@ class Units(list):
         :param other_units:"""
         assert self, "Units object is empty"
         assert other_units, "Given units object is empty"
+        if self._uses_spatial_join(other_units):
+            return self.closest_pair(other_units)[0]
         return min(
             self,
             key=lambda self_unit:
             min(self._bot_object._distance_squared_unit_to_unit(self_unit, other_unit) for other_unit in other_units),
         )
 
+    def positions_array(self) -> np.ndarray:
+        """Returns the positions of the units as array of shape (n, 2): [[x0, y0], [x1, y1], ...]
+        If this Units object is queried repeatedly in a frame, the positions are reused from its spatial index."""
+        spatial_index = self._spatial_index_for_query()
+        if spatial_index is not None:
+            return spatial_index.positions
+        flat_positions = (coord for unit in self for coord in unit.position_tuple)
+        return np.fromiter(flat_positions, dtype=float, count=2 * len(self)).reshape((len(self), 2))
+
+    @staticmethod
+    def _points_array(points: Union[Units, Iterable[Union[Unit, Point2, Tuple[float, float]]], np.ndarray]) -> np.ndarray:
+        """ Converts Units, an iterable of units and points, or an array with x and y in the first two columns to an array of shape (m, 2). """
+        if isinstance(points, Units):
+            return points.positions_array()
+        if isinstance(points, np.ndarray):
+            return points.reshape((len(points), -1))[:, :2].astype(float, copy=False)
+        return np.array([Units._point_of(point) for point in points], dtype=float).reshape((-1, 2))
+
+    def pairwise_distances(
+        self,
+        other: Union[Units, Iterable[Union[Unit, Point2, Tuple[float, float]]], np.ndarray],
+        squared: bool = False
+    ) -> np.ndarray:
+        """
+        Returns the distances between all units of this Units object and all units or points of 'other' as array of shape (len(self), len(other)).
+
+        Example::
+
+            distances = self.units.pairwise_distances(self.enemy_units)
+            # distances[i, j] is the distance between self.units[i] and self.enemy_units[j]
+
+        :param other: Units object, list of units or points, or array of shape (m, 2)
+        :param squared: return the squared distances, which saves the square root
+        """
+        distances_squared = cdist(self.positions_array(), self._points_array(other), "sqeuclidean")
+        if squared:
+            return distances_squared
+        return np.sqrt(distances_squared, out=distances_squared)
+
+    def closest_to_each(self, positions: Union[Units, Iterable[Union[Unit, Point2]], np.ndarray]) -> List[Unit]:
+        """
+        Returns for each of the positions the closest unit of this Units object, in one vectorized call instead of one closest_to call per position.
+
+        Example::
+
+            # For each of my workers the closest mineral field
+            mineral_fields = self.mineral_field.closest_to_each(self.workers)
+
+        :param positions: Units object, list of units or points, or array of shape (m, 2)
+        """
+        assert self, "Units object is empty"
+        rows = self.pairwise_distances(positions, squared=True).argmin(axis=0)
+        return [self[row] for row in rows.tolist()]
+
+    def closer_than_mask(
+        self, distance: Union[int, float], positions: Union[Units, Iterable[Union[Unit, Point2]], np.ndarray]
+    ) -> np.ndarray:
+        """
+        Returns a boolean array of shape (len(positions), len(self)), mask[i, j] is True if self[j] is closer than 'distance' to positions[i].
+
+        Example::
+
+            mask = self.enemy_units.closer_than_mask(10, self.townhalls)
+            threatened_townhalls = [townhall for townhall, row in zip(self.townhalls, mask) if row.any()]
+
+        :param distance:
+        :param positions: Units object, list of units or points, or array of shape (m, 2)
+        """
+        return self.pairwise_distances(positions, squared=True).T < distance**2
+
+    def closer_than_each(
+        self, distance: Union[int, float], positions: Union[Units, Iterable[Union[Unit, Point2]], np.ndarray]
+    ) -> List[Units]:
+        """
+        Returns for each of the positions the units of this Units object that are closer than 'distance', like one closer_than call per position.
+
+        Example::
+
+            for townhall, close_workers in zip(self.townhalls, self.workers.closer_than_each(10, self.townhalls)):
+                ...
+
+        :param distance:
+        :param positions: Units object, list of units or points, or array of shape (m, 2)
+        """
+        if not self:
+            return [self.subgroup([]) for _ in range(len(self._points_array(positions)))]
+        return [self._subgroup_of_rows(np.flatnonzero(row)) for row in self.closer_than_mask(distance, positions)]
+
+    def pairs_in_distance_of_group(self, other_units: Units, distance: float) -> np.ndarray:
+        """
+        Returns all pairs of a unit of this Units object and a unit of 'other_units' that are closer than 'distance',
+        as array of index pairs of shape (k, 2) sorted by the index in self: [[i0, j0], [i1, j1], ...]
+        where self[i] and other_units[j] are closer than 'distance'.
+        Uses KD-trees of both groups, so it scales to big fights instead of comparing every unit with every other unit.
+
+        Example::
+
+            for marine_index, zergling_index in self.units(UnitTypeId.MARINE).pairs_in_distance_of_group(self.enemy_units, 5):
+                ...
+
+        :param other_units:
+        :param distance:
+        """
+        return self._spatial_index_for_join().pairs_closer_than(other_units._spatial_index_for_join(), distance)
+
+    def closest_pair(self, other_units: Units) -> Tuple[Unit, Unit, float]:
+        """
+        Returns the unit of this Units object and the unit of 'other_units' that are closest to each other, and their distance.
+
+        Example::
+
+            my_unit, enemy_unit, distance = self.units.closest_pair(self.enemy_units)
+
+        :param other_units:
+        """
+        assert self, "Units object is empty"
+        assert other_units, "Given units object is empty"
+        row, other_row, distance = self._spatial_index_for_join().closest_pair(other_units._spatial_index_for_join())
+        return self[row], other_units[other_row], distance
+
+    def _uses_spatial_join(self, other_units: Units) -> bool:
+        """ Returns True if one of the groups is large enough for a spatial index, see _spatial_index_for_query """
+        threshold = getattr(self._bot_object, "spatial_index_threshold", 0)
+        return bool(threshold) and max(len(self), len(other_units)) >= threshold
+
+    def _spatial_index_for_join(self) -> SpatialIndex:
+        """ Returns the spatial index of this Units object, and builds it if it doesn't exist for this frame yet. """
+        game_loop = self._bot_object.state.game_loop if self._bot_object is not None else -1
+        spatial_index = self._spatial_index
+        if spatial_index is None or not spatial_index.is_valid_for(self, game_loop):
+            spatial_index = self._spatial_index = SpatialIndex(self, game_loop)
+        return spatial_index
+
     def _list_sorted_closest_to_distance(self, position: Union[Unit, Point2], distance: float) -> List[Unit]:
         """ This function should be a bit faster than using units.sorted(key=lambda u: u.distance_to(position)) """
         if isinstance(position, Unit):
@@ -421,6 +710,33 @@ class Units(list):
         """ Inverse of the function 'n_closest_to_distance', returns the furthest units instead """
         return self.subgroup(self._list_sorted_closest_to_distance(position=position, distance=distance)[-n:])
 
+    def _spatial_index_for_query(self) -> Optional[SpatialIndex]:
+        """Returns the spatial index of this Units object, or None if the linear scan should be used.
+        The index is only built on the second distance query in the same frame and if there are at least
+        'spatial_index_threshold' units, so collections that are queried once don't pay for building it."""
+        bot_object = self._bot_object
+        threshold = getattr(bot_object, "spatial_index_threshold", 0)
+        if not threshold or len(self) < threshold:
+            return None
+        game_loop = bot_object.state.game_loop
+        spatial_index = self._spatial_index
+        if spatial_index is not None and spatial_index.is_valid_for(self, game_loop):
+            return spatial_index
+        if self._spatial_query_frame != game_loop:
+            self._spatial_query_frame = game_loop
+            return None
+        self._spatial_index = SpatialIndex(self, game_loop)
+        return self._spatial_index
+
+    @staticmethod
+    def _point_of(position: Union[Unit, Point2, Point3, Tuple[float, float]]) -> Tuple[float, float]:
+        if isinstance(position, Unit):
+            return position.position_tuple
+        return position[0], position[1]
+
+    def _subgroup_of_rows(self, rows: np.ndarray) -> Units:
+        return self.subgroup(self[row] for row in rows.tolist())
+
     def subgroup(self, units):
         """
         Creates a new mutable Units object from Units or list object.
@@ -452,6 +768,60 @@ class Units(list):
         assert callable(pred), "Function is not callable"
         return self.subgroup(filter(pred, self))
 
+    def _table_rows(self) -> Tuple[UnitTable, np.ndarray]:
+        """Returns the unit table the units belong to and their rows in it, built the first time it is needed in a frame after the list changed.
+        Units of the current frame use the table of _prepare_units, otherwise a table is built from the protos of the units."""
+        game_loop = self._game_loop()
+        if self._table_and_rows is None or self._table_rows_frame != game_loop:
+            table = self[0]._table if self else None
+            if all(unit._table is table for unit in self):
+                rows = np.fromiter((unit._row for unit in self), dtype=np.intp, count=len(self))
+            else:
+                table = UnitTable([unit._proto for unit in self])
+                rows = np.arange(len(self))
+            self._table_and_rows = table, rows
+            self._table_rows_frame = game_loop
+        return self._table_and_rows
+
+    def where(self, **conditions) -> Units:
+        """
+        Filters the units that match all conditions. Unlike filter, the conditions are evaluated on the numpy columns
+        of the unit table for all units at once instead of calling a Python function on each unit.
+
+        Example::
+
+            from sc2.ids.unit_typeid import UnitTypeId
+            ready_gateways = self.structures.where(type_in={UnitTypeId.GATEWAY, UnitTypeId.WARPGATE}, ready=True)
+
+            hurt_stalkers_nearby = self.units.where(type_in=UnitTypeId.STALKER, shield_pct_lt=0.5, within=(self.start_location, 20))
+
+            idle_ground_units = self.units.where(idle=True, flying=False, structure=False)
+
+            from sc2.ids.ability_id import AbilityId
+            workers_mining_patch = self.workers.where(using_ability=AbilityId.HARVEST_GATHER, order_target_tag_eq=mineral_field.tag)
+
+        Conditions:
+            ready, idle, flying, burrowed, hallucination, powered, active, mine, enemy, visible, structure: bool,
+                visible only checks the display type, like unit.is_visible on clients with base build 82457 or newer
+            type_in, type_not_in: a UnitTypeId or an iterable of UnitTypeIds
+            tag_in, tag_not_in: an iterable of tags
+            using_ability: an AbilityId or an iterable of AbilityIds, checks the first order like unit.is_using_ability
+            within, outside: (position, distance), distance to the center of the unit like closer_than and further_than
+            <column>_lt, _le, _gt, _ge, _eq, _ne: compares a column of the unit table, e.g. health_lt=50 or weapon_cooldown_eq=0,
+                also health_pct, shield_pct and energy_pct
+
+        :param conditions:
+        """
+        if not self:
+            return self.subgroup([])
+        for name in ("within", "outside"):
+            if name in conditions:
+                position, distance = conditions[name]
+                conditions[name] = self._point_of(position), distance
+        table, rows = self._table_rows()
+        game_data = self._bot_object.game_data if self._bot_object is not None else None
+        return self._subgroup_of_rows(np.flatnonzero(conditions_mask(table, rows, conditions, game_data)))
+
     def sorted(self, key: callable, reverse: bool = False) -> Units:
         return self.subgroup(sorted(self, key=key, reverse=reverse))
 
@@ -481,6 +851,8 @@ class Units(list):
 
         :param other:
         """
+        if isinstance(other, list):
+            other = set(other)
         return self.filter(lambda unit: unit.tag in other)
 
     def tags_not_in(self, other: Union[Set[int], List[int], Dict[int, Any]]) -> Units:
@@ -496,6 +868,8 @@ class Units(list):
 
         :param other:
         """
+        if isinstance(other, list):
+            other = set(other)
         return self.filter(lambda unit: unit.tag not in other)
 
     def of_type(self, other: Union[UnitTypeId, Set[UnitTypeId], List[UnitTypeId], Dict[UnitTypeId, Any]]) -> Units:
@@ -508,6 +882,8 @@ class Units(list):
             some_attack_units = self.units.of_type({ZERGLING, ROACH, HYDRALISK, BROODLORD})
 
         :param other:"""
+        if self._valid_selection_cache() is not None:
+            return self._of_types(other)
         if isinstance(other, UnitTypeId):
             other = {other}
         elif isinstance(other, list):
@@ -528,6 +904,11 @@ class Units(list):
             other = {other}
         elif isinstance(other, list):
             other = set(other)
+        if self._valid_selection_cache() is not None:
+            excluded = frozenset(other)
+            return self._cached_selection(
+                ("exclude_type", excluded), lambda: self.filter(lambda unit: unit.type_id not in excluded)
+            )
         return self.filter(lambda unit: unit.type_id not in other)
 
     def same_tech(self, other: Set[UnitTypeId]) -> Units:
@@ -558,15 +939,8 @@ class Units(list):
             "Please use a set as this filter function is already fairly slow. For example" +
             " 'self.units.same_tech({UnitTypeId.LAIR})'"
         )
-        tech_alias_types: Set[int] = {u.value for u in other}
-        unit_data = self._bot_object.game_data.units
-        for unitType in other:
-            for same in unit_data[unitType.value]._proto.tech_alias:
-                tech_alias_types.add(same)
-        return self.filter(
-            lambda unit: unit._proto.unit_type in tech_alias_types or
-            any(same in tech_alias_types for same in unit._type_data._proto.tech_alias)
-        )
+        same_tech = self._bot_object.game_data.unit_type_table.same_tech_mask(frozenset(u.value for u in other))
+        return self._of_type_mask(same_tech)
 
     def same_unit(self, other: Union[UnitTypeId, Iterable[UnitTypeId]]) -> Units:
         """
@@ -591,27 +965,161 @@ class Units(list):
         """
         if isinstance(other, UnitTypeId):
             other = {other}
-        unit_alias_types: Set[int] = {u.value for u in other}
-        unit_data = self._bot_object.game_data.units
-        for unitType in other:
-            unit_alias_types.add(unit_data[unitType.value]._proto.unit_alias)
-        unit_alias_types.discard(0)
-        return self.filter(
-            lambda unit: unit._proto.unit_type in unit_alias_types or unit._type_data._proto.unit_alias in
-            unit_alias_types
-        )
+        same_unit = self._bot_object.game_data.unit_type_table.same_unit_mask(frozenset(u.value for u in other))
+        return self._of_type_mask(same_unit)
+
+    def _of_type_mask(self, type_mask: np.ndarray) -> Units:
+        """Returns the units whose type value is True in the boolean array over all type values.
 
-    @cached_property
+        :param type_mask:"""
+        if not self:
+            return self.subgroup([])
+        return self._subgroup_of_rows(np.flatnonzero(type_mask[self._table_column("type_id")]))
+
+    def _aggregate(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Returns the result of compute(), which is only called once per frame until the list changes.
+        Collections of the bot and their cached selections keep the result in the selection cache, so all copies share it.
+
+        :param key:
+        :param compute:"""
+        cache = self._valid_selection_cache()
+        if cache is None:
+            game_loop = self._game_loop()
+            if self._aggregates is None or self._aggregates_frame != game_loop:
+                self._aggregates = {}
+                self._aggregates_frame = game_loop
+            cache = self._aggregates
+        key = ("aggregate", key)
+        if key not in cache:
+            cache[key] = compute()
+        return cache[key]
+
+    def _table_positions(self) -> np.ndarray:
+        """ Positions of the units as array of shape (n, 2), taken from the positions of the whole unit table. """
+        table, rows = self._table_rows()
+        return table.positions[rows]
+
+    def _sum_of_type_column(self, column: str) -> float:
+        """Sums a column of the unit type table over the types of all units.
+
+        :param column: see UnitTypeTable"""
+        if not self:
+            return 0
+        type_table = self._bot_object.game_data.unit_type_table
+        return getattr(type_table, column)[self._table_column("type_id")].sum().item()
+
+    @property
     def center(self) -> Point2:
         """ Returns the central position of all units. """
         assert self, "Units object is empty"
-        amount = self.amount
-        return Point2(
-            (
-                sum(unit._proto.pos.x for unit in self) / amount,
-                sum(unit._proto.pos.y for unit in self) / amount,
-            )
-        )
+        return self._aggregate("center", lambda: Point2(self._table_positions().mean(axis=0).tolist()))
+
+    @property
+    def bounding_box(self) -> Tuple[float, float, float, float]:
+        """ Returns the minimum x, maximum x, minimum y and maximum y of the positions of all units. """
+        assert self, "Units object is empty"
+
+        def compute():
+            positions = self._table_positions()
+            (x_min, y_min), (x_max, y_max) = positions.min(axis=0).tolist(), positions.max(axis=0).tolist()
+            return x_min, x_max, y_min, y_max
+
+        return self._aggregate("bounding_box", compute)
+
+    @property
+    def convex_hull(self) -> List[Point2]:
+        """Returns the corners of the convex hull around the positions of all units in counterclockwise order.
+        If there are less than 3 different positions, these positions are returned."""
+        assert self, "Units object is empty"
+
+        def compute():
+            # Sorted by x and then y, so the first and last position are the ends if all units stand on a line
+            positions = np.unique(self._table_positions(), axis=0)
+            if len(positions) < 3:
+                return [Point2(position) for position in positions.tolist()]
+            if np.linalg.matrix_rank(positions - positions[0]) < 2:
+                return [Point2(positions[0].tolist()), Point2(positions[-1].tolist())]
+            hull = ConvexHull(positions)
+            return [Point2(position) for position in positions[hull.vertices].tolist()]
+
+        return self._aggregate("convex_hull", compute)
+
+    def total(self, column: str) -> float:
+        """
+        Returns the sum of a column of the unit table over all units, e.g. self.units.total("health")
+
+        :param column: see COLUMNS in unit_table.py"""
+        if not self:
+            return 0
+        return self._aggregate(("total", column), lambda: float(self._table_column(column).sum()))
+
+    def mean(self, column: str) -> float:
+        """
+        Returns the mean of a column of the unit table over all units, e.g. self.enemy_units.mean("energy")
+
+        :param column: see COLUMNS in unit_table.py"""
+        assert self, "Units object is empty"
+        return self._aggregate(("mean", column), lambda: float(self._table_column(column).mean()))
+
+    def _table_column(self, column: str) -> np.ndarray:
+        table, rows = self._table_rows()
+        return table[column][rows]
+
+    @property
+    def total_ground_dps(self) -> float:
+        """ Returns the sum of the dps of all units against ground units. Does not include upgrades. """
+        return self._aggregate("total_ground_dps", lambda: self._sum_of_type_column("ground_dps"))
+
+    @property
+    def total_air_dps(self) -> float:
+        """ Returns the sum of the dps of all units against air units. Does not include upgrades. """
+        return self._aggregate("total_air_dps", lambda: self._sum_of_type_column("air_dps"))
+
+    @property
+    def total_supply(self) -> float:
+        """ Returns the supply used by all units, e.g. 0.5 for each zergling. """
+        return self._aggregate("total_supply", lambda: self._sum_of_type_column("food_required"))
+
+    @property
+    def total_value(self) -> Cost:
+        """ Returns the resources all units are worth, as given by the API like BotAI.calculate_unit_value. """
+
+        def compute():
+            minerals = self._sum_of_type_column("mineral_cost")
+            vespene = self._sum_of_type_column("vespene_cost")
+            return Cost(minerals, vespene)
+
+        return self._aggregate("total_value", compute)
+
+    def damage_matrix(
+        self, targets: Units, ignore_armor: bool = False, include_overkill_damage: bool = True
+    ) -> DamageMatrix:
+        """
+        Returns the damage, cooldown, range and dps of each unit against each target as arrays of shape (len(self), len(targets)),
+        with the same values as Unit.calculate_damage_vs_target and Unit.calculate_dps_vs_target.
+
+        Example::
+
+            matrix = self.units.damage_matrix(self.enemy_units)
+            # Enemy that takes the most dps from all own units together
+            target = self.enemy_units[int(matrix.dps.sum(axis=0).argmax())]
+
+        :param targets:
+        :param ignore_armor:
+        :param include_overkill_damage:"""
+        return self._bot_object.game_data.damage_engine.matrix(self, targets, ignore_armor, include_overkill_damage)
+
+    def calculate_speeds(self, upgrades: Set[UpgradeId] = None) -> np.ndarray:
+        """
+        Returns the movement speed of each unit including buffs and upgrades, the same values as Unit.calculate_speed.
+
+        Example::
+
+            # Distance each unit can move until the next step
+            distances = self.units.calculate_speeds() / 22.4 * self.client.game_step
+
+        :param upgrades: upgrades to use for all units, by default the bot's upgrades are used for own units"""
+        return self._bot_object._speed_model.speeds(self, upgrades)
 
     @property
     def selected(self) -> Units:
@@ -626,17 +1134,17 @@ class Units(list):
     @property
     def ready(self) -> Units:
         """ Returns all structures that are ready (construction complete). """
-        return self.filter(lambda unit: unit.is_ready)
+        return self._cached_selection("ready", lambda: self.filter(lambda unit: unit.is_ready))
 
     @property
     def not_ready(self) -> Units:
         """ Returns all structures that are not ready (construction not complete). """
-        return self.filter(lambda unit: not unit.is_ready)
+        return self._cached_selection("not_ready", lambda: self.filter(lambda unit: not unit.is_ready))
 
     @property
     def idle(self) -> Units:
         """ Returns all units or structures that are doing nothing (unit is standing still, structure is doing nothing). """
-        return self.filter(lambda unit: unit.is_idle)
+        return self._cached_selection("idle", lambda: self.filter(lambda unit: unit.is_idle))
 
     @property
     def owned(self) -> Units:
@@ -705,6 +1213,25 @@ class Units(list):
         return self.sorted(lambda unit: unit.is_idle, reverse=True)
 
 
+def _invalidates_indices(name: str):
+    """ Wraps the list method with this name so it invalidates the tag map and the spatial index of the Units object. """
+    list_method = getattr(list, name)
+
+    def method(self, *args, **kwargs):
+        self._invalidate_indices()
+        return list_method(self, *args, **kwargs)
+
+    method.__name__ = name
+    method.__doc__ = list_method.__doc__
+    return method
+
+
+for _name in (
+    "extend", "insert", "remove", "pop", "clear", "sort", "reverse", "__setitem__", "__delitem__", "__iadd__", "__imul__"
+):
+    setattr(Units, _name, _invalidates_indices(_name))
+
+
 class UnitSelection(Units):
 
     def __init__(self, parent, selection=None):